@@ -1,9 +1,17 @@
 """Simple Documentation Agents - No LLM needed"""
-
+import copy
+import tempfile
+from collections import ChainMap
+from concurrent.futures import Future
+from pathlib import Path
 
 from models import Documentation
+from profiling import Profiler
+from scheduler import StageScheduler
 
 from all_agents.repository_analyser import RepositoryFetcher
+from all_agents.blob_cache import BlobCache, DEFAULT_CACHE_DIR
+from all_agents.analysis_cache import AnalysisCache
 from all_agents.python_files_analyzer import PythonAnalyzer
 from all_agents.docker_files_analyser import DockerAnalyzer
 from all_agents.CICD_analyser import CICDAnalyzer
@@ -11,30 +19,105 @@ from all_agents.document_generator import DocumentationGenerator
 from all_agents.security_analyser import analyse_security
 from all_agents.test_coverage_analyzer import RepositoryTestCoverageFetcher
 from all_agents.review_agent import CodeReviewAgent
-from playwright.sync_api import sync_playwright
-from all_agents.constants import PDF_STYLES, PDF_TAB_ORDER
+from all_agents.mermaid_renderer import MermaidRenderer
+from all_agents.tool_registry import get_registry
+from all_agents.browser_pool import BrowserPool, get_browser_pool
+from all_agents.file_policy import FilePolicy
+from all_agents.file_stream import SpooledFiles, TextFiles, pump
+from all_agents.tree_index import (
+    is_ci_file, is_compose_file, is_config_file, is_docker_file, is_python_file, is_readme,
+)
+from all_agents.constants import (
+    MERMAID_MAX_DIAGRAMS, MERMAID_MAX_NODES, MERMAID_PACKAGE_DEPTH, PDF_STYLES, PDF_TAB_ORDER,
+)
 
 
 def reference_constructor(loader, node):
         return loader.construct_sequence(node) 
 
 class DocumentationOrchestrator:
-    """Orchestrates all agents in sequence"""
+    """Orchestrates all agents as a dependency graph"""
     
-    def __init__(self, url: str, token: str, platform: str = "gitlab"):
-        self.fetcher = RepositoryFetcher(url, token, platform)
-        self.python_analyzer = PythonAnalyzer()
-        self.docker_analyzer = DockerAnalyzer()
+    def __init__(self, url: str, token: str, platform: str = "gitlab",
+                 fetch_mode: str = "archive", fetch_workers: int = 8,
+                 cache_dir: str | None = None, blob_cache_max_mb: int | None = 1024,
+                 incremental: bool = True, analysis_cache_max_mb: int = 256, max_workers: int = 4,
+                 review_backend: str = "inprocess", parse_workers: int | None = None,
+                 diagram_depth: int = MERMAID_PACKAGE_DEPTH, diagram_max_nodes: int = MERMAID_MAX_NODES,
+                 max_diagrams: int = MERMAID_MAX_DIAGRAMS, prerender_diagrams: bool = True,
+                 browser_pool: BrowserPool | None = None, streaming: bool = False,
+                 file_policy: FilePolicy | None = None):
+        # max_workers=1 runs the agents one after another
+        self.max_workers = max_workers
+        # Stream files past the agents instead of holding them all; see run()
+        self.streaming = streaming
+        # blob_cache_max_mb=None disables the blob cache
+        self.blob_cache = (
+            BlobCache(cache_dir, max_bytes=blob_cache_max_mb * 1024 * 1024)
+            if blob_cache_max_mb else None
+        )
+        # Which files are fetched at all (globs and a size limit), decided before download
+        self.fetcher = RepositoryFetcher(url, token, platform, mode=fetch_mode,
+                                         max_workers=fetch_workers, blob_cache=self.blob_cache,
+                                         policy=file_policy)
+        # Per-file results from previous runs, so only changed files are re-analysed
+        self.analysis_cache = (
+            AnalysisCache(cache_dir, max_bytes=analysis_cache_max_mb * 1024 * 1024)
+            if incremental else None
+        )
+        # Large repositories are parsed on a pool of parse_workers processes
+        self.python_analyzer = PythonAnalyzer(
+            self.analysis_cache, workers=parse_workers, diagram_depth=diagram_depth,
+            diagram_max_nodes=diagram_max_nodes, max_diagrams=max_diagrams,
+        )
+        self.docker_analyzer = DockerAnalyzer(self.analysis_cache)
         self.cicd_analyzer = CICDAnalyzer()
         self.test_coverage_analyzer = RepositoryTestCoverageFetcher()
-        self.generator = DocumentationGenerator()
-        self.reviewer = CodeReviewAgent()
+        # Templates are compiled once; their bytecode is cached under cache_dir
+        self.generator = DocumentationGenerator(cache_dir=cache_dir)
+        # Browsers stay up between reports; orchestrators in one process share them
+        self.browser_pool = browser_pool or get_browser_pool()
+        # Diagrams are rendered to SVG once and cached; None leaves them to the browser
+        self.mermaid_renderer = (
+            MermaidRenderer(cache_dir, browser_pool=self.browser_pool) if prerender_diagrams else None
+        )
+        # Tool paths and versions are resolved once and remembered on disk
+        self.reviewer = CodeReviewAgent(self.analysis_cache, backend=review_backend,
+                                        tools=get_registry(cache_dir or DEFAULT_CACHE_DIR))
+        # Where the last run's time went; see run()
+        self.profiler = Profiler()
     
+    def fork(self) -> "DocumentationOrchestrator":
+        """
+        An orchestrator that can document another repository concurrently.
+
+        Caches, API clients, analysers, the Jinja environment and the browser
+        pool are shared; the fetcher and reviewer, which hold per-run state,
+        are per fork.
+        """
+        other = copy.copy(self)
+        other.fetcher = self.fetcher.clone()
+        other.reviewer = copy.copy(self.reviewer)
+        other.profiler = Profiler()
+        return other
+
     def save_as_pdf(self, html_content, output_path):
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page()
-            page.set_content(html_content, wait_until="networkidle")
+        """Print the report to PDF on a pooled browser page and wait for it"""
+        self.save_as_pdf_async(html_content, output_path).result()
+
+    def save_as_pdf_async(self, html_content, output_path) -> Future:
+        """Queue the PDF on the browser pool, so several reports can print at once
+
+        ``html_content`` is the report itself, or the Path of a report
+        already written to disk, which the browser loads from the file.
+        """
+        def render(page):
+            if isinstance(html_content, Path):
+                page.goto(html_content.resolve().as_uri(), wait_until="load")
+            else:
+                page.set_content(html_content, wait_until="load")
+            # The report flags itself once its scripts have run; no network or timer involved
+            page.wait_for_function("() => document.body.dataset.ready === 'true'")
             # Show all tab content before capturing
             page.evaluate(f"""
             document.querySelectorAll('.tabcontent').forEach(el => {{
@@ -54,66 +137,169 @@ class DocumentationOrchestrator:
             }});
             """)
 
-        # Wait for Mermaid diagrams to render
-            page.wait_for_timeout(2000)
+            # Pre-rendered diagrams are already inline SVG; draw any that aren't
+            if page.locator("pre.mermaid").count() and page.evaluate("() => !!window.mermaid"):
+                page.evaluate("() => window.mermaid.run({ querySelector: 'pre.mermaid' })")
             page.pdf(
                 path=output_path,
                 format="A4",
                 margin={"top": "0.75in", "right": "0.75in", 
                         "bottom": "0.75in", "left": "0.75in"}
             )
-            browser.close()
             print(f"Report saved successfully to {output_path}")
-    def run(self, project_id: str) -> str:
-        """Run the complete agent flow"""
+        return self.browser_pool.submit(render)
+
+    def run(self, project_id: str, ref: str | None = None,
+            html_path: Path | None = None, md_path: Path | None = None) -> str:
+        """Run the complete agent flow on ``ref`` (the default branch if None)
+
+        Once the files are fetched the analysers are independent of each
+        other, so they run concurrently; each later agent waits only on the
+        stages whose output it consumes.
+
+        With ``streaming`` the files are never all in memory at once: each
+        one passes the parse stage and a spool directory for the reviewer as
+        it arrives, and only the small config, README, CI and Docker files
+        are kept as text. Binary files are skipped.
+
+        Every stage, fetch call and review tool run is timed on a fresh
+        ``profiler``, which holds the run's profile afterwards.
+
+        Given ``html_path`` and ``md_path`` the reports are streamed into
+        those files and their paths are returned in place of the contents.
+        """
         
         print("\n🤖 Starting Documentation Agent Flow...\n")
+        # Caches are shared between forks, so every lookup reports to this run's profiler
+        profiler = self.profiler = self.fetcher.profiler = self.reviewer.profiler = Profiler()
+        scheduler = StageScheduler(max_workers=self.max_workers, profiler=profiler)
+        spool = tempfile.TemporaryDirectory(prefix="doc-agent-") if self.streaming else None
+        streamed = {}
         
         # Agent 1: Fetch files
-        print("📥 Agent 1: Fetching repository files...")
-        files, project, ref = self.fetcher.fetch(project_id)
+        def fetch():
+            if not self.streaming:
+                print("📥 Agent 1: Fetching repository files...")
+                return self.fetcher.fetch(project_id, ref)
+            print("📥 Agent 1: Streaming repository files...")
+            blobs, project, pinned = self.fetcher.stream(project_id, ref)
+            # Files that are not UTF-8 are recorded as fetch errors, as fetch() does
+            errors = self.fetcher.errors
+            texts = TextFiles(is_config_file, is_readme, is_ci_file, is_docker_file, is_compose_file,
+                              errors=errors)
+            sources = SpooledFiles(spool.name, is_python_file, errors=errors)
+            modules = self.python_analyzer.module_stream(profiler)
+            try:
+                texts, sources, streamed["modules"] = pump(blobs, [texts, sources, modules])
+            finally:
+                modules.close()
+            streamed["sources"] = sources
+            # Python sources are read back from the spool only when looked up
+            return ChainMap(texts, sources), project, pinned
+        scheduler.add("fetch", fetch)
         
+        # One AST pass per Python file, shared by the Python, mermaid and review agents
+        def parse(fetch):
+            if self.streaming:
+                # Already done file by file during the fetch; no trees are kept
+                return streamed["modules"], {}
+            files, _, _ = fetch
+            return self.python_analyzer.extract(files, profiler)
+        scheduler.add("parse", parse, deps=("fetch",))
+
         # Agent 2: Analyze Python
-        print("🐍 Agent 2: Analyzing Python code...")
-        python_metadata = self.python_analyzer.analyze(files)
+        def python(fetch, parse):
+            print("🐍 Agent 2: Analyzing Python code...")
+            files, _, _ = fetch
+            modules, _ = parse
+            return self.python_analyzer.analyze(files, modules)
+        scheduler.add("python", python, deps=("fetch", "parse"))
         
         # Agent 3: Analyze Docker
-        print("🐳 Agent 3: Analyzing Dockerfile...")
-        docker_files_with_content = {
-            name: content
-            for name, content in files.items()
-            if any(k in name.lower() for k in ("docker", "compose"))
-        }
-        docker_metadata = self.docker_analyzer.analyze(docker_files_with_content)
+        def docker(fetch):
+            print("🐳 Agent 3: Analyzing Dockerfile...")
+            files, _, _ = fetch
+            docker_files_with_content = {
+                name: files[name]
+                for name in files
+                if any(k in name.lower() for k in ("docker", "compose"))
+            }
+            return self.docker_analyzer.analyze(docker_files_with_content, profiler)
+        scheduler.add("docker", docker, deps=("fetch",))
         
         # Agent 4: Analyze CI/CD
-        print("⚙️  Agent 4: Analyzing CI/CD pipeline...")
-        cicd_yml = files.get('.gitlab-ci.yml') or files.get('.github/workflows')
-        cicd_metadata = self.cicd_analyzer.analyze(cicd_yml) if cicd_yml else None
+        def cicd(fetch):
+            print("⚙️  Agent 4: Analyzing CI/CD pipeline...")
+            files, _, _ = fetch
+            cicd_yml = files.get('.gitlab-ci.yml') or files.get('.github/workflows')
+            return self.cicd_analyzer.analyze(cicd_yml) if cicd_yml else None
+        scheduler.add("cicd", cicd, deps=("fetch",))
         
         # Agent 5: Generate mermaid code
-        print("🧜 Agent 5: Generating mermaid code...")
-        mermaid_code = self.python_analyzer.generate_mermaid(python_metadata.docstrings)
-        metadata = Documentation(
-            python=python_metadata,
-            docker=docker_metadata,
-            cicd=cicd_metadata,
-            mermaid=mermaid_code
-        )
-         # Agent 6: analysing security
-        print("🔒 Agent 6: analysing security")
-        findings = analyse_security(metadata)
+        def mermaid(python):
+            print("🧜 Agent 5: Generating mermaid code...")
+            return self.python_analyzer.build_mermaid_diagrams(python.modules)
+        scheduler.add("mermaid", mermaid, deps=("python",))
+
+        def svg(mermaid):
+            if self.mermaid_renderer is None:
+                return mermaid
+            print("🖼  Pre-rendering diagrams...")
+            svgs = self.mermaid_renderer.render_all([d["source"] for d in mermaid], profiler)
+            return [{**d, "svg": svg} for d, svg in zip(mermaid, svgs)]
+        scheduler.add("svg", svg, deps=("mermaid",))
+
+        def metadata(python, docker, cicd, svg):
+            return Documentation(
+                python=python,
+                docker=docker,
+                cicd=cicd,
+                mermaid=self.python_analyzer.generate_mermaid(svg),
+                diagrams=svg,
+            )
+        scheduler.add("metadata", metadata, deps=("python", "docker", "cicd", "svg"))
+
+        # Agent 6: analysing security
+        def security(metadata):
+            print("🔒 Agent 6: analysing security")
+            return analyse_security(metadata)
+        scheduler.add("security", security, deps=("metadata",))
         
         # Agent 7: Analyze test coverage
-        print("🔬 Agent 7: Analyzing test Coverage...")
-        test_coverage = self.test_coverage_analyzer.get_latest_tag_coverage(project)
+        def coverage(fetch):
+            print("🔬 Agent 7: Analyzing test Coverage...")
+            _, project, _ = fetch
+            # Pipelines, jobs and tags are read from the forge, so this takes a host slot too
+            with self.fetcher.forge_slot():
+                return self.test_coverage_analyzer.get_latest_tag_coverage(project)
+        scheduler.add("coverage", coverage, deps=("fetch",))
 
         # Agent 8: Review the code
-        print("🔨 Agent 8: Reviewing the python code")
-        review_result = self.reviewer.run(files)
+        def review(fetch, parse):
+            print("🔨 Agent 8: Reviewing the python code")
+            files, _, _ = fetch
+            _, trees = parse
+            if self.streaming:
+                sources = streamed["sources"]
+                return self.reviewer.run(sources, trees=trees, source_root=sources.root)
+            return self.reviewer.run(files, trees=trees, source_root=self.fetcher.source_root)
+        scheduler.add("review", review, deps=("fetch", "parse"))
 
+        try:
+            results = scheduler.run()
+        finally:
+            if spool:
+                spool.cleanup()
+        findings = results["security"]
+        test_coverage = results["coverage"]
+        review_result = results["review"]
 
-        docs, md_docs = self.generator.generate(metadata, findings, test_coverage, review_result)
+        with profiler.stage("generate"):
+            if html_path and md_path:
+                docs, md_docs = self.generator.write(results["metadata"], findings, test_coverage, review_result,
+                                                     html_path, md_path)
+            else:
+                docs, md_docs = self.generator.generate(results["metadata"], findings, test_coverage, review_result)
         
         print("\n✅ Documentation generated successfully!\n")
         
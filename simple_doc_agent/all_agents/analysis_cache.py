@@ -0,0 +1,123 @@
+"""Per-file analysis results persisted across runs"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from all_agents.blob_cache import DEFAULT_CACHE_DIR
+from profiling import Profiler
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MiB
+
+
+class AnalysisCache:
+    """
+    Stores the result of analysing one file, keyed by a hash of the stage,
+    the analyser/tool version, the file path and the file content.
+
+    A rerun on a commit that touched a handful of files only re-analyses
+    those files; everything else is read back from disk. Bumping a version
+    string invalidates that stage's entries without touching the others;
+    those, like results for files that have since changed, are never read
+    again and age out as the cache is trimmed back under ``max_bytes`` by
+    evicting the least recently used entries.
+    """
+
+    def __init__(self, root: str | Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root or DEFAULT_CACHE_DIR) / "analysis"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self._entries())
+
+    def _entries(self):
+        return (p for p in self.root.glob("*/*/*.json") if p.is_file())
+
+    @staticmethod
+    def key(stage: str, version: str, path: str, content: str | bytes) -> str:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256()
+        for part in (stage, version, path):
+            digest.update(part.encode("utf-8") + b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path_for(self, stage: str, key: str) -> Path:
+        return self.root / stage / key[:2] / f"{key}.json"
+
+    def get(self, stage: str, version: str, path: str, content: str | bytes,
+            profiler: Profiler | None = None) -> Any | None:
+        """Return the cached result for this file, or None on a miss; ``profiler`` counts it for its run"""
+        cache_path = self._path_for(stage, self.key(stage, version, path, content))
+        try:
+            value = json.loads(cache_path.read_text(encoding="utf-8"))
+            # Bump mtime so eviction sees this entry as recently used
+            os.utime(cache_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses[stage] += 1
+            if profiler:
+                profiler.cache(f"analysis.{stage}", misses=1)
+            return None
+        with self._lock:
+            self.hits[stage] += 1
+        if profiler:
+            profiler.cache(f"analysis.{stage}", hits=1)
+        return value
+
+    def put(self, stage: str, version: str, path: str, content: str | bytes, value: Any) -> None:
+        """Atomically store the result for this file"""
+        cache_path = self._path_for(stage, self.key(stage, version, path, content))
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            size = os.path.getsize(tmp)
+            try:
+                # Another worker may have stored the same entry meanwhile
+                replaced = cache_path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, cache_path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._size += size - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache is 90% of max_bytes"""
+        with self._lock:
+            entries = []
+            for p in self._entries():
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            entries.sort()
+            size = sum(e[1] for e in entries)
+            target = int(self.max_bytes * 0.9)
+            for _, entry_size, p in entries:
+                if size <= target:
+                    break
+                p.unlink(missing_ok=True)
+                size -= entry_size
+            self._size = size
+
+    def stats(self) -> dict:
+        return {
+            stage: {"hits": self.hits[stage], "misses": self.misses[stage]}
+            for stage in sorted(set(self.hits) | set(self.misses))
+        }
@@ -0,0 +1,110 @@
+"""Content-addressed on-disk cache of repository blobs"""
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from profiling import Profiler
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "simple-doc-agent"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB
+
+
+def git_blob_sha(data: bytes) -> str:
+    """The SHA git assigns to a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class BlobCache:
+    """
+    Stores file contents on disk keyed by git blob SHA.
+
+    Because the key is the content hash from the tree listing, an unchanged
+    file is a hit on every later run regardless of branch or path. Writes
+    are atomic (temp file + rename) so concurrent workers and interrupted
+    runs never leave a partial blob behind, and the cache is trimmed back
+    under ``max_bytes`` by evicting the least recently used blobs.
+    """
+
+    def __init__(self, root: str | Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root or DEFAULT_CACHE_DIR) / "blobs"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.root.glob("*/*") if p.is_file())
+
+    def path_for(self, sha: str) -> Path:
+        return self.root / sha[:2] / sha[2:]
+
+    def get(self, sha: str, profiler: Profiler | None = None) -> bytes | None:
+        """Return the cached blob, or None on a miss; ``profiler`` counts it for its run"""
+        path = self.path_for(sha)
+        try:
+            data = path.read_bytes()
+            # Bump mtime so eviction sees this blob as recently used; another
+            # worker may evict it in between, which is just a miss
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            if profiler:
+                profiler.cache("blob", misses=1)
+            return None
+        with self._lock:
+            self.hits += 1
+        if profiler:
+            profiler.cache("blob", hits=1)
+        return data
+
+    def put(self, sha: str, data: bytes) -> None:
+        """Atomically store a blob"""
+        path = self.path_for(sha)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._size += len(data)
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used blobs until the cache is 90% of max_bytes"""
+        with self._lock:
+            blobs = []
+            for p in self.root.glob("*/*"):
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                if not p.name.startswith(".tmp-"):
+                    blobs.append((st.st_mtime, st.st_size, p))
+            blobs.sort()
+            size = sum(b[1] for b in blobs)
+            target = int(self.max_bytes * 0.9)
+            for _, blob_size, p in blobs:
+                if size <= target:
+                    break
+                p.unlink(missing_ok=True)
+                size -= blob_size
+            self._size = size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "size_bytes": self._size,
+        }
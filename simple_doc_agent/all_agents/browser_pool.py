@@ -0,0 +1,140 @@
+"""Long-lived headless browsers shared by everything that renders pages"""
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+# Pages are thrown away after this many renders to bound their memory
+DEFAULT_RENDERS_PER_PAGE = 50
+
+_STOP = object()
+
+
+class BrowserPool:
+    """
+    A fixed set of worker threads, each owning a Playwright instance, one
+    Chromium browser and one page.
+
+    Playwright's sync API is bound to the thread that started it, so every
+    job runs on a worker: ``submit(fn)`` calls ``fn(page)`` there and returns
+    a Future. Browsers start on the first job and then stay up, so a batch
+    of reports pays Chromium's cold start once per worker rather than once
+    per report. A page (and its context) is replaced after
+    ``renders_per_page`` jobs or after a job fails. ``close()`` — also run
+    at interpreter exit — lets queued jobs finish and shuts the browsers down.
+    """
+
+    def __init__(self, size: int = 2, renders_per_page: int = DEFAULT_RENDERS_PER_PAGE):
+        self.size = max(1, size)
+        self.renders_per_page = renders_per_page
+        self._jobs: queue.Queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._idle = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def submit(self, fn: Callable[[Any], Any]) -> Future:
+        """Run ``fn(page)`` on a pooled page"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BrowserPool is closed")
+            # Start another browser only when every running one is busy
+            if self._idle == 0 and len(self._workers) < self.size:
+                worker = threading.Thread(target=self._work, name=f"browser-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._jobs.put((fn, future))
+        return future
+
+    def run(self, fn: Callable[[Any], Any]) -> Any:
+        """``submit`` and wait for the result"""
+        return self.submit(fn).result()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for _ in workers:
+            self._jobs.put(_STOP)
+        for worker in workers:
+            worker.join()
+
+    def _work(self) -> None:
+        from playwright.sync_api import sync_playwright
+
+        playwright = browser = context = page = None
+        renders = 0
+        try:
+            while True:
+                with self._lock:
+                    self._idle += 1
+                job = self._jobs.get()
+                with self._lock:
+                    self._idle -= 1
+                if job is _STOP:
+                    return
+                fn, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if playwright is None:
+                        playwright = sync_playwright().start()
+                    if browser is None:
+                        browser = playwright.chromium.launch()
+                    if page is None:
+                        context = browser.new_context()
+                        page = context.new_page()
+                        renders = 0
+                    renders += 1
+                    result = fn(page)
+                except BaseException as e:
+                    future.set_exception(e)
+                    renders = self.renders_per_page  # a failed page is not reused
+                else:
+                    future.set_result(result)
+                if context is not None and renders >= self.renders_per_page:
+                    try:
+                        context.close()
+                    except Exception:
+                        # The browser is broken or gone; shut down whatever is
+                        # left of it and launch a new one for the next job
+                        _close_quietly(browser)
+                        browser = None
+                    context = page = None
+        finally:
+            if browser is not None:
+                _close_quietly(browser)
+            if playwright is not None:
+                playwright.stop()
+
+
+def _close_quietly(browser: Any) -> None:
+    """Close a browser that may already have crashed or disconnected"""
+    try:
+        browser.close()
+    except Exception:
+        pass
+
+
+_pool: BrowserPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool(size: int = 2) -> BrowserPool:
+    """The process-wide pool, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = BrowserPool(size)
+        return _pool
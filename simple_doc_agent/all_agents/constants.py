@@ -1,5 +1,24 @@
 # constants.py
 
+# Bump when an analyser's per-file output changes, to invalidate cached results
+PYTHON_ANALYSIS_VERSION = "3"
+DOCKER_ANALYSIS_VERSION = "1"
+
+# Import-graph diagrams: package depth of the overview, nodes per diagram, diagrams in total
+MERMAID_PACKAGE_DEPTH = 2
+MERMAID_MAX_NODES = 40
+MERMAID_MAX_DIAGRAMS = 6
+
+# Coverage below these percentages is flagged critical / warning in the report
+COVERAGE_CRITICAL_BELOW = 50
+COVERAGE_WARNING_BELOW = 80
+
+# The HTML report draws its issue and coverage tables in the browser; the PDF
+# prints a summary capped at these many issues, files and coverage rows
+REPORT_PDF_MAX_ISSUES = 200
+REPORT_PDF_TOP_FILES = 25
+REPORT_PDF_MAX_COVERAGE_ROWS = 50
+
 PDF_STYLES = """
     body { font-family: Arial, sans-serif; font-size: 12px; color: #333; }
     
@@ -36,6 +55,9 @@ PDF_STYLES = """
     .metric-card { border: 1px solid #ddd; padding: 10px; min-width: 100px; text-align: center; }
     
     code { background: #f4f4f4; padding: 2px 4px; border-radius: 3px; font-size: 10px; }
+
+    .vtable, .vtable-controls { display: none !important; }
+    .print-summary { display: block !important; }
 """
 
 PDF_TAB_ORDER = [
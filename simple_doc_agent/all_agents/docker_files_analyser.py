@@ -4,66 +4,80 @@ from pathlib import Path
 from dataclasses import asdict
 from gitlab import Gitlab
 from models import DockerMetadata
+from profiling import Profiler
+from all_agents.analysis_cache import AnalysisCache
+from all_agents.constants import DOCKER_ANALYSIS_VERSION
 
 class DockerAnalyzer:
     """Analyzes Dockerfile"""
+
+    def __init__(self, analysis_cache: AnalysisCache | None = None):
+        self.analysis_cache = analysis_cache
     
-    def analyze(self, dockerfiles: dict[str, str]) -> list[DockerMetadata]:
+    def analyze(self, dockerfiles: dict[str, str], profiler: Profiler | None = None) -> list[DockerMetadata]:
 
-        """Extract Docker metadata"""
+        """Extract Docker metadata; ``profiler`` counts this run's cache lookups"""
         results = []
         for filename, content in dockerfiles.items():
-            base_image = "unknown"
-            exposed_ports = []
-            volumes = []
-            env_vars = []
-            workdir = "/app"
-            entrypoint=""
+            if self.analysis_cache is None:
+                results.append(self._analyze_file(filename, content))
+                continue
+            cached = self.analysis_cache.get("docker", DOCKER_ANALYSIS_VERSION, filename, content, profiler)
+            if cached is not None:
+                results.append(DockerMetadata(**cached))
+                continue
+            metadata = self._analyze_file(filename, content)
+            self.analysis_cache.put("docker", DOCKER_ANALYSIS_VERSION, filename, content, asdict(metadata))
+            results.append(metadata)
+        return results
+
+    def _analyze_file(self, filename: str, content: str) -> DockerMetadata:
+        """Extract Docker metadata from a single Dockerfile or compose file"""
+        base_image = "unknown"
+        exposed_ports = []
+        volumes = []
+        env_vars = []
+        workdir = "/app"
+        entrypoint=""
 
-            if 'compose' in filename:
-                env_vars=(self.extract_compose_env_vars(content))
-            else:
-                for line in content.split('\n'):
-                    line = line.strip()
-                    
-                    if line.startswith('FROM '):
-                        base_image = line.split('FROM ')[1].split(' ')[0]
-                    
-                    elif line.startswith('EXPOSE '):
-                        ports = line.split('EXPOSE ')[1].split()
-                        exposed_ports.extend(ports)
-                    
-                    elif line.startswith('VOLUME '):
-                        vol = line.split('VOLUME ')[1].strip('[]"\'')
-                        volumes.append(vol)
-                    
-                    elif line.startswith('ENV '):
-                        # Handle multiple variables in one line
-                        parts = line[4:].split()
-                        for part in parts:
-                            if '=' in part:
-                                env_vars.append(part)
-                    
-                    elif line.startswith('WORKDIR '):
-                        workdir = line.split('WORKDIR ')[1]
-                    elif line.startswith('ENTRYPOINT '):
-                        entrypoint = line.split('ENTRYPOINT ')[1]
+        if 'compose' in filename:
+            env_vars=(self.extract_compose_env_vars(content))
+        else:
+            for line in content.split('\n'):
+                line = line.strip()
+                
+                if line.startswith('FROM '):
+                    base_image = line.split('FROM ')[1].split(' ')[0]
                 
-            
-        
-            results.append(
-                DockerMetadata(
-                    filename=filename,
-                    base_image=base_image,
-                    exposed_ports=exposed_ports,
-                    volumes=volumes,
-                    workdir=workdir,
-                    entrypoint=entrypoint,
-                    env_vars=env_vars,
-                    
-                )
+                elif line.startswith('EXPOSE '):
+                    ports = line.split('EXPOSE ')[1].split()
+                    exposed_ports.extend(ports)
+                
+                elif line.startswith('VOLUME '):
+                    vol = line.split('VOLUME ')[1].strip('[]"\'')
+                    volumes.append(vol)
+                
+                elif line.startswith('ENV '):
+                    # Handle multiple variables in one line
+                    parts = line[4:].split()
+                    for part in parts:
+                        if '=' in part:
+                            env_vars.append(part)
+                
+                elif line.startswith('WORKDIR '):
+                    workdir = line.split('WORKDIR ')[1]
+                elif line.startswith('ENTRYPOINT '):
+                    entrypoint = line.split('ENTRYPOINT ')[1]
+
+        return DockerMetadata(
+            filename=filename,
+            base_image=base_image,
+            exposed_ports=exposed_ports,
+            volumes=volumes,
+            workdir=workdir,
+            entrypoint=entrypoint,
+            env_vars=env_vars,
         )
-        return results
 
     def parse_env_file(self, path: str) -> list[str]:
         vars = []
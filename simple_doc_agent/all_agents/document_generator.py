@@ -1,38 +1,107 @@
 """Simple Documentation generator"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
-from jinja2 import Environment, FileSystemLoader
-import markdown
+from pathlib import Path
+from typing import Tuple
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 from models import Documentation, TestCoverage
 from dataclasses import is_dataclass
+from all_agents.blob_cache import DEFAULT_CACHE_DIR
+from all_agents.mermaid_renderer import MERMAID_VERSION, inline_script, local_mermaid_js
+from all_agents.report_tables import (
+    coverage_summary, coverage_table, embed_json, issue_summary, issue_table,
+)
+
+HTML_TEMPLATE = 'docs.html.j2'
+MD_TEMPLATE = 'docs.md.j2'
+
+_render_pool: ThreadPoolExecutor | None = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> ThreadPoolExecutor:
+    """The process-wide pool reports render on, started on first use
+
+    Every generator shares it, so building more orchestrators or forks never
+    leaves idle render threads behind.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="render")
+        return _render_pool
 
 
 class DocumentationGenerator:
-    """Generates final documentation"""
-    
-    def __init__(self, templates_dir: str = './templates'):
-        self.env = Environment(loader=FileSystemLoader(templates_dir))
-
-
-    def generate(self, metadata: Documentation, findings:list, coverage:TestCoverage, review_result:dict) -> str:
-        """Generate markdown documentation"""
-        
-        template_html = self.env.get_template('docs.html.j2')
-        template_md = self.env.get_template('docs.md.j2')
-        # Convert dataclasses to dicts for template
-        context = {
+    """Generates final documentation
+
+    Templates are compiled once per process, and their bytecode is kept in
+    ``<cache_dir>/jinja`` so later processes skip compiling them too. The
+    HTML and Markdown reports render side by side on the shared render pool,
+    either to strings (``generate``) or streamed chunk by chunk into files
+    (``write``).
+    """
+
+    def __init__(self, templates_dir: str = './templates', cache_dir: str | None = None):
+        self.cache_dir = cache_dir
+        bytecode_dir = Path(cache_dir or DEFAULT_CACHE_DIR) / "jinja"
+        bytecode_dir.mkdir(parents=True, exist_ok=True)
+        self.env = Environment(
+            loader=FileSystemLoader(templates_dir),
+            bytecode_cache=FileSystemBytecodeCache(str(bytecode_dir)),
+        )
+        self.templates = {name: self.env.get_template(name) for name in (HTML_TEMPLATE, MD_TEMPLATE)}
+
+    def context(self, metadata: Documentation, findings: list, coverage: TestCoverage, review_result: dict) -> dict:
+        """Convert dataclasses to dicts for the templates"""
+        client_mermaid = any(not d.get('svg') for d in metadata.diagrams)
+        return {
             'python': metadata.python,
             'docker': [asdict(d) for d in metadata.docker] if metadata.docker else [],
             'cicd': asdict(metadata.cicd) if metadata.cicd else {},
             'mermaid': metadata.mermaid,
+            'diagrams': metadata.diagrams,
+            # Only load mermaid.js in the page if a diagram was not pre-rendered, and embed
+            # the local copy when there is one so the report works offline
+            'client_mermaid': client_mermaid,
+            'mermaid_js': self._mermaid_js() if client_mermaid else None,
+            'mermaid_version': MERMAID_VERSION,
             'security_findings':findings,
             'test_coverage':asdict(coverage) if is_dataclass(coverage) else {},
-            'review_results': review_result
+            'review_results': review_result,
+            # Big tables go to the page as JSON and are drawn as they scroll into view;
+            # the PDF gets capped summaries instead
+            'review_payload': embed_json(issue_table(review_result)),
+            'review_summary': issue_summary(review_result),
+            'coverage_payload': embed_json(coverage_table(coverage)),
+            'coverage_summary': coverage_summary(coverage),
         }
-        
-        markdown_only_content = template_md.render(**context)
-        markdown_html_content = template_html.render(**context)
-        # Convert Markdown to HTML
-        html_content = markdown.markdown(markdown_html_content, extensions=['tables', "fenced_code"])
-        
-        return markdown_html_content, markdown_only_content
 
+    def _mermaid_js(self) -> str | None:
+        script = local_mermaid_js(self.cache_dir)
+        return inline_script(script.read_text(encoding="utf-8")) if script else None
+
+    def generate(self, metadata: Documentation, findings:list, coverage:TestCoverage, review_result:dict) -> Tuple[str, str]:
+        """Generate the HTML and Markdown documentation as strings"""
+        context = self.context(metadata, findings, coverage, review_result)
+        # Rendering only reads the context, so both reports can share it
+        pool = get_render_pool()
+        html = pool.submit(self.templates[HTML_TEMPLATE].render, **context)
+        md = pool.submit(self.templates[MD_TEMPLATE].render, **context)
+        return html.result(), md.result()
+
+    def write(self, metadata: Documentation, findings: list, coverage: TestCoverage, review_result: dict,
+              html_path: str | Path, md_path: str | Path) -> Tuple[Path, Path]:
+        """Stream the HTML and Markdown documentation into files, never holding either whole"""
+        context = self.context(metadata, findings, coverage, review_result)
+        pool = get_render_pool()
+        html = pool.submit(_dump, self.templates[HTML_TEMPLATE], context, Path(html_path))
+        md = pool.submit(_dump, self.templates[MD_TEMPLATE], context, Path(md_path))
+        return html.result(), md.result()
+
+
+def _dump(template: Template, context: dict, path: Path) -> Path:
+    with path.open("w", encoding="utf-8") as f:
+        f.writelines(template.generate(**context))
+    return path
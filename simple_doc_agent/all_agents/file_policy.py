@@ -0,0 +1,120 @@
+"""Which repository files are worth fetching, decided from the tree listing alone"""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Pattern
+
+import yaml
+
+from all_agents.tree_index import is_ci_file, is_config_file, is_readme
+
+# Larger files are generated or vendored code, or data; they are never fetched
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+
+# Environments, vendored packages, build output and generated code
+DEFAULT_EXCLUDE = (
+    "**/venv/**", "**/.venv/**", "**/site-packages/**", "**/node_modules/**",
+    "**/__pycache__/**", "**/.tox/**", "**/.nox/**", "build/**", "dist/**",
+    "**/migrations/**", "*_pb2.py", "*_pb2_grpc.py", "*_pb2.pyi",
+)
+
+
+@lru_cache(maxsize=None)
+def _compile(pattern: str) -> Pattern:
+    """
+    A glob over repository paths as a regex.
+
+    ``*`` and ``?`` stay within one directory, ``**/`` spans any number of
+    them (including none), and a pattern without a slash matches the file
+    name in any directory. Patterns with a slash are anchored at the
+    repository root, with or without a leading ``/``.
+    """
+    if "/" not in pattern:
+        pattern = "**/" + pattern
+    pattern = pattern.lstrip("/")
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r"\Z")
+
+
+def matches(path: str, patterns: Iterable[str]) -> bool:
+    return any(_compile(pattern).match(path) for pattern in patterns)
+
+
+class FilePolicy:
+    """
+    Include/exclude globs and a size limit for the files the agents read.
+
+    A file is fetched when it matches no ``exclude`` pattern, matches an
+    ``include`` pattern (when any are given) and is no larger than
+    ``max_file_size`` bytes. ``include`` narrows the source files only: the
+    top-level README, pyproject.toml and CI config are always kept unless
+    excluded. Sizes come from the tree listing or archive headers wherever
+    the forge provides them, so nothing is downloaded just to be dropped.
+    """
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = DEFAULT_EXCLUDE,
+                 max_file_size: int | None = DEFAULT_MAX_FILE_SIZE):
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.max_file_size = max_file_size
+
+    @classmethod
+    def from_config(cls, config: dict) -> "FilePolicy":
+        """
+        The policy in a ``doc_agent.yaml`` mapping.
+
+        Reads the ``fetch_policy`` section (``include``, ``exclude``,
+        ``max_file_size_kb``, 0 for no limit); ``forbidden_paths`` entries
+        are excluded as well, a trailing ``/`` meaning the whole directory.
+        Keys left empty keep their defaults; ``exclude: []`` excludes nothing.
+        """
+        section = config.get("fetch_policy") or {}
+        exclude = section.get("exclude")
+        exclude = list(DEFAULT_EXCLUDE if exclude is None else exclude)
+        for path in config.get("forbidden_paths") or []:
+            exclude.append(path + "**" if path.endswith("/") else path)
+        max_kb = section.get("max_file_size_kb")
+        if max_kb is None:
+            max_kb = DEFAULT_MAX_FILE_SIZE // 1024
+        return cls(
+            include=section.get("include") or (),
+            exclude=exclude,
+            max_file_size=int(max_kb) * 1024 or None,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FilePolicy":
+        """The policy in a YAML file; the defaults if it doesn't exist"""
+        try:
+            text = Path(path).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return cls()
+        return cls.from_config(yaml.safe_load(text) or {})
+
+    def allows(self, path: str) -> bool:
+        """Whether the policy's globs let ``path`` through"""
+        if matches(path, self.exclude):
+            return False
+        if not self.include or is_readme(path) or is_config_file(path) or is_ci_file(path):
+            return True
+        return matches(path, self.include)
+
+    def too_big(self, size: int | None) -> bool:
+        return size is not None and self.max_file_size is not None and size > self.max_file_size
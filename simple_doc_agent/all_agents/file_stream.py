@@ -0,0 +1,152 @@
+"""Streaming file pipeline: fetched files flow past per-stage consumers once"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from models import FetchError
+
+# Leading bytes checked for NULs to tell binary files apart
+BINARY_SNIFF_BYTES = 8000
+
+
+def is_binary(data: bytes) -> bool:
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
+
+def decode(path: str, data: bytes, errors: List[FetchError] | None) -> str | None:
+    """The file's text, or None if it is not UTF-8
+
+    Rejected files go to ``errors`` as the non-streaming fetch records them,
+    once per path however many consumers saw them.
+    """
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if errors is None:
+            print(f"✗ Skipping non UTF-8 file {path}")
+        elif not any(error.path == path for error in errors):
+            errors.append(FetchError(path=path, error=str(e)))
+            print(f"✗ Skipping non UTF-8 file {path}")
+        return None
+
+
+class FileConsumer(ABC):
+    """
+    One stage's view of the file stream.
+
+    ``consume`` sees each file the stage ``wants`` exactly once, as raw
+    bytes, and should keep only what the stage needs; ``finish`` returns the
+    stage's result once the stream is exhausted.
+    """
+
+    def wants(self, path: str) -> bool:
+        return True
+
+    @abstractmethod
+    def consume(self, path: str, data: bytes) -> None:
+        """Take one file from the stream"""
+
+    def finish(self):
+        return None
+
+
+def pump(stream: Iterable[Tuple[str, bytes]], consumers: List[FileConsumer]) -> list:
+    """Feed every file to the consumers that want it, then collect their results"""
+    for path, data in stream:
+        for consumer in consumers:
+            if consumer.wants(path):
+                consumer.consume(path, data)
+    return [consumer.finish() for consumer in consumers]
+
+
+class TextFiles(FileConsumer):
+    """Keeps the decoded text of the (small) files matching any of ``checks``
+
+    Files that are not UTF-8 are dropped and recorded in ``errors``.
+    """
+
+    def __init__(self, *checks: Callable[[str], bool], errors: List[FetchError] | None = None):
+        self.checks = checks
+        self.errors = errors
+        self.files: Dict[str, str] = {}
+
+    def wants(self, path: str) -> bool:
+        return any(check(path) for check in self.checks)
+
+    def consume(self, path: str, data: bytes) -> None:
+        text = decode(path, data, self.errors)
+        if text is not None:
+            self.files[path] = text
+
+    def finish(self) -> Dict[str, str]:
+        return self.files
+
+
+class SpooledFiles(FileConsumer, Mapping[str, str]):
+    """
+    Writes matching files under ``root`` at their repository paths.
+
+    Doubles as a read-only ``{path: text}`` mapping that reads each file back
+    from disk when it is looked up, so code written against the in-memory
+    files dict works unchanged while holding only the paths. Files that are
+    not UTF-8 are dropped and recorded in ``errors``.
+    """
+
+    def __init__(self, root: str | Path, check: Callable[[str], bool] = lambda path: True,
+                 errors: List[FetchError] | None = None):
+        self.root = Path(root)
+        self.check = check
+        self.errors = errors
+        self._paths: Dict[str, int] = {}   # path -> size in bytes
+
+    def wants(self, path: str) -> bool:
+        return self.check(path)
+
+    def consume(self, path: str, data: bytes) -> None:
+        if decode(path, data, self.errors) is None:
+            return
+        dest = self.root / path
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_bytes(data)
+        self._paths[path] = len(data)
+
+    def finish(self) -> "SpooledFiles":
+        return self
+
+    def size(self, path: str) -> int:
+        return self._paths[path]
+
+    def __getitem__(self, path: str) -> str:
+        if path not in self._paths:
+            raise KeyError(path)
+        return (self.root / path).read_text(encoding="utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._paths
+
+
+def subset(files: Mapping[str, str], paths: Iterable[str]) -> Mapping[str, str]:
+    """``{path: files[path]}``, without reading anything for spooled files"""
+    if isinstance(files, SpooledFiles):
+        other = SpooledFiles(files.root, files.check)
+        other._paths = {path: files.size(path) for path in paths}
+        return other
+    return {path: files[path] for path in paths}
+
+
+def content_size(files: Mapping[str, str], path: str) -> int:
+    """Size of one file's content, without reading spooled files back"""
+    if isinstance(files, SpooledFiles):
+        return files.size(path)
+    return len(files[path])
+
+
+def disk_root(files: Mapping[str, str]) -> Path | None:
+    """The directory spooled files already live in, if any"""
+    return files.root if isinstance(files, SpooledFiles) else None
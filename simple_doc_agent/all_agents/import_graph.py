@@ -0,0 +1,191 @@
+"""Module-level import graph of a repository, collapsed into Mermaid diagrams"""
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+from models import ModuleRecord
+
+OTHER = "(other)"
+
+
+def module_name(path: str) -> str:
+    """Dotted module name for a repository path (``src/`` layouts drop the prefix)"""
+    parts = path[:-3].split("/") if path.endswith(".py") else path.split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    if len(parts) > 1 and parts[0] == "src":
+        parts = parts[1:]
+    return ".".join(parts)
+
+
+class ImportGraph:
+    """
+    Which of the repository's own modules import which.
+
+    Imports are resolved against the modules that exist in the repository;
+    third-party and standard-library imports are dropped. Absolute imports
+    that don't match a full module name are matched on a unique dotted
+    suffix, which covers code run from a subdirectory with flat imports.
+    """
+
+    def __init__(self, modules: Dict[str, ModuleRecord]):
+        self.names: Dict[str, str] = {}   # module name -> path
+        self.packages: Set[str] = set()
+        for path in modules:
+            name = module_name(path)
+            if name:
+                self.names[name] = path
+                if path.endswith("__init__.py"):
+                    self.packages.add(name)
+
+        suffixes: Dict[str, Set[str]] = defaultdict(set)
+        for name in self.names:
+            parts = name.split(".")
+            for i in range(1, len(parts)):
+                suffixes[".".join(parts[i:])].add(name)
+        self._suffixes = {key: next(iter(names)) for key, names in suffixes.items() if len(names) == 1}
+
+        self.edges: Dict[str, Set[str]] = {name: set() for name in self.names}
+        for path, record in modules.items():
+            source = module_name(path)
+            if source not in self.edges:
+                continue
+            for imported in record.imports:
+                target = self._resolve(source, imported)
+                if target and target != source:
+                    self.edges[source].add(target)
+
+    def _resolve(self, source: str, imported: str) -> str | None:
+        if imported.startswith("."):
+            level = len(imported) - len(imported.lstrip("."))
+            base = source.split(".") if source in self.packages else source.split(".")[:-1]
+            if level > 1:
+                base = base[:-(level - 1)]
+            imported = ".".join(base + [imported.lstrip(".")]).strip(".")
+        # "pkg.mod.func" may name an attribute; fall back to the enclosing module
+        parts = imported.split(".")
+        for end in range(len(parts), 0, -1):
+            candidate = ".".join(parts[:end])
+            if candidate in self.names:
+                return candidate
+            if candidate in self._suffixes:
+                return self._suffixes[candidate]
+        return None
+
+    def collapse(self, depth: int, within: str | None = None) -> Tuple[Counter, Counter]:
+        """
+        Group modules by their first ``depth`` name components.
+
+        With ``within``, only modules under that package are grouped (relative
+        to it) and imports leaving it are dropped. Returns the module count per
+        group and the import count per (group, group) edge.
+        """
+        def group(name: str) -> str | None:
+            if within is not None:
+                if name != within and not name.startswith(within + "."):
+                    return None
+                prefix = within.split(".")
+                return ".".join(name.split(".")[:len(prefix) + depth])
+            return ".".join(name.split(".")[:depth])
+
+        sizes: Counter = Counter()
+        weights: Counter = Counter()
+        for source, targets in self.edges.items():
+            source_group = group(source)
+            if source_group is None:
+                continue
+            sizes[source_group] += 1
+            for target in targets:
+                target_group = group(target)
+                if target_group is not None and target_group != source_group:
+                    weights[source_group, target_group] += 1
+        return sizes, weights
+
+
+def cap_nodes(sizes: Counter, weights: Counter, max_nodes: int) -> Tuple[Counter, Counter]:
+    """Keep the ``max_nodes - 1`` best-connected groups and fold the rest into one node"""
+    if len(sizes) <= max_nodes:
+        return sizes, weights
+    degree: Counter = Counter()
+    for (source, target), weight in weights.items():
+        degree[source] += weight
+        degree[target] += weight
+    ranked = sorted(sizes, key=lambda g: (-degree[g], -sizes[g], g))
+    keep = set(ranked[:max_nodes - 1])
+
+    folded_sizes: Counter = Counter()
+    for name, size in sizes.items():
+        folded_sizes[name if name in keep else OTHER] += size
+    folded_weights: Counter = Counter()
+    for (source, target), weight in weights.items():
+        source = source if source in keep else OTHER
+        target = target if target in keep else OTHER
+        if source != target:
+            folded_weights[source, target] += weight
+    return folded_sizes, folded_weights
+
+
+def cap_edges(weights: Counter, max_edges: int) -> Tuple[Counter, int]:
+    """The ``max_edges`` heaviest edges and how many lighter ones were dropped"""
+    if len(weights) <= max_edges:
+        return weights, 0
+    ranked = sorted(weights.items(), key=lambda item: (-item[1], item[0]))
+    return Counter(dict(ranked[:max_edges])), len(weights) - max_edges
+
+
+def to_mermaid(sizes: Counter, weights: Counter, strip: str = "") -> str:
+    """A left-to-right flowchart with one node per group"""
+    ids = {name: f"n{i}" for i, name in enumerate(sorted(sizes))}
+    lines = ["flowchart LR"]
+    for name, node_id in ids.items():
+        label = name[len(strip):].lstrip(".") if strip and name.startswith(strip) else name
+        label = (label or name).replace('"', "#quot;")
+        count = sizes[name]
+        lines.append(f'{node_id}["{label}<br/>{count} module{"s" if count != 1 else ""}"]')
+    for (source, target), weight in sorted(weights.items()):
+        arrow = f"-->|{weight}|" if weight > 1 else "-->"
+        lines.append(f"{ids[source]} {arrow} {ids[target]}")
+    return "\n".join(lines)
+
+
+def build_diagrams(modules: Dict[str, ModuleRecord], depth: int = 2, max_nodes: int = 40,
+                   max_diagrams: int = 6, max_edges: int = 120) -> List[Dict[str, str]]:
+    """
+    An overview of the whole repository plus detail views of its largest packages.
+
+    The overview groups modules ``depth`` levels deep, going shallower while
+    that gives more than ``max_nodes`` groups and folding the remainder into
+    one node at depth 1. Each of the remaining ``max_diagrams - 1`` diagrams
+    zooms one level into one of the packages with the most modules. Every
+    diagram keeps only its ``max_edges`` heaviest edges. Returns
+    ``{"title", "source"}`` dicts.
+    """
+    def diagram(title: str, sizes: Counter, weights: Counter, strip: str = "") -> Dict[str, str]:
+        weights, hidden = cap_edges(weights, max_edges)
+        if hidden:
+            title += f", {hidden} lighter dependencies hidden"
+        return {"title": title, "source": to_mermaid(sizes, weights, strip=strip)}
+
+    graph = ImportGraph(modules)
+    if not graph.names:
+        return []
+
+    level = max(1, depth)
+    sizes, weights = graph.collapse(level)
+    while len(sizes) > max_nodes and level > 1:
+        level -= 1
+        sizes, weights = graph.collapse(level)
+    sizes, weights = cap_nodes(sizes, weights, max_nodes)
+    diagrams = [diagram(f"Module dependencies ({len(graph.names)} modules)", sizes, weights)]
+
+    # Zoom into the biggest groups that actually have internal structure
+    for package, _ in sizes.most_common():
+        if len(diagrams) >= max_diagrams:
+            break
+        if package == OTHER:
+            continue
+        inner_sizes, inner_weights = graph.collapse(1, within=package)
+        if len(inner_sizes) < 2:
+            continue
+        inner_sizes, inner_weights = cap_nodes(inner_sizes, inner_weights, max_nodes)
+        diagrams.append(diagram(f"Inside {package}", inner_sizes, inner_weights, strip=package))
+    return diagrams
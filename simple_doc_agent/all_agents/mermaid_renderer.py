@@ -0,0 +1,198 @@
+"""Server-side rendering of Mermaid diagrams to SVG, cached by source"""
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import List
+
+import requests
+
+from all_agents.blob_cache import DEFAULT_CACHE_DIR
+from all_agents.browser_pool import BrowserPool, get_browser_pool
+from profiling import Profiler
+
+MERMAID_VERSION = "11.4.1"
+MERMAID_JS_URL = f"https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js"
+# The copy shipped next to the code; `python -m all_agents.mermaid_renderer` refreshes it
+BUNDLED_MERMAID_JS = Path(__file__).resolve().parent.parent / "static" / "mermaid.min.js"
+
+RENDER_TIMEOUT_MS = 60_000
+
+# Renders every source in order; a failed diagram yields {error} instead of {svg}
+RENDER_SCRIPT = """
+async (diagrams) => {
+    const results = [];
+    for (const [id, source] of diagrams) {
+        try {
+            const { svg } = await window.mermaid.render(id, source);
+            results.push({ svg });
+        } catch (err) {
+            results.push({ error: String(err && err.message || err) });
+        }
+    }
+    return results;
+}
+"""
+
+
+class MermaidRenderer:
+    """
+    Turns Mermaid sources into SVG markup once, at generation time.
+
+    Each diagram is rendered by mermaid.js in a headless Chromium page and
+    the SVG is stored under ``<cache>/svg`` keyed by a hash of the Mermaid
+    version and the source, so an unchanged diagram is never rendered twice
+    and a run whose diagrams are all cached starts no browser. mermaid.js
+    comes from ``mermaid_js``, ``MERMAID_JS`` or ``static/mermaid.min.js``;
+    generation never touches the network unless ``download`` (or
+    ``MERMAID_DOWNLOAD=1``) allows a one-off download into the cache.
+    Diagrams that cannot be rendered come back as None and are left to the
+    browser.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None, mermaid_js: str | Path | None = None,
+                 browser_pool: BrowserPool | None = None, download: bool | None = None):
+        self.root = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.browser_pool = browser_pool
+        self.svg_dir = self.root / "svg"
+        self.mermaid_js = mermaid_js or os.getenv("MERMAID_JS")
+        self.download = os.getenv("MERMAID_DOWNLOAD") == "1" if download is None else download
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def diagram_id(source: str) -> str:
+        """Stable element id, so cached SVGs keep working when inlined side by side"""
+        digest = hashlib.sha256(f"{MERMAID_VERSION}\0{source}".encode("utf-8")).hexdigest()
+        return f"mmd-{digest[:16]}"
+
+    def _path_for(self, source: str) -> Path:
+        key = self.diagram_id(source)[4:]
+        return self.svg_dir / key[:2] / f"{key}.svg"
+
+    def render_all(self, sources: List[str], profiler: Profiler | None = None) -> List[str | None]:
+        """SVG markup for each source, or None where it could not be rendered
+
+        ``profiler`` counts this run's cache hits and misses.
+        """
+        svgs: List[str | None] = []
+        missing: List[int] = []
+        for i, source in enumerate(sources):
+            try:
+                svgs.append(self._path_for(source).read_text(encoding="utf-8"))
+                self.hits += 1
+            except FileNotFoundError:
+                svgs.append(None)
+                missing.append(i)
+        self.misses += len(missing)
+        if profiler:
+            profiler.cache("diagrams", hits=len(sources) - len(missing), misses=len(missing))
+        if not missing:
+            return svgs
+
+        try:
+            rendered = self._render([sources[i] for i in missing])
+        except Exception as e:
+            print(f"⚠ Could not pre-render diagrams, leaving them to the browser: {e}")
+            return svgs
+        for i, result in zip(missing, rendered):
+            if "svg" not in result:
+                print(f"⚠ Mermaid could not render a diagram: {result.get('error')}")
+                continue
+            svgs[i] = result["svg"]
+            self._store(sources[i], result["svg"])
+        return svgs
+
+    def _render(self, sources: List[str]) -> List[dict]:
+        script = self._script_path()
+        diagrams = [[self.diagram_id(source), source] for source in sources]
+
+        def render(page) -> List[dict]:
+            page.set_default_timeout(RENDER_TIMEOUT_MS)
+            page.set_content("<!DOCTYPE html><html><body></body></html>")
+            page.add_script_tag(path=str(script))
+            page.evaluate("mermaid.initialize({ startOnLoad: false, securityLevel: 'strict' })")
+            return page.evaluate(RENDER_SCRIPT, diagrams)
+
+        pool = self.browser_pool or get_browser_pool()
+        return pool.run(render)
+
+    def _script_path(self) -> Path:
+        """A local mermaid.js; downloaded into the cache only when that is enabled"""
+        script = local_mermaid_js(self.root, self.mermaid_js)
+        if script is None:
+            if not self.download:
+                raise FileNotFoundError(
+                    f"no mermaid.js: run `python -m all_agents.mermaid_renderer` to fetch it into "
+                    f"{BUNDLED_MERMAID_JS}, set MERMAID_JS, or set MERMAID_DOWNLOAD=1"
+                )
+            script = _downloaded_mermaid_js(self.root)
+            self._write(script, fetch_mermaid_js())
+        return script
+
+    def _store(self, source: str, svg: str) -> None:
+        self._write(self._path_for(source), svg)
+
+    @staticmethod
+    def _write(path: Path, text: str) -> None:
+        """Atomically write a cache file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _downloaded_mermaid_js(cache_dir: Path) -> Path:
+    return cache_dir / "mermaid" / f"mermaid-{MERMAID_VERSION}.min.js"
+
+
+def local_mermaid_js(cache_dir: str | Path | None = None, mermaid_js: str | Path | None = None) -> Path | None:
+    """The mermaid.js to use without the network: ``mermaid_js``, ``MERMAID_JS``,
+    the bundled copy, or one downloaded into ``cache_dir`` earlier; None if there is none"""
+    explicit = mermaid_js or os.getenv("MERMAID_JS")
+    if explicit:
+        return Path(explicit)
+    for script in (BUNDLED_MERMAID_JS, _downloaded_mermaid_js(Path(cache_dir or DEFAULT_CACHE_DIR))):
+        if script.exists():
+            return script
+    return None
+
+
+def inline_script(source: str) -> str:
+    """``source`` made safe to embed in a <script> element
+
+    ``</script`` would end the element and ``<!--`` can change how the rest
+    of it is parsed; both are rewritten to escapes that mean the same in JS.
+    """
+    source = re.sub(r"</(script)", r"<\\/\1", source, flags=re.IGNORECASE)
+    return source.replace("<!--", "\\x3C!--")
+
+
+def fetch_mermaid_js() -> str:
+    """The pinned mermaid.js build from the CDN"""
+    print(f"📥 Downloading mermaid.js {MERMAID_VERSION}...")
+    response = requests.get(MERMAID_JS_URL, timeout=60)
+    response.raise_for_status()
+    return response.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Fetch mermaid.js {MERMAID_VERSION} to bundle with the code")
+    parser.add_argument("-o", "--output", default=str(BUNDLED_MERMAID_JS))
+    args = parser.parse_args()
+    MermaidRenderer._write(Path(args.output), fetch_mermaid_js())
+    print(f"✓ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
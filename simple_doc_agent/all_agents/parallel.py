@@ -0,0 +1,55 @@
+"""Helpers shared by the agents that fan work out over processes"""
+import multiprocessing
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, List, Mapping
+
+from all_agents.file_stream import content_size
+
+
+def pool_context():
+    """A start method whose workers don't inherit the parent's threads or pipes"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class KillablePool:
+    """
+    A process pool whose running tasks can be stopped.
+
+    ``ProcessPoolExecutor`` can only cancel tasks that have not started, so a
+    task past its deadline keeps a worker busy long after the caller gave up
+    on it. This puts a ``multiprocessing`` pool, which can be terminated,
+    behind the same ``submit`` returning a ``Future``.
+    """
+
+    def __init__(self, workers: int, context=None):
+        self._pool = (context or pool_context()).Pool(workers)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future: Future = Future()
+
+        def settle(set_outcome: Callable, outcome) -> None:
+            try:
+                set_outcome(outcome)
+            except InvalidStateError:
+                pass    # cancelled by the caller meanwhile
+
+        self._pool.apply_async(fn, args, callback=lambda result: settle(future.set_result, result),
+                               error_callback=lambda error: settle(future.set_exception, error))
+        return future
+
+    def terminate(self) -> None:
+        """Kill the workers, along with whatever they are running"""
+        self._pool.terminate()
+        self._pool.join()
+
+
+def balanced_chunks(files: Mapping[str, str], count: int) -> List[List[str]]:
+    """Split paths into up to ``count`` groups of similar total content size"""
+    chunks: List[List[str]] = [[] for _ in range(max(1, count))]
+    sizes = [0] * len(chunks)
+    for path, size in sorted(((path, content_size(files, path)) for path in files), key=lambda kv: -kv[1]):
+        smallest = sizes.index(min(sizes))
+        chunks[smallest].append(path)
+        sizes[smallest] += size
+    return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,313 @@
+"""Single-pass extraction of a Python module's structure"""
+import ast
+from typing import Any, Dict, List, Tuple
+
+from models import ModuleRecord
+
+CLI_FRAMEWORKS = ("click", "typer")
+# Decorator attributes that turn a function into a Click/Typer command
+COMMAND_DECORATORS = ("command", "group")
+PARAM_DECORATORS = ("option", "argument")
+
+
+def extract_module(path: str, content: str) -> Tuple[ModuleRecord, ast.Module | None]:
+    """Parse one file and collect its record; the tree is None if it doesn't parse"""
+    try:
+        tree = ast.parse(content, filename=path)
+    except (SyntaxError, ValueError) as e:
+        return ModuleRecord(path=path, error=str(e)), None
+    visitor = ModuleVisitor(path)
+    visitor.visit(tree)
+    return visitor.record, tree
+
+
+def extract_records(sources: List[Tuple[str, str]]) -> List[ModuleRecord]:
+    """Records for a chunk of (path, content) pairs; runs in a worker process.
+
+    Only the records travel back to the parent: they pickle far smaller and
+    faster than the syntax trees they were built from.
+    """
+    return [extract_module(path, content)[0] for path, content in sources]
+
+
+def _literal(node: ast.AST | None) -> Any:
+    """The node's value if it is a literal, otherwise its source text"""
+    if node is None:
+        return None
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, SyntaxError, TypeError):
+        return ast.unparse(node)
+
+
+def _dotted(node: ast.AST) -> str:
+    """``a.b.c`` for a Name/Attribute chain, '' for anything else"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return ""
+
+
+class ModuleVisitor(ast.NodeVisitor):
+    """
+    Walks a module once, collecting docstrings, the class/method hierarchy,
+    imports, function signatures, decorators and Click/Typer commands.
+
+    Qualified names follow Python's ``__qualname__`` (``Outer.method``,
+    ``func.<locals>.inner``), and every class and function carries its
+    first and last line.
+    """
+
+    def __init__(self, path: str):
+        self.record = ModuleRecord(path=path)
+        self._scope: List[str] = []
+        self._classes: List[Dict[str, Any] | None] = []  # enclosing class, None inside a function
+        # Local names bound to click/typer modules and to their decorators
+        self._framework_aliases: Dict[str, str] = {}
+        self._decorator_aliases: Dict[str, Tuple[str, str]] = {}
+        # Objects whose .command()/.group() register commands: Typer apps and Click groups
+        self._command_owners: Dict[str, str] = {}
+
+    # ── Helpers ─────────────────────────────────────────────────────────
+
+    def _qualname(self, name: str) -> str:
+        return ".".join(self._scope + [name])
+
+    def _add_docstring(self, node: ast.AST, kind: str, name: str, qualname: str) -> None:
+        doc = ast.get_docstring(node)
+        if doc:
+            self.record.docstrings.append({
+                "type": kind,
+                "name": name,
+                "qualname": qualname,
+                "doc": doc,
+                "lineno": node.body[0].lineno if kind == "Module" else node.lineno,
+            })
+
+    def _add_import(self, module: str) -> None:
+        if module and module not in self.record.imports:
+            self.record.imports.append(module)
+
+    # ── Visitors ────────────────────────────────────────────────────────
+
+    def visit_Module(self, node: ast.Module) -> None:
+        self._add_docstring(node, "Module", "<module>", "<module>")
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self._add_import(alias.name)
+            root = alias.name.split(".")[0]
+            if root in CLI_FRAMEWORKS:
+                self._framework_aliases[alias.asname or root] = root
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        # "from pkg import name" may name a submodule or an attribute, so keep
+        # pkg.name and let consumers fall back to pkg when it is not a module
+        base = "." * node.level + (node.module or "")
+        for alias in node.names:
+            if alias.name == "*":
+                self._add_import(base)
+            else:
+                self._add_import(f"{base}.{alias.name}" if node.module else base + alias.name)
+        framework = (node.module or "").split(".")[0]
+        if node.level == 0 and framework in CLI_FRAMEWORKS:
+            for alias in node.names:
+                self._decorator_aliases[alias.asname or alias.name] = (framework, alias.name)
+
+    def visit_Assign(self, node: ast.Assign | ast.AnnAssign) -> None:
+        # app = typer.Typer() / cli = click.Group() / app = Typer()
+        if isinstance(node.value, ast.Call):
+            func = _dotted(node.value.func)
+            head = func.split(".")[0]
+            framework = self._framework_aliases.get(head)
+            if framework is None and "." not in func and head in self._decorator_aliases:
+                framework, func = self._decorator_aliases[head]
+            if framework and func.endswith(("Typer", "Group")):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        self._command_owners[target.id] = framework
+        self.generic_visit(node)
+
+    visit_AnnAssign = visit_Assign
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        qualname = self._qualname(node.name)
+        info = {
+            "name": node.name,
+            "qualname": qualname,
+            "bases": [ast.unparse(base) for base in node.bases],
+            "decorators": [ast.unparse(d) for d in node.decorator_list],
+            "methods": [],
+            "lineno": node.lineno,
+            "end_lineno": node.end_lineno,
+        }
+        self.record.classes.append(info)
+        self._add_docstring(node, "ClassDef", node.name, qualname)
+
+        self._scope.append(node.name)
+        self._classes.append(info)
+        self.generic_visit(node)
+        self._classes.pop()
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        qualname = self._qualname(node.name)
+        owner = self._classes[-1] if self._classes else None
+        signature = f"({ast.unparse(node.args)})"
+        if node.returns is not None:
+            signature += f" -> {ast.unparse(node.returns)}"
+        self.record.functions.append({
+            "name": node.name,
+            "qualname": qualname,
+            "type": type(node).__name__,
+            "class": owner["qualname"] if owner else None,
+            "signature": signature,
+            "decorators": [ast.unparse(d) for d in node.decorator_list],
+            "lineno": node.lineno,
+            "end_lineno": node.end_lineno,
+        })
+        if owner:
+            owner["methods"].append(node.name)
+        self._add_docstring(node, type(node).__name__, node.name, qualname)
+        self._add_command(node, qualname)
+
+        self._scope += [node.name, "<locals>"]
+        self._classes.append(None)
+        self.generic_visit(node)
+        self._classes.pop()
+        del self._scope[-2:]
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    # ── Click / Typer ───────────────────────────────────────────────────
+
+    def _decorator_kind(self, decorator: ast.AST) -> Tuple[str, str] | None:
+        """(framework, decorator name) for a Click/Typer decorator, else None"""
+        if not (self._framework_aliases or self._decorator_aliases):
+            return None
+        func = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(func, ast.Name):
+            return self._decorator_aliases.get(func.id)
+        if isinstance(func, ast.Attribute):
+            owner = _dotted(func.value)
+            if owner in self._framework_aliases:
+                return self._framework_aliases[owner], func.attr
+            if func.attr in COMMAND_DECORATORS and owner in self._command_owners:
+                # @cli.command() on a click group or @app.command() on a Typer app;
+                # any other object's .command() is not ours to document
+                return self._command_owners[owner], func.attr
+        return None
+
+    def _add_command(self, node: ast.FunctionDef | ast.AsyncFunctionDef, qualname: str) -> None:
+        command = None
+        params = []
+        for decorator in node.decorator_list:
+            kind = self._decorator_kind(decorator)
+            if kind is None:
+                continue
+            framework, name = kind
+            call = decorator if isinstance(decorator, ast.Call) else None
+            if name in COMMAND_DECORATORS:
+                command = (framework, name, call)
+            elif name in PARAM_DECORATORS and call is not None:
+                params.append(self._click_param(name, call))
+        if command is None:
+            return
+
+        framework, kind, call = command
+        keywords = {kw.arg: kw.value for kw in call.keywords} if call else {}
+        if call and call.args and isinstance(call.args[0], ast.Constant) and isinstance(call.args[0].value, str):
+            name = call.args[0].value
+        elif "name" in keywords:
+            name = _literal(keywords["name"])
+        else:
+            name = node.name.replace("_", "-")
+        if kind == "group":
+            self._command_owners[node.name] = framework
+        if framework == "typer":
+            params += self._typer_params(node)
+        self.record.commands.append({
+            "name": name,
+            "function": qualname,
+            "framework": framework,
+            "group": kind == "group",
+            "docstring": ast.get_docstring(node) or _literal(keywords.get("help")) or "",
+            "arguments": params,
+            "lineno": node.lineno,
+        })
+
+    @staticmethod
+    def _click_param(kind: str, call: ast.Call) -> Dict[str, Any]:
+        decls = [a.value for a in call.args if isinstance(a, ast.Constant) and isinstance(a.value, str)]
+        keywords = {kw.arg: kw.value for kw in call.keywords if kw.arg}
+        flags = [d for d in decls if d.startswith("-")]
+        names = [d for d in decls if not d.startswith("-")]
+        if names:
+            name = names[0]
+        elif flags:
+            name = max(flags, key=len).lstrip("-").split("/")[0].replace("-", "_")
+        else:
+            name = ""
+        return {
+            "name": name,
+            "kind": kind,
+            "flags": flags,
+            "type": _literal(keywords.get("type")),
+            "default": _literal(keywords.get("default")),
+            "required": _literal(keywords.get("required")) or (kind == "argument" and "default" not in keywords),
+            "help": _literal(keywords.get("help")),
+        }
+
+    @staticmethod
+    def _typer_params(node: ast.FunctionDef | ast.AsyncFunctionDef) -> List[Dict[str, Any]]:
+        """Typer declares parameters in the signature rather than in decorators"""
+        args = node.args.posonlyargs + node.args.args + node.args.kwonlyargs
+        defaults = (
+            [None] * (len(node.args.posonlyargs + node.args.args) - len(node.args.defaults))
+            + node.args.defaults + node.args.kw_defaults
+        )
+        params = []
+        for arg, default in zip(args, defaults):
+            annotation = arg.annotation
+            marker = None
+            # Annotated[str, typer.Option(...)]
+            if isinstance(annotation, ast.Subscript) and _dotted(annotation.value).endswith("Annotated"):
+                items = annotation.slice.elts if isinstance(annotation.slice, ast.Tuple) else []
+                if items:
+                    annotation = items[0]
+                    marker = next((i for i in items[1:] if isinstance(i, ast.Call)), None)
+            if marker is None and isinstance(default, ast.Call):
+                # name: str = typer.Option(default, "--flag", ...)
+                marker = default
+                first = marker.args[0] if marker.args else None
+                is_flag = isinstance(first, ast.Constant) and str(first.value).startswith("-")
+                default = None if first is None or is_flag else first
+            kind = "option" if default is not None else "argument"
+            keywords = {}
+            flags = []
+            if marker is not None:
+                kind = "argument" if _dotted(marker.func).endswith("Argument") else "option"
+                keywords = {kw.arg: kw.value for kw in marker.keywords if kw.arg}
+                flags = [a.value for a in marker.args
+                         if isinstance(a, ast.Constant) and isinstance(a.value, str) and a.value.startswith("-")]
+                default = keywords.get("default", default)
+            if isinstance(default, ast.Constant) and default.value is Ellipsis:
+                default = None
+            if kind == "option" and not flags:
+                flags = ["--" + arg.arg.replace("_", "-")]
+            params.append({
+                "name": arg.arg,
+                "kind": kind,
+                "flags": flags,
+                "type": ast.unparse(annotation) if annotation is not None else None,
+                "default": _literal(default),
+                "required": default is None,
+                "help": _literal(keywords.get("help")),
+            })
+        return params
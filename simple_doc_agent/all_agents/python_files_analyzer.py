@@ -1,21 +1,57 @@
 """Simple Documentation Agents - No LLM needed"""
 import os
 import ast
+import html
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 import tomli
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from gitlab import Gitlab
 import markdown
-import re
-from models import PythonMetadata, Command
+from dataclasses import asdict
+from models import PythonMetadata, Command, ModuleRecord
+from profiling import Profiler
+from all_agents.analysis_cache import AnalysisCache
+from all_agents.constants import (
+    MERMAID_MAX_DIAGRAMS, MERMAID_MAX_NODES, MERMAID_PACKAGE_DEPTH, PYTHON_ANALYSIS_VERSION,
+)
+from all_agents.file_stream import FileConsumer
+from all_agents.import_graph import build_diagrams
+from all_agents.parallel import balanced_chunks, pool_context
+from all_agents.python_extractor import extract_module, extract_records
+
+# Below this many files to parse, a process pool costs more to start than it saves
+PARALLEL_PARSE_MIN_FILES = 200
+# Chunks per worker, so one slow chunk doesn't leave the other workers idle
+CHUNKS_PER_WORKER = 4
+# Files per chunk handed to the pool while streaming
+STREAM_CHUNK_FILES = 50
 
 
 class PythonAnalyzer:
     """Analyzes Python code structure"""
+
+    def __init__(self, analysis_cache: AnalysisCache | None = None, workers: int | None = None,
+                 diagram_depth: int = MERMAID_PACKAGE_DEPTH, diagram_max_nodes: int = MERMAID_MAX_NODES,
+                 max_diagrams: int = MERMAID_MAX_DIAGRAMS):
+        self.analysis_cache = analysis_cache
+        self.diagram_depth = diagram_depth
+        self.diagram_max_nodes = diagram_max_nodes
+        self.max_diagrams = max_diagrams
+        # workers=1 always parses in-process
+        self.workers = workers or os.cpu_count() or 1
     
-    def analyze(self, files: Dict[str, str]) -> PythonMetadata:
-        """Extract Python metadata"""
+    def analyze(self, files: Dict[str, str],
+                modules: Dict[str, ModuleRecord] | None = None) -> PythonMetadata:
+        """Extract Python metadata
+
+        ``modules`` are records already produced by ``extract``; without
+        them the Python files are extracted here.
+        """
+        if modules is None:
+            modules, _ = self.extract(files)
         
         # Parse pyproject.toml
         pyproject = tomli.loads(files.get('pyproject.toml', ''))
@@ -66,18 +102,16 @@ class PythonAnalyzer:
             project_name = 'unknown'
             python_version = '3.10+'
             dependencies = []
-        # Extract CLI commands if Click is used
-        commands = []
-        if any(dep["name"] == "click" for dep in dependencies):
-            commands = self._extract_click_commands(files)
+        # Extract Click/Typer CLI commands
+        commands = self._extract_click_commands(modules)
         
         # Find entry points
         entry_points = self._find_entry_points(pyproject)
-        all_docstrings = {}
-        for filepath, content in files.items():
-            if filepath.endswith('.py'):
-                docstrings = self._extract_docstrings(content, filepath)
-                all_docstrings.update(docstrings)
+        all_docstrings = {
+            filepath: record.docstrings
+            for filepath, record in modules.items()
+            if record.docstrings
+        }
 
         readme_raw = self._extract_readme(files)
         readme_html = markdown.markdown(readme_raw, extensions=["fenced_code", "tables"]) if readme_raw else None
@@ -89,88 +123,203 @@ class PythonAnalyzer:
             entry_points=entry_points,
             docstrings=all_docstrings,
             readme_raw=readme_raw,
-            readme_html=readme_html
+            readme_html=readme_html,
+            modules=modules,
         )
-    def generate_mermaid(self, all_docstrings: dict) -> str:
+    def build_mermaid_diagrams(self, modules: Dict[str, ModuleRecord]) -> List[Dict[str, str]]:
         """
-        Generate Mermaid diagram code for Python modules, classes, and functions.
+        Mermaid sources for the repository's import graph, collapsed by package.
+
+        A bounded number of diagrams with a bounded number of nodes each, so
+        large repositories stay readable and quick to render.
         """
-        blocks = []
+        return build_diagrams(
+            modules,
+            depth=self.diagram_depth,
+            max_nodes=self.diagram_max_nodes,
+            max_diagrams=self.max_diagrams,
+        )
 
-        for filepath, docs in all_docstrings.items():
-            lines = ["flowchart TB"]
-
-            # Safe module node ID
-            module_id = re.sub(r'\W+', '_', filepath)
-            module_label = f"Module: {filepath.split('/')[-1]}"
-            lines.append(f'{module_id}["{module_label}"]')
-
-            for doc in docs:
-                # Safe node ID
-                safe_name = re.sub(r'\W+', '_', doc["name"])
-                node_id = f"{module_id}_{safe_name}"
-
-                if doc["type"] == "ClassDef":
-                    lines.append(f'{node_id}["Class: {doc["name"]}"]')
-                    lines.append(f'{module_id} --> {node_id}')
-                elif doc["type"] == "FunctionDef":
-                    lines.append(f'{node_id}["Function: {doc["name"]}"]')
-                    lines.append(f'{module_id} --> {node_id}')
-
-            # Join lines and wrap in div
-            content = "\n".join(lines)
-            block = f'<div class ="mermaid-container"> <pre class="mermaid">\n{content}\n</pre></div>'
+    def generate_mermaid(self, diagrams: List[Dict[str, str]]) -> str:
+        """
+        Wrap Mermaid diagrams in the HTML blocks the report renders.
+
+        Diagrams with a pre-rendered ``svg`` are inlined as is; the rest are
+        left as sources for mermaid to render in the browser.
+        """
+        blocks = []
+        for diagram in diagrams:
+            title = f'<h3>{html.escape(diagram["title"])}</h3>\n'
+            if diagram.get("svg"):
+                blocks.append(f'{title}<div class ="mermaid-container">{diagram["svg"]}</div>')
+                continue
+            # Escaped so the browser hands mermaid the source untouched
+            block = (
+                f'{title}'
+                f'<div class ="mermaid-container"> <pre class="mermaid">\n{html.escape(diagram["source"])}\n</pre></div>'
+            )
             blocks.append(block)
         return "\n\n".join(blocks)
-        
 
+    def extract(self, files: Dict[str, str],
+                profiler: Profiler | None = None) -> Tuple[Dict[str, ModuleRecord], Dict[str, ast.Module]]:
+        """
+        One AST pass per Python file, reusing cached records for unchanged files.
 
-    def _extract_click_commands(self, files: Dict[str, str]) -> List[Command]:
-        """Extract Click CLI commands from Python files"""
-        commands = []
-        
-        # Look through Python files for @click.command decorators
-        for filepath in files.get('python_files', []):
-            if 'cli' in filepath.lower() or 'main' in filepath.lower():
-                # Would need to fetch actual file content here
-                # For now, simplified
-                pass
-        
-        return commands
+        Returns the records by path and the trees that were parsed on the way,
+        so later agents can reuse them instead of parsing again. Files served
+        from the cache have no tree, and neither do files parsed on the
+        process pool used for large repositories. ``profiler`` counts this
+        run's cache lookups.
+        """
+        modules: Dict[str, ModuleRecord] = {}
+        trees: Dict[str, ast.Module] = {}
+        to_parse: Dict[str, str] = {}
+        for filepath, content in files.items():
+            if not filepath.endswith('.py'):
+                continue
+            cached = (
+                self.analysis_cache.get("modules", PYTHON_ANALYSIS_VERSION, filepath, content, profiler)
+                if self.analysis_cache else None
+            )
+            if cached is not None:
+                modules[filepath] = ModuleRecord(**cached)
+            else:
+                to_parse[filepath] = content
+
+        if self.workers > 1 and len(to_parse) >= PARALLEL_PARSE_MIN_FILES:
+            records = self._extract_parallel(to_parse)
+        else:
+            records = []
+            for filepath, content in to_parse.items():
+                record, tree = extract_module(filepath, content)
+                if tree is not None:
+                    trees[filepath] = tree
+                records.append(record)
+
+        for record in records:
+            self._add_record(modules, record, to_parse[record.path])
+        # Keep the repository's file order whichever way the records were made
+        modules = {path: modules[path] for path in files if path in modules}
+        return modules, trees
+
+    def module_stream(self, profiler: Profiler | None = None) -> "ModuleStream":
+        """A consumer that does what ``extract`` does, file by file, for the streaming pipeline"""
+        return ModuleStream(self, profiler)
+
+    def _add_record(self, modules: Dict[str, ModuleRecord], record: ModuleRecord, content: str) -> None:
+        if record.error:
+            # skip unparsable files
+            print(f"⚠ Could not parse {record.path}: {record.error}")
+        modules[record.path] = record
+        if self.analysis_cache:
+            self.analysis_cache.put("modules", PYTHON_ANALYSIS_VERSION, record.path, content, asdict(record))
+
+    def _extract_parallel(self, to_parse: Dict[str, str]) -> List[ModuleRecord]:
+        """Parse size-balanced chunks of files on a process pool"""
+        chunks = balanced_chunks(to_parse, self.workers * CHUNKS_PER_WORKER)
+        print(f"  → Parsing {len(to_parse)} file(s) on {self.workers} process(es)")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context()) as pool:
+            results = pool.map(
+                extract_records,
+                [[(path, to_parse[path]) for path in chunk] for chunk in chunks],
+            )
+            return [record for chunk in results for record in chunk]
+
+    def _extract_click_commands(self, modules: Dict[str, ModuleRecord]) -> List[Command]:
+        """Click/Typer commands found in the extracted modules"""
+        return [
+            Command(name=cmd["name"], docstring=cmd["docstring"], arguments=cmd["arguments"])
+            for record in modules.values()
+            for cmd in record.commands
+        ]
     
     def _find_entry_points(self, pyproject: dict) -> List[str]:
         """Find script entry points"""
         scripts = pyproject.get('tool', {}).get('poetry', {}).get('scripts', {})
         return list(scripts.keys())
 
-    def _extract_docstrings(self, content: str, filepath: str) -> Dict[str, List[Dict[str, str]]]:
-        """Extract module, class, and function docstrings from a Python file"""
-        docstrings = {}
-
-        try:
-            tree = ast.parse(content)
-            file_docs = []
-            for node in ast.walk(tree):
-                if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef)):
-                    doc = ast.get_docstring(node)
-                    if doc:
-                        file_docs.append({
-                            "type": type(node).__name__,
-                            "name": getattr(node, 'name', '<module>'),
-                            "doc": doc
-                        })
-            if file_docs:
-                docstrings[filepath] = file_docs
-        except Exception as e:
-            # skip unparsable filess
-            print(f"⚠ Could not parse {filepath}: {e}")
-        
-        return docstrings
-
     def _extract_readme(self, files: Dict[str, str]) -> list[str|None]:
         for name in files:
             lower = name.lower()
             if lower in ("readme.md", "readme.rst", "readme.txt"):
                 return files[name]
         return None
-    
\ No newline at end of file
+
+
+class ModuleStream(FileConsumer):
+    """
+    Builds module records as Python files stream past, keeping only the records.
+
+    Unchanged files come from the analysis cache. The rest are parsed as
+    they arrive; once PARALLEL_PARSE_MIN_FILES of them have come in, they go
+    to the process pool in chunks, with at most two chunks per worker in
+    flight so a fast fetch can't queue up the whole repository in memory.
+    No syntax trees are kept.
+    """
+
+    def __init__(self, analyzer: PythonAnalyzer, profiler: Profiler | None = None):
+        self.analyzer = analyzer
+        self.profiler = profiler
+        self.order: List[str] = []
+        self.modules: Dict[str, ModuleRecord] = {}
+        self._buffer: List[Tuple[str, str]] = []
+        self._pool: ProcessPoolExecutor | None = None
+        self._in_flight: deque = deque()
+
+    def wants(self, path: str) -> bool:
+        return path.endswith('.py')
+
+    def consume(self, path: str, data: bytes) -> None:
+        try:
+            content = data.decode("utf-8")
+        except UnicodeDecodeError:
+            # Recorded as a fetch error by the SpooledFiles consumer beside this one
+            return
+        self.order.append(path)
+        cache = self.analyzer.analysis_cache
+        cached = cache.get("modules", PYTHON_ANALYSIS_VERSION, path, content, self.profiler) if cache else None
+        if cached is not None:
+            self.modules[path] = ModuleRecord(**cached)
+            return
+        if self.analyzer.workers <= 1:
+            self.analyzer._add_record(self.modules, extract_module(path, content)[0], content)
+            return
+        self._buffer.append((path, content))
+        if self._pool is None and len(self._buffer) >= PARALLEL_PARSE_MIN_FILES:
+            print(f"  → Parsing on {self.analyzer.workers} process(es) as files arrive")
+            self._pool = ProcessPoolExecutor(max_workers=self.analyzer.workers, mp_context=pool_context())
+        if self._pool is not None and len(self._buffer) >= STREAM_CHUNK_FILES:
+            self._submit()
+
+    def _submit(self) -> None:
+        chunk, self._buffer = self._buffer, []
+        self._in_flight.append((self._pool.submit(extract_records, chunk), chunk))
+        while len(self._in_flight) > 2 * self.analyzer.workers:
+            self._collect(*self._in_flight.popleft())
+
+    def _collect(self, future: Future, chunk: List[Tuple[str, str]]) -> None:
+        contents = dict(chunk)
+        for record in future.result():
+            self.analyzer._add_record(self.modules, record, contents[record.path])
+
+    def finish(self) -> Dict[str, ModuleRecord]:
+        try:
+            if self._pool is not None:
+                if self._buffer:
+                    self._submit()
+                while self._in_flight:
+                    self._collect(*self._in_flight.popleft())
+            for path, content in self._buffer:
+                self.analyzer._add_record(self.modules, extract_module(path, content)[0], content)
+            self._buffer = []
+        finally:
+            self.close()
+        # Keep the repository's file order whichever way the records were made
+        return {path: self.modules[path] for path in self.order if path in self.modules}
+
+    def close(self) -> None:
+        """Stop the parse pool, e.g. when the stream was abandoned"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
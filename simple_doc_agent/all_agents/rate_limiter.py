@@ -0,0 +1,95 @@
+"""Adaptive rate limiting for forge API requests"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Start spacing requests out once fewer than this many remain in the window
+LOW_REMAINING = 10
+
+
+class RateLimiter:
+    """
+    Shared pacing state for concurrent API workers.
+
+    Reads the rate-limit headers GitLab and GitHub send with every response
+    (``Retry-After``, ``RateLimit-Remaining`` / ``X-RateLimit-Remaining`` and
+    the matching ``Reset`` header) and makes workers wait before their next
+    request when the budget is running out.
+    """
+
+    def __init__(self, max_backoff: float = 60.0):
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._pause_until = 0.0
+        self._spacing = 0.0
+        self._next_slot = 0.0
+
+    def observe(self, headers) -> None:
+        """Update pacing from a response's headers; missing or malformed ones are ignored"""
+        now = time.time()
+        try:
+            headers = {str(k).lower(): v for k, v in headers.items()}
+        except AttributeError:
+            return
+        retry_after = self._parse_retry_after(headers.get("retry-after"), now)
+        remaining = self._parse_int(
+            headers.get("ratelimit-remaining") or headers.get("x-ratelimit-remaining")
+        )
+        reset = self._parse_int(
+            headers.get("ratelimit-reset") or headers.get("x-ratelimit-reset")
+        )
+        self.update(remaining, reset, retry_after, now)
+
+    def update(self, remaining: int | None, reset: int | None,
+               retry_after: float | None = None, now: float | None = None) -> None:
+        """Update pacing from already-parsed rate-limit values"""
+        now = now or time.time()
+        with self._lock:
+            if retry_after:
+                self._pause_until = max(self._pause_until, now + min(retry_after, self.max_backoff))
+            if remaining is None:
+                return
+            window = max((reset or now) - now, 0)
+            if remaining <= 0 and window:
+                self._pause_until = max(self._pause_until, now + min(window, self.max_backoff))
+            elif remaining < LOW_REMAINING and window:
+                # Spread what is left of the budget over the rest of the window
+                self._spacing = min(window / remaining, self.max_backoff)
+            else:
+                self._spacing = 0.0
+
+    def wait(self) -> None:
+        """Block until the caller is allowed to send its next request"""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._pause_until, self._next_slot)
+            self._next_slot = slot + self._spacing
+        if slot > now:
+            time.sleep(slot - now)
+
+    def backoff(self, attempt: int) -> None:
+        """Exponential backoff with jitter after a failed attempt"""
+        delay = min(self.max_backoff, 2 ** attempt) * (0.5 + random.random() / 2)
+        time.sleep(delay)
+
+    @staticmethod
+    def _parse_int(value) -> int | None:
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _parse_retry_after(value, now: float) -> float | None:
+        """Retry-After is either a number of seconds or an HTTP date"""
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - now, 0)
+        except (AttributeError, TypeError, ValueError):
+            return None
@@ -0,0 +1,109 @@
+"""Compact table payloads and capped print summaries for the HTML report"""
+import heapq
+import json
+from collections import Counter
+from itertools import islice
+
+from models import CATEGORIES, SEVERITIES, CodeReviewResult, IssueStore, TestCoverage
+from all_agents.constants import (
+    COVERAGE_CRITICAL_BELOW, COVERAGE_WARNING_BELOW, REPORT_PDF_MAX_COVERAGE_ROWS,
+    REPORT_PDF_MAX_ISSUES, REPORT_PDF_TOP_FILES,
+)
+
+
+def embed_json(payload) -> str:
+    """JSON that is safe inside a ``<script type="application/json">`` element"""
+    return (
+        json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+        .replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+    )
+
+
+def issue_table(review: CodeReviewResult | None) -> dict:
+    """
+    The review's issues as rows of small integers, most severe first.
+
+    Severity, category, file, code, message and tool are indexes into the
+    lists sent alongside (the issue store's own interned columns), so each
+    of tens of thousands of rows costs a few bytes; the page rebuilds the
+    strings as it draws rows.
+    """
+    store = review.issues if review else IssueStore()
+    severity, category, file, line, code, message, tool = (
+        store.severity, store.category, store.file, store.line, store.code, store.message, store.tool
+    )
+    rows = [
+        # 0 for an issue without a line
+        [severity[r], category[r], file[r], max(line[r], 0), code[r], message[r], tool[r]]
+        for r in store.ranked()
+    ]
+    return {
+        "columns": ["severity", "category", "file", "line", "code", "message", "tool"],
+        "severities": list(SEVERITIES),
+        "categories": list(CATEGORIES),
+        "files": store.files.values,
+        "codes": store.codes.values,
+        "messages": store.messages.values,
+        "tools": store.tools.values,
+        "rows": rows,
+    }
+
+
+def issue_summary(review: CodeReviewResult | None, max_issues: int = REPORT_PDF_MAX_ISSUES,
+                  top_files: int = REPORT_PDF_TOP_FILES) -> dict:
+    """The printable part of the review: the most severe issues and the files with the most"""
+    store = review.issues if review else IssueStore()
+    issues = store.select(islice(store.ranked(), max_issues))
+    paths = store.files.values
+    top = heapq.nsmallest(top_files, range(len(paths)), key=lambda f: (-len(store.by_file[f]), paths[f]))
+    files = []
+    for file_id in top:
+        rows = store.by_file[file_id]
+        counts = Counter(store.severity[row] for row in rows)
+        files.append({"file": paths[file_id], "total": len(rows),
+                      **{name: counts[sev] for sev, name in enumerate(SEVERITIES)}})
+    return {
+        "issues": issues,
+        "shown": len(issues),
+        "total": len(store),
+        "files": files,
+        "files_total": len(paths),
+    }
+
+
+def coverage_status(rate: float) -> str:
+    if rate < COVERAGE_CRITICAL_BELOW:
+        return "critical"
+    return "warning" if rate < COVERAGE_WARNING_BELOW else "healthy"
+
+
+def coverage_table(coverage: TestCoverage | dict | None) -> dict:
+    """Per-file coverage as ``[name, line rate]`` rows, with the status thresholds"""
+    items = _coverage_items(coverage)
+    return {
+        "critical_below": COVERAGE_CRITICAL_BELOW,
+        "warning_below": COVERAGE_WARNING_BELOW,
+        "rows": [[item["name"], item["line_rate"]] for item in items],
+    }
+
+
+def coverage_summary(coverage: TestCoverage | dict | None, max_rows: int = REPORT_PDF_MAX_COVERAGE_ROWS) -> dict:
+    """The printable part of the coverage: files per status and the least covered files"""
+    items = _coverage_items(coverage)
+    counts = Counter(coverage_status(item["line_rate"]) for item in items)
+    lowest = sorted(items, key=lambda item: (item["line_rate"], item["name"]))[:max_rows]
+    return {
+        "critical_below": COVERAGE_CRITICAL_BELOW,
+        "counts": {status: counts[status] for status in ("critical", "warning", "healthy")},
+        "lowest": [{**item, "status": coverage_status(item["line_rate"])} for item in lowest],
+        "shown": len(lowest),
+        "total": len(items),
+    }
+
+
+def _coverage_items(coverage: TestCoverage | dict | None) -> list:
+    if isinstance(coverage, TestCoverage):
+        return coverage.test_coverage or []
+    if isinstance(coverage, dict):
+        return coverage.get("test_coverage") or []
+    return []
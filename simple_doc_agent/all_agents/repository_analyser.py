@@ -1,166 +1,537 @@
 """Simple Repository Fetcher"""
+import copy
+import tarfile
+import tempfile
+import threading
+from contextlib import nullcontext
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+from urllib.parse import urlparse
 from dataclasses import asdict
+import re
+import git
+import requests
+from requests.adapters import HTTPAdapter
 from gitlab import Gitlab
 from github import Github
+from models import FetchError
+from profiling import Profiler
+from all_agents.blob_cache import BlobCache, DEFAULT_CACHE_DIR, git_blob_sha
+from all_agents.file_policy import FilePolicy
+from all_agents.file_stream import is_binary
+from all_agents.rate_limiter import RateLimiter
+from all_agents.snapshot import build_snapshot
+from all_agents.tree_index import TreeIndex, is_wanted
+
+# Archives larger than this are spooled to disk instead of memory
+ARCHIVE_SPOOL_SIZE = 32 * 1024 * 1024
+
+# Below this many uncached files, per-file requests beat downloading the archive
+ARCHIVE_MIN_FILES = 25
+
+# Per-file requests are retried on these statuses
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 4
+
+# Tree listings kept per fetcher (and its clones); the oldest is dropped beyond this
+TREE_INDEX_CACHE_SIZE = 64
+
+
+def forge_host(url: str) -> str:
+    """The host behind a forge URL, which fetchers for any platform on it share slots for"""
+    return (urlparse(url).hostname or url).lower()
 
 
 class RepositoryFetcher:
-    """Fetches repository files"""
+    """Fetches repository files
+
+    ``mode`` selects how blobs are downloaded:
+      - "archive": one tarball for the whole ref, falling back to per-file
+        requests if the archive endpoint fails
+      - "files":   one API request per file
+
+    Per-file requests run on a pool of ``max_workers`` threads sharing pooled
+    HTTP connections, paced by the forge's rate-limit headers. Files that
+    could not be fetched are collected in ``errors``.
+
+    ``policy`` decides which files are wanted at all (paths and sizes); it
+    is applied to the tree listing or archive headers before any blob is
+    read, and files it rejects for size are listed in ``skipped``.
+
+    With a ``blob_cache`` the tree listing is read first and only blobs whose
+    SHA is not already cached are downloaded.
+
+    ``platform="local"`` reads from a local working tree or bare mirror with
+    gitpython instead of a forge API. ``project_path`` is either a directory
+    or a clone URL; URLs are cloned once into a bare mirror under the cache
+    directory and fetched on later runs.
+
+    ``fetch`` reads the default branch unless given a ``ref`` (branch, tag
+    or commit). Refs are pinned to a commit before anything is read, so a
+    long-lived fetcher never serves a stale tree for a branch that moved.
+
+    ``stream`` yields the same files one at a time as raw bytes instead of
+    returning them all at once, and drops binary files as well.
+
+    ``host_slots`` caps how many fetchers talk to the forge at once when
+    several share it (see ``clone`` and ``forge_host``); ``forge_slot``
+    holds one around calls made on a fetched project outside the fetcher.
+
+    Calls to the forge (or the local object database) are counted on
+    ``profiler`` by kind: project, tree, archive, blob and mirror.
+    """
     
-    def __init__(self, url: str, token: str, platform: str = "gitlab"):
+    def __init__(self, url: str, token: str, platform: str = "gitlab",
+                 mode: str = "archive", max_workers: int = 8,
+                 blob_cache: BlobCache | None = None, host_slots: threading.Semaphore | None = None,
+                 policy: FilePolicy | None = None):
         self.platform = platform
         self.token = token
         self.url = url
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.blob_cache = blob_cache
+        self.host_slots = host_slots
+        self.policy = policy or FilePolicy()
+        self.rate_limiter = RateLimiter()
+        self.profiler = Profiler()
+        self.errors: list[FetchError] = []
+        # Files left out for being over the policy's size limit, or binary when streaming
+        self.skipped: list[FetchError] = []
+        self._tree_indexes: dict[tuple, TreeIndex] = {}
+        self._tree_lock = threading.Lock()
+        # Directory holding the fetched Python files at their repository paths, if any
+        self.source_root: Path | None = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.hooks["response"].append(
+            lambda response, *args, **kwargs: self.rate_limiter.observe(response.headers)
+        )
 
-        if platform == "github":
-            self.client = Github(token)
+        if platform == "local":
+            self.client = None
+        elif platform == "github":
+            # Anything other than github.com is treated as an API base url
+            # (GitHub Enterprise, or a local stand-in server)
+            if url and "github.com" not in url:
+                self.client = Github(token, base_url=url.rstrip("/"), pool_size=self.max_workers)
+            else:
+                self.client = Github(token, pool_size=self.max_workers)
         else:
-            self.client = Gitlab(url, private_token=token)
+            self.client = Gitlab(url, private_token=token, session=self.session)
     
-    def fetch(self, project_path: str) -> Dict[str, str]:
-        """Fetch key files from repository"""
+    def forge_slot(self):
+        """A context that holds one of ``host_slots`` while it talks to the forge"""
+        return self.host_slots or nullcontext()
+
+    def clone(self) -> "RepositoryFetcher":
+        """
+        A fetcher for running alongside this one.
+
+        It shares the HTTP session, API client, rate limiter, caches and host
+        slots, but has its own ``errors``, ``skipped``, ``source_root`` and
+        ``profiler``.
+        """
+        other = copy.copy(self)
+        other.profiler = Profiler()
+        other.errors = []
+        other.skipped = []
+        other.source_root = None
+        return other
+
+    def fetch(self, project_path: str, ref: str | None = None) -> Dict[str, str]:
+        """Fetch key files from repository at ``ref`` (the default branch if None)"""
+        self.errors = []
+        self.skipped = []
+        self.source_root = None
+        with self.forge_slot():
+            project, ref, blobs = self._open(project_path, ref)
+            files = self._collect(blobs)
+        if self.platform == "local":
+            if not project.bare and not project.is_dirty() and project.head.commit.hexsha == ref:
+                # A clean checkout of this commit already has every file on disk
+                self.source_root = Path(project.working_tree_dir)
+            else:
+                self.source_root = self._snapshot(files, self.tree_index(project, ref))
+        elif self.blob_cache:
+            self._print_cache_stats()
+            self.source_root = self._snapshot(files, self.tree_index(project, ref))
+        return files, project, ref
+
+    def stream(self, project_path: str, ref: str | None = None) -> Tuple[Iterator[Tuple[str, bytes]], object, str]:
+        """
+        Like ``fetch``, but hand the files over one at a time as (path, bytes).
+
+        Nothing is kept once a file has been yielded, so memory stays flat
+        however large the repository is. Binary files are dropped and
+        listed in ``skipped`` along with the files the policy finds too
+        big. Returns the iterator, the project and the pinned ref;
+        the download happens as the iterator is consumed.
+        """
+        self.errors = []
+        self.skipped = []
+        self.source_root = None
+        with self.forge_slot():
+            project, ref, blobs = self._open(project_path, ref)
+
+        def files() -> Iterator[Tuple[str, bytes]]:
+            with self.forge_slot():
+                for path, data in blobs:
+                    if is_binary(data):
+                        self.skipped.append(FetchError(path=path, error="binary file"))
+                        continue
+                    yield path, data
+            if self.skipped:
+                print(f"⚠ Skipped {len(self.skipped)} oversized or binary file(s)")
+            if self.blob_cache and self.platform != "local":
+                self._print_cache_stats()
+        return files(), project, ref
+
+    def _open(self, project_path: str, ref: str | None) -> Tuple[object, str, Iterator[Tuple[str, bytes]]]:
+        """The project, its pinned ref and a lazy iterator over the wanted files"""
+        if self.platform == "local":
+            return self._open_local(project_path, ref)
         if self.platform == "github":
-            return self._fetch_github(project_path)
-        return self._fetch_gitlab(project_path)
-        
-    def _fetch_gitlab(self, project_path: str) -> Dict[str, str]:
-        """Fetch key files from GitLab repository"""
-        project = self.client.projects.get(project_path)
-        branches = [b.name for b in project.branches.list()]
-        ref = 'main' if 'main' in branches else ('master' if 'master' in branches else branches[0])
-
-        files = {}
-        file_list = [
-            'pyproject.toml',
-            '.gitlab-ci.yml',
-            'README.md',
-            'README.rst'
-        ]
-
-        for filename in file_list:
+            return self._open_github(project_path, ref)
+        return self._open_gitlab(project_path, ref)
+
+    def _collect(self, blobs: Iterable[Tuple[str, bytes]]) -> Dict[str, str]:
+        """Decode a file stream into the ``{path: text}`` dict the analysers take"""
+        files: Dict[str, str] = {}
+        for path, data in blobs:
+            error = self._decode_into(files, path, data)
+            if error:
+                self.errors.append(error)
+                print(f"✗ Skipping non UTF-8 file {path}")
+        return files
+
+    def _print_cache_stats(self) -> None:
+        stats = self.blob_cache.stats()
+        print(f"🗃  Blob cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+
+    def _iter_files(self, project, ref: str,
+                    fetch_archive: Callable[[Set[str]], Iterator[Tuple[str, bytes]]],
+                    get_blob: Callable[[str], bytes]) -> Iterator[Tuple[str, bytes]]:
+        """The wanted files for ``ref``, serving unchanged blobs from the cache"""
+        index = self.tree_index(project, ref) if self.blob_cache or self.mode != "archive" else None
+
+        seen: Set[str] = set()
+        missing: List[str] | None = None  # None until the tree has been consulted
+        if index:
+            missing = []
+            for path in self._within_size(self._wanted_paths(project, ref), index):
+                data = self.blob_cache.get(index.get(path).sha, self.profiler) if self.blob_cache else None
+                if data is None:
+                    missing.append(path)
+                else:
+                    seen.add(path)
+                    yield path, data
+
+        # A handful of changed blobs is cheaper to fetch one by one than as a whole archive
+        if self.mode == "archive" and (missing is None or len(missing) >= ARCHIVE_MIN_FILES):
             try:
-                file = project.files.get(file_path=filename, ref=ref)
-                files[filename] = file.decode().decode('utf-8')
+                for path, data in fetch_archive(seen):
+                    seen.add(path)
+                    yield path, data
+                missing = []
             except Exception as e:
-                print(f"✗ Could not fetch {filename}: {e}")
+                print(f"✗ Could not fetch repository archive, falling back to per-file fetch: {e}")
+                if missing is None:
+                    index = self.tree_index(project, ref)
+                    missing = self._within_size(self._wanted_paths(project, ref), index)
+                # Whatever the archive delivered before failing is not fetched again
+                missing = [path for path in missing if path not in seen]
+
+        if missing:
+            yield from self._iter_paths(missing, get_blob, index)
+
+    def _within_size(self, paths: List[str], index: TreeIndex) -> List[str]:
+        """Drop the paths the tree listing says are too big, noting them as skipped"""
+        kept = []
+        for path in paths:
+            entry = index.get(path)
+            if entry and self.policy.too_big(entry.size):
+                self._skip_size(path, entry.size)
+            else:
+                kept.append(path)
+        return kept
 
-        python_files = self._get_python_files(project)
-        docker_file_paths = self._get_docker_files(project)
+    def _skip_size(self, path: str, size: int) -> None:
+        self.skipped.append(FetchError(path=path, error=f"{size} bytes, over {self.policy.max_file_size}"))
 
-        for df in docker_file_paths:
+    def _snapshot(self, files: Dict[str, str], index: TreeIndex) -> Path | None:
+        """Lay the Python files out on disk once per file set, for tools that need paths"""
+        python_files = {path: content for path, content in files.items() if path.endswith('.py')}
+        shas = {path: index.get(path).sha for path in python_files if index.get(path)}
+        root = self.blob_cache.root.parent if self.blob_cache else DEFAULT_CACHE_DIR
+        try:
+            return build_snapshot(root, python_files, shas, self.blob_cache)
+        except OSError as e:
+            print(f"⚠ Could not build source snapshot: {e}")
+            return None
+
+    def _decode_into(self, files: Dict[str, str], path: str, data: bytes) -> FetchError | None:
+        try:
+            files[path] = data.decode('utf-8')
+        except UnicodeDecodeError as e:
+            return FetchError(path=path, error=str(e))
+        return None
+
+    def _iter_archive(self, fileobj, stream: bool = False,
+                      skip: Set[str] = frozenset()) -> Iterator[Tuple[str, bytes]]:
+        """The wanted members of a tar.gz archive, one at a time
+
+        Forge archives wrap everything in a single ``<name>-<sha>/`` directory,
+        which is stripped so paths match the repository. Members in ``skip``
+        or rejected by the policy are passed over without being read.
+        """
+        count = 0
+        with tarfile.open(fileobj=fileobj, mode="r|gz" if stream else "r:gz") as tar:
+            for member in tar:
+                if not member.isfile() or "/" not in member.name:
+                    continue
+                path = member.name.split("/", 1)[1]
+                if not is_wanted(path) or path in skip or not self.policy.allows(path):
+                    continue
+                if self.policy.too_big(member.size):
+                    self._skip_size(path, member.size)
+                    continue
+                data = tar.extractfile(member).read()
+                if self.blob_cache:
+                    self.blob_cache.put(git_blob_sha(data), data)
+                count += 1
+                yield path, data
+        print(f"✓ Fetched {count} file(s) from repository archive")
+
+    def _iter_gitlab_archive(self, project, ref: str, skip: Set[str]) -> Iterator[Tuple[str, bytes]]:
+        """Download the repository archive for ``ref`` in a single request"""
+        with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_SIZE) as spool:
+            with self.profiler.call("fetch", "archive") as call:
+                project.repository_archive(sha=ref, format="tar.gz", streamed=True, action=spool.write)
+                call.bytes = spool.tell()
+            spool.seek(0)
+            yield from self._iter_archive(spool, skip=skip)
+
+    def _iter_github_archive(self, repo, ref: str, skip: Set[str]) -> Iterator[Tuple[str, bytes]]:
+        """Download the repository tarball for ``ref`` in a single request"""
+        # The download is read as it is unpacked, so its time includes unpacking
+        with self.profiler.call("fetch", "archive") as call:
+            link = repo.get_archive_link("tarball", ref)
+            with self.session.get(link, stream=True, timeout=300) as response:
+                response.raise_for_status()
+                try:
+                    yield from self._iter_archive(response.raw, stream=True, skip=skip)
+                finally:
+                    call.bytes = response.raw.tell()
+
+    def _fetch_one(self, path: str, get_blob: Callable[[str], bytes]):
+        """(path, data, None) or (path, None, error), retrying rate-limited and transient failures"""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.rate_limiter.wait()
             try:
-                file = project.files.get(file_path=df, ref=ref)
-                files[df] = file.decode().decode('utf-8')
-                print(f"✓ Fetched Dockerfile: {df}")
+                with self.profiler.call("fetch", "blob") as call:
+                    data = get_blob(path)
+                    call.bytes = len(data)
+                return path, data, None
             except Exception as e:
-                print(f"✗ Could not fetch Dockerfile {df}: {e}")
+                status = getattr(e, "response_code", None) or getattr(e, "status", None)
+                headers = getattr(e, "headers", None)
+                if headers:
+                    self.rate_limiter.observe(headers)
+                rate_limited = status == 403 and headers and any(
+                    k.lower() == "retry-after" for k in headers
+                )
+                if (status not in RETRY_STATUSES and not rate_limited) or attempt == MAX_ATTEMPTS:
+                    return path, None, FetchError(path=path, error=str(e), status=status, attempts=attempt)
+                self.rate_limiter.backoff(attempt)
+
+    def _iter_paths(self, paths: List[str], get_blob: Callable[[str], bytes],
+                    index: TreeIndex | None = None) -> Iterator[Tuple[str, bytes]]:
+        """Fetch many files concurrently, yielding them in order as they arrive
+
+        At most two requests per worker are in flight, so a slow consumer
+        holds back the downloads rather than letting them pile up in memory.
+        """
+        fetched = failed = 0
+        queued = iter(dict.fromkeys(paths))
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            def refill() -> None:
+                while len(pending) < 2 * self.max_workers:
+                    path = next(queued, None)
+                    if path is None:
+                        return
+                    pending.append(pool.submit(self._fetch_one, path, get_blob))
+
+            refill()
+            while pending:
+                path, data, error = pending.popleft().result()
+                refill()
+                if error is not None:
+                    failed += 1
+                    self.errors.append(error)
+                    print(f"✗ Could not fetch {path}: {error.error}")
+                    continue
+                entry = index.get(path) if index else None
+                if self.blob_cache and entry:
+                    self.blob_cache.put(entry.sha, data)
+                if self.policy.too_big(len(data)):
+                    # The listing had no size (GitLab trees don't), so this is the first we know of it
+                    self._skip_size(path, len(data))
+                    continue
+                fetched += 1
+                yield path, data
+        print(f"✓ Fetched {fetched} file(s), {failed} failed")
+
+    def _github_blob(self, repo, path: str, ref: str) -> bytes:
+        """A file's content, pacing on the rate-limit headers of the response it came in
+
+        PyGithub's own ``rate_limiting`` would send a ``GET /rate_limit`` of
+        its own whenever those headers are missing, as on GitHub Enterprise
+        with rate limiting off, so only the headers already received are read.
+        """
+        content = repo.get_contents(path, ref=ref)
+        self.rate_limiter.observe(content.raw_headers)
+        return content.decoded_content
+
+    def _open_gitlab(self, project_path: str, ref: str | None = None):
+        """Open a GitLab project at ``ref`` (the default branch if None)"""
+        with self.profiler.call("fetch", "project"):
+            project = self.client.projects.get(project_path)
+            if ref is None:
+                branches = [b.name for b in project.branches.list()]
+                ref = 'main' if 'main' in branches else ('master' if 'master' in branches else branches[0])
+            ref = project.commits.get(ref).id
+
+        blobs = self._iter_files(
+            project, ref,
+            fetch_archive=lambda skip: self._iter_gitlab_archive(project, ref, skip),
+            get_blob=lambda path: project.files.raw(file_path=path, ref=ref),
+        )
+        return project, ref, blobs
 
-        for pf in python_files:
+    def _open_local(self, project_path: str, ref: str | None = None):
+        """Open a local checkout, bare mirror or clone URL at ``ref`` (HEAD if None)"""
+        path = Path(project_path).expanduser()
+        if path.exists():
+            repo = git.Repo(path)
+        else:
+            with self.profiler.call("fetch", "mirror"):
+                repo = self._mirror(project_path, ref)
+        # Pin the commit so the tree index stays valid if the branch moves
+        ref = (repo.commit(ref) if ref else repo.head.commit).hexsha
+        return repo, ref, self._iter_local(repo, ref)
+
+    def _iter_local(self, repo, ref: str) -> Iterator[Tuple[str, bytes]]:
+        """Read the wanted blobs straight from the object database"""
+        index = self.tree_index(repo, ref)
+        count = 0
+        for rel_path in self._within_size(self._wanted_paths(repo, ref), index):
             try:
-                file = project.files.get(file_path=pf, ref=ref)
-                files[pf] = file.decode().decode('utf-8')
+                with self.profiler.call("fetch", "blob") as call:
+                    data = repo.odb.stream(bytes.fromhex(index.get(rel_path).sha)).read()
+                    call.bytes = len(data)
             except Exception as e:
-                print(f"✗ Could not fetch Python File {pf}: {e}")
+                self.errors.append(FetchError(path=rel_path, error=str(e)))
+                print(f"✗ Could not read {rel_path}: {e}")
+                continue
+            count += 1
+            yield rel_path, data
+        print(f"✓ Read {count} file(s) from {repo.git_dir}")
 
-        return files, project, ref
+    def _mirror(self, clone_url: str, ref: str | None = None):
+        """A bare mirror of ``clone_url`` in the cache directory, cloned or updated
 
+        A ``ref`` that isn't a branch head (a tag or an older commit) is
+        fetched into the mirror as well.
+        """
+        if "://" not in clone_url and not clone_url.startswith("git@"):
+            clone_url = f"{self.url.rstrip('/')}/{clone_url}.git"
+        root = self.blob_cache.root.parent if self.blob_cache else DEFAULT_CACHE_DIR
+        dest = root / "mirrors" / re.sub(r"[^\w.-]+", "_", clone_url)
+        if dest.exists():
+            repo = git.Repo(dest)
+            repo.remotes.origin.fetch("+refs/heads/*:refs/heads/*", depth=1)
+        else:
+            print(f"📥 Cloning {clone_url}...")
+            # Shallow, and partial for large blobs only: source files arrive with the
+            # clone so reading them never goes back to the network
+            repo = git.Repo.clone_from(
+                clone_url, dest, bare=True, depth=1, filter="blob:limit=1m",
+            )
+        if ref:
+            try:
+                repo.commit(ref)
+            except (git.BadName, ValueError):
+                spec = ref if re.fullmatch(r"[0-9a-f]{40}", ref) else f"+refs/tags/{ref}:refs/tags/{ref}"
+                repo.remotes.origin.fetch(spec, depth=1)
+        return repo
 
-    def _fetch_github(self, project_path: str) -> Dict[str, str]:
-        """Fetch key files from GitHub repository"""
+    def _open_github(self, project_path: str, ref: str | None = None):
+        """Open a GitHub repository at ``ref`` (the default branch if None)"""
         if "github.com" in project_path:
             project_path = project_path.split("github.com/")[-1].strip("/")
-        repo = self.client.get_repo(project_path)
-        ref = repo.default_branch
-
-        files = {}
-        file_list = [
-            'pyproject.toml',
-            '.github/workflows',
-            'README.md',
-            'README.rst'
-        ]
-        for filename in file_list:
-            try:
-                content = repo.get_contents(filename, ref=ref)
-                files[filename] = content.decoded_content.decode('utf-8')
-            except Exception as e:
-                print(f"✗ Could not fetch {filename}: {e}")
+        with self.profiler.call("fetch", "project"):
+            repo = self.client.get_repo(project_path)
+            ref = repo.get_commit(ref or repo.default_branch).sha
 
-        python_files = self._get_python_files_github(repo, ref)
-        docker_file_paths = self._get_docker_files_github(repo, ref)
-      
-        for df in docker_file_paths:
-            try:
-                content = repo.get_contents(df, ref=ref)
-                files[df] = content.decoded_content.decode('utf-8')
-                print(f"✓ Fetched Dockerfile: {df}")
-            except Exception as e:
-                print(f"✗ Could not fetch Dockerfile {df}: {e}")
+        blobs = self._iter_files(
+            repo, ref,
+            fetch_archive=lambda skip: self._iter_github_archive(repo, ref, skip),
+            get_blob=lambda path: self._github_blob(repo, path, ref),
+        )
+        return repo, ref, blobs
 
-        for pf in python_files:
+    def tree_index(self, project, ref: str) -> TreeIndex:
+        """The tree listing for (project, ref), fetched once and reused"""
+        key = (
+            getattr(project, "id", None) or getattr(project, "full_name", None)
+            or getattr(project, "git_dir", None),
+            ref,
+        )
+        index = self._tree_indexes.get(key)
+        if index is None:
             try:
-                content = repo.get_contents(pf, ref=ref)
-                files[pf] = content.decoded_content.decode('utf-8')
+                with self.profiler.call("fetch", "tree"):
+                    if self.platform == "local":
+                        index = TreeIndex.from_git(project.commit(ref))
+                    elif self.platform == "github":
+                        index = TreeIndex.from_github(project, ref)
+                    else:
+                        index = TreeIndex.from_gitlab(project, ref)
             except Exception as e:
-                print(f"✗ Could not fetch Python file {pf}: {e}")
+                print(f"Warning: Could not get file tree: {e}")
+                index = TreeIndex([])
+            with self._tree_lock:
+                self._tree_indexes[key] = index
+                while len(self._tree_indexes) > TREE_INDEX_CACHE_SIZE:
+                    del self._tree_indexes[next(iter(self._tree_indexes))]
+        return index
 
-        return files, repo, ref
+    def _wanted_paths(self, project, ref: str) -> List[str]:
+        """Every path the analysers need and the policy allows, in fetch order"""
+        paths = self._get_wanted_files(project, ref) + self._get_docker_files(project, ref) \
+            + self._get_python_files(project, ref)
+        wanted = [path for path in dict.fromkeys(paths) if self.policy.allows(path)]
+        if len(wanted) < len(set(paths)):
+            print(f"⊘ Fetch policy excludes {len(set(paths)) - len(wanted)} file(s)")
+        return wanted
 
+    def _get_wanted_files(self, project, ref: str) -> List[str]:
+        """Top-level config, README and CI files present in the tree"""
+        index = self.tree_index(project, ref)
+        return index.config_files() + index.readme_files() + index.ci_files()
 
-    def _get_python_files_github(self, repo, ref: str) -> list:
-        """Recursively get Python files from GitHub repo"""
-        python_files = []
-        try:
-            tree = repo.get_git_tree(ref, recursive=True)
-            python_files = [
-                item.path for item in tree.tree
-                if item.path.endswith('.py') and item.type == 'blob'
-            ]
-        except Exception as e:
-            print(f"✗ Could not list Python files: {e}")
-        return python_files
-
-
-    def _get_docker_files_github(self, repo, ref: str) -> list:
-        """Recursively get Dockerfiles from GitHub repo"""
-        docker_files = []
-        try:
-            tree = repo.get_git_tree(ref, recursive=True)
-            docker_files = [
-                item.path for item in tree.tree
-                if 'dockerfile' in item.path.lower() and item.type == 'blob'
-            ]
-        except Exception as e:
-            print(f"✗ Could not list Dockerfiles: {e}")
-        return docker_files
-            
-    def _get_python_files(self, project) -> List[str]:
-        """Get all Python files in src/ or root"""
-        python_files = []
-        
-        try:
-            tree = project.repository_tree(recursive=True, get_all=True)
-            for item in tree:
-                if item['path'].endswith('.py'):
-                    python_files.append(item['path'])
-        except Exception as e:
-            print(f"Warning: Could not get file tree: {e}")
-        
-        return python_files
-    
-    def _get_docker_files(self, project) -> List[str]:
-        """Get all docker files in src/ or root"""
-        docker_files = []
-        
-        try:
-            tree = project.repository_tree(recursive=True, get_all=True)
-            for item in tree:
-                path = item["path"].lower()
-                if "dockerfile" in path or "compose" in path:
-                    docker_files.append(item['path'])
-        except Exception as e:
-            print(f"Warning: Could not get file tree: {e}")
-        
-        return docker_files
\ No newline at end of file
+    def _get_python_files(self, project, ref: str) -> List[str]:
+        """Get all Python files in the tree"""
+        return self.tree_index(project, ref).python_files()
+
+    def _get_docker_files(self, project, ref: str) -> List[str]:
+        """Get all Dockerfiles and compose files in the tree"""
+        index = self.tree_index(project, ref)
+        return index.docker_files() + index.compose_files()
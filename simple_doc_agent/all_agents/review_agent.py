@@ -10,12 +10,33 @@ Performs static analysis on Python code using:
 Returns structured feedback for inclusion in documentation.
 """
 
+import ast
+import importlib.util
 import json
+import logging
+import os
 import subprocess
 import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import asdict
 from pathlib import Path
-from typing import Any
-from models import CodeReviewResult, CodeIssue
+from typing import Any, Mapping
+from models import CodeReviewResult, CodeIssue, IssueStore, ToolReport
+from profiling import Profiler
+from all_agents.analysis_cache import AnalysisCache
+from all_agents.file_stream import disk_root, subset
+from all_agents.parallel import KillablePool, balanced_chunks
+from all_agents.tool_registry import ToolRegistry, get_registry
+
+TOOLS = ("ruff", "bandit", "radon")
+
+# Per-process timeout in seconds; bandit and radon apply it to each shard
+DEFAULT_TIMEOUTS = {"ruff": 120, "bandit": 300, "radon": 120}
+
+# Don't start a bandit/radon process for fewer files than this
+MIN_FILES_PER_SHARD = 20
 
 class CodeReviewAgent:
     """
@@ -27,32 +48,47 @@ class CodeReviewAgent:
       3. radon   — cyclomatic complexity, maintainability index
     """
 
-    def __init__(self):
-        self._check_tools()
-
-    def _check_tools(self) -> None:
-        """Verify all required tools are installed."""
-        for tool in ["ruff", "bandit", "radon"]:
-            try:
-                subprocess.run(
-                    [tool, "--version"],
-                    capture_output=True,
-                    check=True,
-                    timeout=300,
-                )
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                raise RuntimeError(
-                    f"{tool} is not installed. Install with: pip install {tool}"
-                )
+    def __init__(self, analysis_cache: AnalysisCache | None = None,
+                 shards: int | None = None, timeouts: dict[str, float] | None = None,
+                 backend: str = "inprocess", tools: ToolRegistry | None = None):
+        self.analysis_cache = analysis_cache
+        # Looked up once per process rather than once per agent
+        self.tools = tools or get_registry()
+        # bandit and radon are importable; fall back to their CLIs if they aren't
+        self.inprocess = {
+            tool: backend == "inprocess" and importlib.util.find_spec(tool) is not None
+            for tool in ("bandit", "radon")
+        }
+        self.shards = shards or os.cpu_count() or 1
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.last_reports: dict[str, ToolReport] = {}
+        # Each shard's run time is counted here under "tools"
+        self.profiler = Profiler()
+        # Missing tools are skipped; their absence is part of the cache key below
+        self.enabled = {
+            tool: self.inprocess.get(tool) or self.tools.executable(tool) is not None
+            for tool in TOOLS
+        }
+        self.tool_versions: dict[str, str] = self.tools.versions(
+            tool for tool in TOOLS if self.enabled[tool]
+        )
     
-    def run(self, files: dict[str, str], progress=None) -> CodeReviewResult:
+    def run(self, files: Mapping[str, str], progress=None,
+            trees: dict[str, ast.Module] | None = None,
+            source_root: Path | None = None) -> CodeReviewResult:
         """
         Analyze Python files for issues.
 
         Args:
             files:    Dict mapping relative paths to file contents.
                       e.g., {"src/app.py": "import os\n...", ...}
+                      Any mapping will do; spooled files are read from
+                      disk one at a time rather than all held in memory.
             progress: Optional callback for progress updates.
+            trees:    Optional already-parsed ASTs by path, reused by the
+                      in-process radon backend.
+            source_root: Optional directory already holding these files at
+                      their repository paths; tools read it in place.
 
         Returns:
             CodeReviewResult with all detected issues categorized.
@@ -62,85 +98,246 @@ class CodeReviewAgent:
                 progress(msg)
         
         excluded = {"tests/"}
-        python_files = {
-            path: content
-            for path, content in files.items()
+        python_files = [
+            path for path in files
             if path.endswith(".py") and not any(path.startswith(ex) for ex in excluded)
-        }
+        ]
 
         if not python_files:
             emit("⚠ No Python files found to review")
-            return CodeReviewResult(total_issues=0)
+            return CodeReviewResult()
 
         emit(f"🔍 Found {len(python_files)} Python file(s) to analyze")
+        missing = [tool for tool in TOOLS if not self.enabled[tool]]
+        if missing:
+            emit(f"⚠ Skipping {', '.join(missing)}: not installed (pip install {' '.join(missing)})")
 
-        # Write files to temp dir for tool execution
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp_path = Path(tmpdir)
-            for rel_path, content in python_files.items():
-                file_path = tmp_path / rel_path
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(content, encoding="utf-8")
+        # Files unchanged since a previous review reuse its issues
+        versions = ";".join(f"{tool}={v}" for tool, v in sorted(self.tool_versions.items()))
+        cached_issues: dict[str, list[dict]] = {}
+        changed: list[str] = []
+        for rel_path in python_files:
+            cached = (
+                self.analysis_cache.get("review", versions, rel_path, files[rel_path], self.profiler)
+                if self.analysis_cache else None
+            )
+            if cached is None:
+                changed.append(rel_path)
+            else:
+                cached_issues[rel_path] = cached
+        to_analyze = subset(files, changed)
 
-            issues: list[CodeIssue] = []
+        if len(to_analyze) < len(python_files):
+            emit(f"  → {len(python_files) - len(to_analyze)} file(s) unchanged since last review")
 
-            # 1. ruff — code quality, style, best practices
-            emit("  → Running ruff (linting & style)...")
-            issues.extend(self._run_ruff(tmp_path))
-
-            # 2. bandit — security vulnerabilities
-            emit("  → Running bandit (security scan)...")
-            issues.extend(self._run_bandit(tmp_path))
-
-            # 3. radon — complexity metrics
-            emit("  → Running radon (complexity analysis)...")
-            issues.extend(self._run_radon(tmp_path))
-
-        # Categorize by severity
-        result = CodeReviewResult(total_issues=len(issues))
-        for issue in issues:
-            if issue.severity == "critical":
-                result.critical.append(issue)
-            elif issue.severity == "high":
-                result.high.append(issue)
-            elif issue.severity == "medium":
-                result.medium.append(issue)
-            else:
-                result.low.append(issue)
+        self.last_reports = {}
+        if to_analyze:
+            new_issues, incomplete = self._analyze(to_analyze, emit, trees, source_root)
+        else:
+            new_issues, incomplete = [], set()
+        per_file: dict[str, list[CodeIssue]] = {path: [] for path in python_files}
+        for issue in new_issues:
+            per_file.setdefault(issue.file, []).append(issue)
+        if self.analysis_cache:
+            for rel_path, content in to_analyze.items():
+                # Partial results must not be replayed on the next run
+                if rel_path not in incomplete:
+                    self.analysis_cache.put("review", versions, rel_path, content,
+                                            [asdict(issue) for issue in per_file[rel_path]])
+
+        # File by file, so a run with cached results lists issues in the same
+        # order as one without; the store groups by severity and category as
+        # issues are added
+        issues = IssueStore()
+        for rel_path, fresh in per_file.items():
+            for item in cached_issues.get(rel_path, ()):
+                issues.add(**item)
+            issues.extend(fresh)
+        result = CodeReviewResult(issues=issues)
 
         # Summary metrics
         result.metrics = {
             "files_analyzed": len(python_files),
             "total_issues":   len(issues),
-            "by_severity": {
-                "critical": len(result.critical),
-                "high":     len(result.high),
-                "medium":   len(result.medium),
-                "low":      len(result.low),
-            },
-            "by_category": {
-                cat: len(items)
-                for cat, items in result.by_category().items()
-            },
+            "by_severity":    issues.severity_counts(),
+            "by_category":    issues.category_counts(),
+            "tools": {tool: asdict(report) for tool, report in self.last_reports.items()},
         }
 
         emit(f"✓ Code review complete: {len(issues)} issue(s) found")
         return result
     
-    def _run_ruff(self, path: Path) -> list[CodeIssue]:
-        """Run ruff and parse JSON output."""
-        try:
-            result = subprocess.run(
-                ["ruff", "check", str(path), "--output-format=json"],
-                capture_output=True,
-                text=True,
-                timeout=60,
+    def _analyze(self, python_files: Mapping[str, str], emit,
+                 trees: dict[str, ast.Module] | None = None,
+                 source_root: Path | None = None) -> tuple[list[CodeIssue], set[str]]:
+        """
+        Run all three tools over the given files, reporting repository-relative paths.
+
+        ruff is multi-threaded on its own and runs as one process. bandit and
+        radon are single-threaded, so the files are split into size-balanced
+        shards that run side by side: with the in-process backend bandit
+        shards go to a process pool and radon reuses the already parsed ASTs,
+        otherwise each shard is its own bandit/radon subprocess.
+
+        Nothing is copied when the files are already on disk under
+        ``source_root`` (a clean checkout or a cached snapshot) or spooled.
+        Otherwise the sources are written once to a temporary tree that ruff
+        and bandit read from; only in-process radon works from memory. Tools
+        are handed paths, never file contents, so nothing is pickled to the
+        bandit workers. Returns the
+        issues and the set of files whose results are incomplete because a
+        shard timed out or failed.
+        """
+        trees = trees or {}
+        with ExitStack() as stack:
+            # Spooled sources are already on disk and are read where they are
+            spooled = disk_root(python_files)
+            root = source_root or spooled
+            root = Path(root).resolve() if root else None
+            if root is None and (
+                self.enabled["ruff"] or self.enabled["bandit"]
+                or (self.enabled["radon"] and not self.inprocess["radon"])
+            ):
+                # ruff and bandit only read files
+                root = Path(stack.enter_context(tempfile.TemporaryDirectory())).resolve()
+                _write_sources(root, python_files)
+
+            shards = self._shard(python_files)
+            threads = ThreadPoolExecutor(max_workers=1 + 2 * len(shards))
+            stack.callback(threads.shutdown, wait=False, cancel_futures=True)
+            procs = None
+            if self.inprocess["bandit"]:
+                # Forked workers would inherit the ruff subprocess's pipes and stall it, so
+                # the pool uses forkserver; it is killed rather than left to finish overdue shards
+                procs = KillablePool(len(shards))
+                stack.callback(procs.terminate)
+
+            futures = {}
+            # Deadlines and wall times count from the first submission
+            start = time.monotonic()
+            if self.enabled["ruff"]:
+                ruff_job = threads.submit(
+                    _timed, self._run_ruff, [root / rel_path for rel_path in python_files], self.timeouts["ruff"]
+                )
+                futures[ruff_job] = ("ruff", list(python_files))
+            for shard in shards:
+                targets = [root / rel_path for rel_path in shard] if root else []
+                if procs:
+                    sources = [(rel_path, None) for rel_path in shard]
+                    futures[procs.submit(_timed, _bandit_inprocess, sources, root)] = ("bandit", shard)
+                elif self.enabled["bandit"]:
+                    job = threads.submit(_timed, self._run_bandit, targets, self.timeouts["bandit"])
+                    futures[job] = ("bandit", shard)
+                if self.inprocess["radon"]:
+                    sources = [
+                        (rel_path, None if spooled else python_files[rel_path], trees.get(rel_path))
+                        for rel_path in shard
+                    ]
+                    job = threads.submit(_timed, _radon_inprocess, sources, root, start + self.timeouts["radon"])
+                    futures[job] = ("radon", shard)
+                elif self.enabled["radon"]:
+                    job = threads.submit(_timed, self._run_radon, targets, self.timeouts["radon"])
+                    futures[job] = ("radon", shard)
+
+            backends = ", ".join(
+                f"{tool} {'in-process' if self.inprocess[tool] else 'subprocess'}"
+                for tool in ("bandit", "radon") if self.enabled[tool]
             )
-            # ruff exits non-zero when issues are found, which is expected
-            data = json.loads(result.stdout) if result.stdout else []
-        except (subprocess.TimeoutExpired, json.JSONDecodeError):
-            return []
+            running = [tool for tool in TOOLS if self.enabled[tool]]
+            emit(f"  → Running {', '.join(running)} ({len(shards)} shard(s); {backends})...")
+            reports = {tool: ToolReport(tool=tool) for tool in running}
+            issues: list[CodeIssue] = []
+            incomplete: set[str] = set()
+            pending = dict(futures)
+            while pending:
+                deadline = min(start + self.timeouts[tool] for tool, _ in pending.values())
+                done, _ = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    tool, shard = pending.pop(future)
+                    report = reports[tool]
+                    report.shards += 1
+                    # Wall time until the tool's last shard; shards may have waited for a worker
+                    report.seconds = round(time.monotonic() - start, 3)
+                    try:
+                        shard_issues, seconds = future.result()
+                        issues.extend(shard_issues)
+                        report.completed += 1
+                        # Time the shard itself ran, measured inside its task
+                        self.profiler.record("tools", tool, seconds)
+                    except BanditAPIError as e:
+                        if self.inprocess["bandit"]:
+                            emit(f"  ⚠ {e}; using bandit's CLI from now on")
+                        self.inprocess["bandit"] = False
+                        if self.tools.executable("bandit"):
+                            retry = threads.submit(_timed, self._run_bandit, [root / rel_path for rel_path in shard],
+                                                   self.timeouts["bandit"])
+                            pending[retry] = (tool, shard)
+                            report.shards -= 1    # counted again when the retry finishes
+                        else:
+                            report.failed += 1
+                            report.errors.append(str(e))
+                            incomplete.update(shard)
+                    except (subprocess.TimeoutExpired, TimeoutError):
+                        report.timed_out += 1
+                        report.errors.append(f"timed out after {self.timeouts[tool]}s on {len(shard)} file(s)")
+                        incomplete.update(shard)
+                    except Exception as e:
+                        report.failed += 1
+                        report.errors.append(str(e))
+                        incomplete.update(shard)
+                # Give up on overdue shards here; subprocesses and in-process radon also
+                # stop themselves at the deadline, and bandit's worker processes are killed
+                now = time.monotonic()
+                overdue = False
+                for future, (tool, shard) in list(pending.items()):
+                    if now >= start + self.timeouts[tool]:
+                        future.cancel()
+                        pending.pop(future)
+                        overdue = overdue or (tool == "bandit" and procs is not None)
+                        report = reports[tool]
+                        report.shards += 1
+                        report.timed_out += 1
+                        report.errors.append(f"timed out after {self.timeouts[tool]}s on {len(shard)} file(s)")
+                        incomplete.update(shard)
+                if overdue:
+                    # Every bandit shard shares the deadline, so none is left worth keeping
+                    procs.terminate()
+
+            for report in reports.values():
+                if report.errors:
+                    emit(f"  ⚠ {report.tool}: {report.completed}/{report.shards} shard(s) completed "
+                         f"({'; '.join(report.errors)})")
+
+            if root:
+                for issue in issues:
+                    try:
+                        issue.file = Path(issue.file).resolve().relative_to(root).as_posix()
+                    except ValueError:
+                        pass
+        self.last_reports = reports
+        return issues, incomplete
+
+    def _shard(self, python_files: Mapping[str, str]) -> list[list[str]]:
+        """Split files into up to ``self.shards`` groups of similar total size."""
+        count = max(1, min(self.shards, len(python_files) // MIN_FILES_PER_SHARD or 1))
+        return balanced_chunks(python_files, count)
 
+    def _run_ruff(self, targets: list[Path], timeout: float) -> list[CodeIssue]:
+        """Run ruff and parse JSON output."""
+        # --isolated: ignore any ruff config in a checkout so results match snapshots
+        result = subprocess.run(
+            [self.tools.executable("ruff"), "check", "--isolated", *map(str, targets), "--output-format=json"],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        # ruff exits non-zero when issues are found, which is expected
+        data = json.loads(result.stdout) if result.stdout else []
+        return self._parse_ruff(data)
+
+    def _parse_ruff(self, data: list[dict]) -> list[CodeIssue]:
+        """Turn ruff's JSON output into issues."""
         issues = []
         for item in data:
             severity = self._map_ruff_severity(item.get("code", ""))
@@ -186,18 +383,15 @@ class CodeReviewAgent:
     # BANDIT
     # ────────────────────────────────────────────────────────────────────
 
-    def _run_bandit(self, path: Path) -> list[CodeIssue]:
+    def _run_bandit(self, targets: list[Path], timeout: float) -> list[CodeIssue]:
         """Run bandit security scanner and parse JSON output."""
-        try:
-            result = subprocess.run(
-                ["bandit", "-r", str(path), "-f", "json"],
-                capture_output=True,
-                text=True,
-                timeout=60,
-            )
-            data = json.loads(result.stdout) if result.stdout else {}
-        except (subprocess.TimeoutExpired, json.JSONDecodeError):
-            return []
+        result = subprocess.run(
+            [self.tools.executable("bandit"), "-q", "-f", "json", *map(str, targets)],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        data = json.loads(result.stdout) if result.stdout else {}
 
         issues = []
         for item in data.get("results", []):
@@ -232,41 +426,153 @@ class CodeReviewAgent:
     # RADON
     # ────────────────────────────────────────────────────────────────────
 
-    def _run_radon(self, path: Path) -> list[CodeIssue]:
+    def _run_radon(self, targets: list[Path], timeout: float) -> list[CodeIssue]:
         """Run radon complexity analysis and flag high-complexity functions."""
-        try:
-            result = subprocess.run(
-                ["radon", "cc", str(path), "-s", "-j"],
-                capture_output=True,
-                text=True,
-                timeout=60,
-            )
-            data = json.loads(result.stdout) if result.stdout else {}
-        except (subprocess.TimeoutExpired, json.JSONDecodeError):
-            return []
+        result = subprocess.run(
+            [self.tools.executable("radon"), "cc", *map(str, targets), "-s", "-j"],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        data = json.loads(result.stdout) if result.stdout else {}
 
         issues = []
         for filepath, functions in data.items():
+            if not isinstance(functions, list):
+                # radon reports {"error": ...} for files it cannot parse
+                continue
             for func in functions:
                 complexity = func.get("complexity", 0)
                 rank       = func.get("rank", "A")
 
-                # Flag complexity > 10 (rank C or worse)
-                if complexity > 10:
-                    severity = "high" if complexity > 20 else "medium"
-                    issues.append(
-                        CodeIssue(
-                            severity=severity,
-                            category="complexity",
-                            file=filepath,
-                            line=func.get("lineno"),
-                            column=func.get("col_offset"),
-                            code=f"CC{complexity}",
-                            message=(
-                                f"High cyclomatic complexity ({complexity}, rank {rank}) "
-                                f"in function '{func.get('name', 'unknown')}'"
-                            ),
-                            tool="radon",
-                        )
-                    )
-        return issues
\ No newline at end of file
+                issue = _complexity_issue(
+                    filepath, complexity, rank, func.get("lineno"),
+                    func.get("col_offset"), func.get("name", "unknown"),
+                )
+                if issue:
+                    issues.append(issue)
+        return issues
+
+
+def _timed(fn, *args) -> tuple[Any, float]:
+    """Run ``fn`` and time it where it runs, so waiting for a pool worker isn't counted"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _complexity_issue(filepath: str, complexity: int, rank: str, lineno: int | None,
+                      col_offset: int | None, name: str) -> CodeIssue | None:
+    """A radon result as an issue, if the function is complex enough to flag."""
+    # Flag complexity > 10 (rank C or worse)
+    if complexity <= 10:
+        return None
+    severity = "high" if complexity > 20 else "medium"
+    return CodeIssue(
+        severity=severity,
+        category="complexity",
+        file=filepath,
+        line=lineno,
+        column=col_offset,
+        code=f"CC{complexity}",
+        message=(
+            f"High cyclomatic complexity ({complexity}, rank {rank}) "
+            f"in function '{name}'"
+        ),
+        tool="radon",
+    )
+
+
+# ────────────────────────────────────────────────────────────────────
+# IN-PROCESS BACKENDS
+# ────────────────────────────────────────────────────────────────────
+
+def _radon_inprocess(sources: list[tuple[str, str | None, ast.Module | None]],
+                     root: Path | None = None, deadline: float | None = None) -> list[CodeIssue]:
+    """radon's cc_visit on in-memory sources, reusing already parsed ASTs.
+
+    Sources whose content is None are read from ``root``. A thread cannot
+    be stopped from outside, so past ``deadline`` (``time.monotonic()``)
+    this gives up between files with TimeoutError.
+    """
+    from radon.complexity import cc_rank, cc_visit_ast
+
+    issues = []
+    for rel_path, content, tree in sources:
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"radon passed its deadline after {len(issues)} issue(s)")
+        try:
+            if tree is None:
+                tree = ast.parse(content if content is not None else (root / rel_path).read_bytes())
+            blocks = cc_visit_ast(tree)
+        except (SyntaxError, ValueError):
+            continue
+        for block in blocks:
+            issue = _complexity_issue(
+                rel_path, block.complexity, cc_rank(block.complexity),
+                block.lineno, block.col_offset, block.name,
+            )
+            if issue:
+                issues.append(issue)
+    return issues
+
+
+class BanditAPIError(RuntimeError):
+    """bandit's Python API is not what the in-process backend expects"""
+
+
+def _write_sources(root: Path, python_files: Mapping[str, str]) -> None:
+    """Write sources under ``root`` at their repository paths, for tools that only read files"""
+    for rel_path, content in python_files.items():
+        file_path = root / rel_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding="utf-8")
+
+
+def _bandit_inprocess(sources: list[tuple[str, str | None]], root: Path | None = None) -> list[CodeIssue]:
+    """bandit's manager, through the same public calls as its CLI; runs in a worker process.
+
+    Sources whose content is None are read from ``root``; the others are
+    written to a temporary directory first, as bandit only reads files.
+    Raises BanditAPIError if bandit's API has changed shape.
+    """
+    import bandit
+    from bandit.core import config as bandit_config
+    from bandit.core import manager as bandit_manager
+
+    # bandit warns about every file it cannot map to a module name
+    logging.getLogger("bandit").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as scratch:
+        paths: dict[str, str] = {}
+        for rel_path, content in sources:
+            if content is None:
+                path = root / rel_path
+            else:
+                path = Path(scratch) / rel_path
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(content, encoding="utf-8")
+            paths[str(path)] = rel_path
+        try:
+            manager = bandit_manager.BanditManager(bandit_config.BanditConfig(), "file", quiet=True)
+            manager.discover_files(list(paths))
+            manager.run_tests()
+            found = [
+                (item.severity, item.fname, item.lineno, item.col_offset, item.test_id, item.text)
+                for item in manager.get_issue_list()
+            ]
+        except (AttributeError, TypeError) as e:
+            raise BanditAPIError(f"bandit {getattr(bandit, '__version__', '?')} in-process failed: {e}") from None
+
+    return [
+        CodeIssue(
+            severity=CodeReviewAgent._map_bandit_severity(severity),
+            category="security",
+            file=paths.get(fname, fname),
+            line=line,
+            column=column,
+            code=code,
+            message=text,
+            tool="bandit",
+        )
+        for severity, fname, line, column, code, text in found
+    ]
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Persistent on-disk snapshots of a repository's Python files"""
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from all_agents.blob_cache import BlobCache
+
+# Snapshots kept on disk; older ones are removed when a new one is built
+KEEP_SNAPSHOTS = 10
+
+
+def build_snapshot(root: Path, files: Dict[str, str], shas: Dict[str, str],
+                   blob_cache: BlobCache | None = None) -> Path:
+    """
+    A directory tree holding ``files`` at their repository paths.
+
+    Snapshots are keyed by the (path, blob SHA) pairs they contain, so the
+    same file set is only ever laid out once and later runs reuse it. Files
+    already in the blob cache are hardlinked rather than copied; anything
+    else is written from ``files``. The tree is built under a temporary
+    name and renamed into place, so a half-built snapshot is never used.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(f"{path}\0{shas.get(path, '')}\n".encode("utf-8"))
+    snapshots = Path(root) / "snapshots"
+    target = snapshots / digest.hexdigest()[:24]
+    if target.exists():
+        os.utime(target)
+        return target
+
+    snapshots.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=snapshots, prefix=".tmp-"))
+    try:
+        for path, content in files.items():
+            dest = staging / path
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            blob = blob_cache.path_for(shas[path]) if blob_cache and path in shas else None
+            try:
+                if blob is None:
+                    raise FileNotFoundError
+                os.link(blob, dest)
+            except OSError:
+                # Not cached, or the cache is on another filesystem
+                dest.write_text(content, encoding="utf-8")
+        os.replace(staging, target)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not target.exists():
+            raise
+    _prune(snapshots)
+    return target
+
+
+def _prune(snapshots: Path) -> None:
+    existing = sorted(
+        (p for p in snapshots.iterdir() if p.is_dir() and not p.name.startswith(".tmp-")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in existing[KEEP_SNAPSHOTS:]:
+        shutil.rmtree(old, ignore_errors=True)
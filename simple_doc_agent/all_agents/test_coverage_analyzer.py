@@ -1,5 +1,6 @@
 """ A agemt to check test coverage from the latest pipeline on main"""
 from gitlab.v4.objects.projects import Project
+import git
 import xml.etree.ElementTree as ET
 import re
 import io
@@ -49,6 +50,9 @@ class RepositoryTestCoverageFetcher:
             return TestCoverage(test_coverage=detailed_coverage, summary_coverage=overall_coverage)
 
     def get_latest_tag_coverage(self, project: Project) -> str:
+        if isinstance(project, git.Repo):
+            # Local checkouts have no CI pipelines to read coverage from
+            return TestCoverage(test_coverage=[], summary_coverage="N/A (local repository)")
         # 1. Get all tags, sorted by creation (GitLab returns latest first by default)
         if hasattr(project, 'tags'):
         # GitLab
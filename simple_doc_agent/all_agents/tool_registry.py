@@ -0,0 +1,117 @@
+"""Process-wide lookup of the external analysis tools"""
+import importlib.metadata
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable
+
+from models import ToolInfo
+
+VERSION_TIMEOUT = 30
+
+
+class ToolRegistry:
+    """
+    Resolves each tool's executable and version once per process.
+
+    ``ruff --version`` and friends cost a process spawn each, so results are
+    memoised here and, given a cache directory, also persisted to
+    ``tools.json`` keyed by the executable's path, size and mtime; a tool is
+    only asked for its version again after it has been upgraded. A missing
+    tool resolves to None instead of raising, and callers skip it.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None):
+        self.cache_file = Path(cache_dir) / "tools.json" if cache_dir else None
+        self._tools: Dict[str, ToolInfo | None] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, tool: str) -> ToolInfo | None:
+        """The tool's path and version, or None if it is not installed"""
+        with self._lock:
+            if tool not in self._tools:
+                self._tools[tool] = self._lookup(tool)
+            return self._tools[tool]
+
+    def available(self, tool: str) -> bool:
+        return self.resolve(tool) is not None
+
+    def executable(self, tool: str) -> str | None:
+        info = self.resolve(tool)
+        return info.path if info else None
+
+    def versions(self, tools: Iterable[str]) -> Dict[str, str]:
+        """Versions of the installed ones among ``tools``, for use in cache keys"""
+        infos = (self.resolve(tool) for tool in tools)
+        return {info.name: info.version for info in infos if info}
+
+    def _lookup(self, tool: str) -> ToolInfo | None:
+        path = shutil.which(tool)
+        if path is None:
+            # No executable, but the module may still be importable for in-process use
+            try:
+                return ToolInfo(name=tool, path=None, version=importlib.metadata.version(tool))
+            except importlib.metadata.PackageNotFoundError:
+                return None
+
+        stat = os.stat(path)
+        fingerprint = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+        disk = self._load()
+        cached = disk.get(tool)
+        if cached and cached.get("fingerprint") == fingerprint:
+            return ToolInfo(**cached["info"])
+
+        try:
+            result = subprocess.run(
+                [path, "--version"],
+                capture_output=True,
+                check=True,
+                timeout=VERSION_TIMEOUT,
+                text=True,
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"⚠ Could not run {tool} --version: {e}")
+            return None
+        info = ToolInfo(name=tool, path=path, version=result.stdout.strip())
+        disk[tool] = {"fingerprint": fingerprint, "info": asdict(info)}
+        self._save(disk)
+        return info
+
+    def _load(self) -> dict:
+        if self.cache_file is None:
+            return {}
+        try:
+            return json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, data: dict) -> None:
+        if self.cache_file is None:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_file.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.cache_file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+_registries: Dict[Path | None, ToolRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(cache_dir: str | Path | None = None) -> ToolRegistry:
+    """The shared registry for ``cache_dir``, so every agent in the process reuses one lookup"""
+    key = Path(cache_dir).resolve() if cache_dir else None
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ToolRegistry(key)
+        return _registries[key]
@@ -0,0 +1,118 @@
+"""Repository tree index shared by all file-discovery helpers"""
+from typing import Callable, Dict, Iterable, List
+
+from models import TreeEntry
+
+README_NAMES = ("readme.md", "readme.rst", "readme.txt")
+CONFIG_FILES = ("pyproject.toml",)
+
+
+def is_python_file(path: str) -> bool:
+    return path.endswith(".py")
+
+
+def is_docker_file(path: str) -> bool:
+    return "dockerfile" in path.lower()
+
+
+def is_compose_file(path: str) -> bool:
+    return "compose" in path.lower()
+
+
+def is_ci_file(path: str) -> bool:
+    return path == ".gitlab-ci.yml" or (
+        path.startswith(".github/workflows/") and path.endswith((".yml", ".yaml"))
+    )
+
+
+def is_readme(path: str) -> bool:
+    return "/" not in path and path.lower() in README_NAMES
+
+
+def is_config_file(path: str) -> bool:
+    return path in CONFIG_FILES
+
+
+# Everything the analysers consume
+WANTED = (is_config_file, is_readme, is_ci_file, is_docker_file, is_compose_file, is_python_file)
+
+
+def is_wanted(path: str) -> bool:
+    """Whether a repository path is one the analysers need"""
+    return any(check(path) for check in WANTED)
+
+
+class TreeIndex:
+    """
+    One recursive tree listing for a (project, ref).
+
+    Built once per run from a single paginated tree walk; every classifier
+    queries the in-memory entries so adding a new file kind costs no extra
+    API calls.
+    """
+
+    def __init__(self, entries: Iterable[TreeEntry]):
+        self.entries: Dict[str, TreeEntry] = {e.path: e for e in entries}
+
+    @classmethod
+    def from_gitlab(cls, project, ref: str) -> "TreeIndex":
+        tree = project.repository_tree(recursive=True, get_all=True, ref=ref)
+        return cls(
+            TreeEntry(path=item["path"], sha=item["id"], size=None, mode=item["mode"])
+            for item in tree
+            if item["type"] == "blob"
+        )
+
+    @classmethod
+    def from_github(cls, repo, ref: str) -> "TreeIndex":
+        tree = repo.get_git_tree(ref, recursive=True)
+        if tree.raw_data.get("truncated"):
+            print("⚠ GitHub truncated the tree listing; some files will be missing")
+        return cls(
+            TreeEntry(path=item.path, sha=item.sha, size=item.size, mode=item.mode)
+            for item in tree.tree
+            if item.type == "blob"
+        )
+
+    @classmethod
+    def from_git(cls, commit) -> "TreeIndex":
+        """Index a gitpython commit's tree straight from the object database"""
+        return cls(
+            TreeEntry(path=item.path, sha=item.hexsha, size=item.size, mode=f"{item.mode:06o}")
+            for item in commit.tree.traverse()
+            if item.type == "blob"
+        )
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, path: str) -> TreeEntry | None:
+        return self.entries.get(path)
+
+    def select(self, *checks: Callable[[str], bool]) -> List[TreeEntry]:
+        """Entries matching any of the given path classifiers"""
+        return [e for path, e in self.entries.items() if any(check(path) for check in checks)]
+
+    def paths(self, *checks: Callable[[str], bool]) -> List[str]:
+        return [e.path for e in self.select(*checks)]
+
+    def python_files(self) -> List[str]:
+        return self.paths(is_python_file)
+
+    def docker_files(self) -> List[str]:
+        return self.paths(is_docker_file)
+
+    def compose_files(self) -> List[str]:
+        return self.paths(is_compose_file)
+
+    def ci_files(self) -> List[str]:
+        return self.paths(is_ci_file)
+
+    def readme_files(self) -> List[str]:
+        return self.paths(is_readme)
+
+    def config_files(self) -> List[str]:
+        return self.paths(is_config_file)
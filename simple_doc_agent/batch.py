@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Batch mode: document many repositories in one process.
+
+Repositories come from the command line, from files (``-f repos.txt``, one
+per line, ``-`` for stdin) or from a GitLab group (``--group``, optionally
+filtered with ``--match``). They run on a shared worker pool that reuses
+the API clients, caches, review tools and browsers across repositories.
+Each repository gets ``<output>/<name>/`` with its documents and
+``<output>/<name>.json`` with the same result dict as ``doc_agent_tool``;
+``<output>/batch-summary.json`` aggregates the run.
+"""
+
+import argparse
+import fnmatch
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+from agents_orchestrator import DocumentationOrchestrator
+from all_agents.browser_pool import get_browser_pool
+from all_agents.repository_analyser import forge_host
+from doc_agent_tool import build_orchestrator, connection, detect_platform, document
+
+load_dotenv()
+
+
+def read_repos(paths: Iterable[str]) -> List[str]:
+    """Repository paths listed in files (``-`` for stdin), skipping blanks and # comments"""
+    repos = []
+    for path in paths:
+        text = sys.stdin.read() if path == "-" else Path(path).read_text(encoding="utf-8")
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                repos.append(line)
+    return repos
+
+
+def slug(repo: str) -> str:
+    """A file name for a repository path or URL"""
+    return re.sub(r"[^\w.-]+", "_", repo.strip("/")).strip("_") or "repo"
+
+
+class BatchRunner:
+    """
+    Runs many repositories through one set of warm components.
+
+    One orchestrator is built per platform and every repository is
+    documented with its own ``fork`` of it, so clients, caches, the Jinja environment
+    and the browser pool are shared while per-run state is not. At most
+    ``per_host`` repositories talk to the same forge host at a time (fetching,
+    or reading coverage); the remaining workers keep analysing and rendering
+    meanwhile.
+    """
+
+    def __init__(self, output_dir: str | Path = "docs", workers: int = 4, per_host: int = 2):
+        self.output_dir = Path(output_dir).resolve()
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self._bases: Dict[str, DocumentationOrchestrator] = {}
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def orchestrator(self, platform: str) -> DocumentationOrchestrator:
+        """The shared orchestrator for ``platform``, built on first use"""
+        with self._lock:
+            if platform not in self._bases:
+                base = build_orchestrator(platform)
+                if platform != "local":
+                    # Keyed by host, so platforms configured against one forge share its limit
+                    host = forge_host(base.fetcher.url)
+                    if host not in self._host_slots:
+                        self._host_slots[host] = threading.Semaphore(self.per_host)
+                    base.fetcher.host_slots = self._host_slots[host]
+                self._bases[platform] = base
+            return self._bases[platform]
+
+    def group_repos(self, group: str, pattern: str = "*") -> List[str]:
+        """Full paths of the projects in a GitLab group and its subgroups matching ``pattern``"""
+        fetcher = self.orchestrator("gitlab").fetcher
+        prefix = group.strip("/") + "/"
+        # The listing pages through the API as it is iterated
+        with fetcher.forge_slot():
+            projects = fetcher.client.groups.get(group).projects.list(
+                include_subgroups=True, archived=False, iterator=True,
+            )
+            return sorted(
+                project.path_with_namespace
+                for project in projects
+                if fnmatch.fnmatch(project.path_with_namespace.removeprefix(prefix), pattern)
+            )
+
+    def _document(self, repo: str, namespace: str | None) -> dict:
+        platform = detect_platform(repo)
+        if namespace is None:
+            _, _, namespace, _ = connection(platform)
+        name = slug(repo)
+        result = document(self.orchestrator(platform).fork(), repo, self.output_dir / name, namespace)
+        result_path = self.output_dir / f"{name}.json"
+        result_path.write_text(json.dumps(result, indent=2, default=str), encoding="utf-8")
+        return {"result": str(result_path)}
+
+    def run(self, jobs: List[Tuple[str, str | None]]) -> dict:
+        """
+        Document every ``(repo, namespace)`` and write the summary.
+
+        A ``None`` namespace means the platform's default from the
+        environment, as for a single run; group listings pass full paths
+        with an empty namespace.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        started_at = datetime.utcnow().isoformat()
+        start = time.monotonic()
+        entries = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            futures = {}
+            for repo, namespace in jobs:
+                futures[pool.submit(self._timed, repo, namespace)] = repo
+            for done, future in enumerate(as_completed(futures), 1):
+                entry = future.result()
+                entries.append(entry)
+                mark = "✓" if entry["status"] == "success" else "✗"
+                print(f"{mark} [{done}/{len(futures)}] {entry['repo']} ({entry['duration_s']}s)")
+
+        order = {repo: i for i, (repo, _) in enumerate(jobs)}
+        entries.sort(key=lambda entry: order[entry["repo"]])
+        failed = [entry for entry in entries if entry["status"] != "success"]
+        summary = {
+            "agent": "docs-agent",
+            "status": "success" if not failed else "partial" if len(failed) < len(entries) else "error",
+            "output_dir": str(self.output_dir),
+            "repos": len(entries),
+            "succeeded": len(entries) - len(failed),
+            "failed": len(failed),
+            "workers": self.workers,
+            "per_host": self.per_host,
+            "duration_s": round(time.monotonic() - start, 2),
+            "results": entries,
+            "Blob cache": {
+                platform: base.blob_cache.stats() for platform, base in self._bases.items() if base.blob_cache
+            },
+            "Analysis cache": {
+                platform: base.analysis_cache.stats() for platform, base in self._bases.items() if base.analysis_cache
+            },
+            "started_at": started_at,
+            "finished_at": datetime.utcnow().isoformat(),
+        }
+        summary_path = self.output_dir / "batch-summary.json"
+        summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        return summary
+
+    def _timed(self, repo: str, namespace: str | None) -> dict:
+        start = time.monotonic()
+        entry = {"repo": repo}
+        try:
+            entry.update(status="success", **self._document(repo, namespace))
+        except Exception as e:
+            entry.update(status="error", error=str(e))
+            error_path = self.output_dir / f"{slug(repo)}.json"
+            error_path.write_text(
+                json.dumps({"agent": "docs-agent", "status": "error", "repo": repo, "error": str(e)}, indent=2),
+                encoding="utf-8",
+            )
+        entry["duration_s"] = round(time.monotonic() - start, 2)
+        return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document many repositories in one process")
+    parser.add_argument("repos", nargs="*", help="repository paths, URLs or local checkouts")
+    parser.add_argument("-f", "--file", action="append", default=[],
+                        help="file listing repositories, one per line ('-' for stdin)")
+    parser.add_argument("--group", help="document every project in this GitLab group")
+    parser.add_argument("--match", default="*", help="glob over project paths within --group")
+    parser.add_argument("-o", "--output-dir", default="docs")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="repositories documented at once")
+    parser.add_argument("--per-host", type=int, default=2, help="repositories talking to one forge host at a time")
+    parser.add_argument("--browsers", type=int, default=2, help="headless browsers for PDFs and diagrams")
+    args = parser.parse_args()
+
+    # The first caller sizes the process-wide pool every orchestrator uses
+    get_browser_pool(args.browsers)
+    runner = BatchRunner(args.output_dir, workers=args.workers, per_host=args.per_host)
+    jobs: List[Tuple[str, str | None]] = [(repo, None) for repo in args.repos + read_repos(args.file)]
+    if args.group:
+        jobs += [(repo, "") for repo in runner.group_repos(args.group, args.match)]
+    if not jobs:
+        parser.error("no repositories given")
+
+    summary = runner.run(jobs)
+    print(json.dumps({k: v for k, v in summary.items() if k != "results"}, indent=2))
+    sys.exit(0 if summary["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
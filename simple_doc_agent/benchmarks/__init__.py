@@ -0,0 +1,11 @@
+"""
+Offline benchmarks for the documentation agents.
+
+``synthetic_repo`` builds repositories of any size, ``stub_forge`` serves
+them over enough of the GitLab and GitHub APIs for the fetcher and the
+coverage agent, and ``run`` times every agent and the end-to-end tool
+against them, storing the results under ``benchmarks/results`` and
+comparing them with the previous run. From ``simple_doc_agent/``:
+
+    python -m benchmarks.run --size medium
+"""
@@ -0,0 +1,324 @@
+"""Timed benchmark scenarios for every agent and the end-to-end tool, against a stub forge"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import git
+
+from agents_orchestrator import DocumentationOrchestrator
+from all_agents.repository_analyser import RepositoryFetcher
+from benchmarks.stub_forge import StubForge
+from benchmarks.synthetic_repo import SIZES, SyntheticRepo, generate
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# A scenario or stage this much slower than the baseline is reported as a regression
+DEFAULT_THRESHOLD = 0.2
+# Timings shorter than this are too noisy to compare
+MIN_COMPARABLE_S = 0.05
+
+
+class Bench:
+    """The synthetic repository, served by the stub forge and checked out locally"""
+
+    def __init__(self, repo: SyntheticRepo, forge: StubForge, checkout: Path, browser: bool):
+        self.repo = repo
+        self.forge = forge
+        self.checkout = checkout
+        self.browser = browser
+        self.project = f"{forge.namespace}/{repo.name}"
+
+    def url(self, platform_name: str) -> str:
+        return {"gitlab": self.forge.gitlab_url, "github": self.forge.github_url}.get(platform_name, "")
+
+    def target(self, platform_name: str) -> str:
+        return str(self.checkout) if platform_name == "local" else self.project
+
+    def orchestrator(self, platform_name: str, cache_dir: str, **kwargs) -> DocumentationOrchestrator:
+        return DocumentationOrchestrator(
+            self.url(platform_name), "benchmark", platform_name, cache_dir=cache_dir,
+            prerender_diagrams=self.browser, **kwargs,
+        )
+
+
+def fetch_scenario(platform_name: str, mode: str = "archive", streaming: bool = False) -> Callable[[Bench], dict]:
+    """Fetch every wanted file with a cold fetcher (no blob cache)"""
+    def scenario(bench: Bench) -> dict:
+        fetcher = RepositoryFetcher(bench.url(platform_name), "benchmark", platform_name, mode=mode)
+        start = time.perf_counter()
+        if streaming:
+            blobs, _, _ = fetcher.stream(bench.target(platform_name))
+            count = sum(1 for _ in blobs)
+        else:
+            files, _, _ = fetcher.fetch(bench.target(platform_name))
+            count = len(files)
+        wall = time.perf_counter() - start
+        return {
+            "wall_s": wall,
+            "files": count,
+            "files_per_s": count / wall if wall else None,
+            "fetch": fetcher.profiler.report()["fetch"],
+            "errors": len(fetcher.errors),
+        }
+    return scenario
+
+
+def agents_scenario(platform_name: str, warm: bool = False, **kwargs) -> Callable[[Bench], dict]:
+    """
+    Every agent, one after another so their timings don't overlap, from a
+    cold cache directory; ``warm`` times a second run on the same caches.
+    """
+    def scenario(bench: Bench) -> dict:
+        with tempfile.TemporaryDirectory(prefix="bench-cache-") as cache_dir:
+            orchestrator = bench.orchestrator(platform_name, cache_dir, max_workers=1, **kwargs)
+            if warm:
+                orchestrator.run(bench.target(platform_name))
+                bench.forge.reset_counters()
+            orchestrator.run(bench.target(platform_name))
+            return _profile_result(orchestrator.profiler.report())
+    return scenario
+
+
+def pipeline_scenario(platform_name: str, **kwargs) -> Callable[[Bench], dict]:
+    """The agents with the default concurrency, from a cold cache directory"""
+    def scenario(bench: Bench) -> dict:
+        with tempfile.TemporaryDirectory(prefix="bench-cache-") as cache_dir:
+            orchestrator = bench.orchestrator(platform_name, cache_dir, **kwargs)
+            orchestrator.run(bench.target(platform_name))
+            return _profile_result(orchestrator.profiler.report())
+    return scenario
+
+
+def end_to_end_scenario(platform_name: str) -> Callable[[Bench], dict]:
+    """``doc_agent_tool.run`` as the CLI calls it, PDF included, configured through the environment"""
+    def scenario(bench: Bench) -> dict:
+        import doc_agent_tool
+        with tempfile.TemporaryDirectory(prefix="bench-e2e-") as work:
+            prefix = platform_name.upper()
+            env = {
+                f"{prefix}_URL": bench.url(platform_name), f"{prefix}_TOKEN": "benchmark",
+                f"{prefix}_NAMESPACE": bench.forge.namespace,
+                "DOC_AGENT_CACHE_DIR": str(Path(work) / "cache"),
+                "PRERENDER_DIAGRAMS": "1" if bench.browser else "0",
+            }
+            # The tool tells GitHub from GitLab by the repository URL
+            repo_path = f"github.com/{bench.repo.name}" if platform_name == "github" else bench.repo.name
+            if platform_name == "local":
+                repo_path = str(bench.checkout)
+            with _environ(env):
+                start = time.perf_counter()
+                result = doc_agent_tool.run(repo_path, str(Path(work) / "docs"))
+                wall = time.perf_counter() - start
+            return {**_profile_result(result["profile"]), "wall_s": wall}
+    return scenario
+
+
+def _profile_result(profile: dict) -> dict:
+    return {
+        "wall_s": profile["wall_s"],
+        "peak_rss_mb": profile["peak_rss_mb"],
+        "stages": {name: stage["wall_s"] for name, stage in profile["stages"].items()},
+        "cpu": {name: stage["cpu_s"] for name, stage in profile["stages"].items()},
+        "fetch": profile["fetch"],
+        "tools": profile["tools"],
+        "caches": profile["caches"],
+    }
+
+
+@contextlib.contextmanager
+def _environ(values: Dict[str, str]):
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+SCENARIOS: Dict[str, Callable[[Bench], dict]] = {
+    "fetch/gitlab-archive": fetch_scenario("gitlab", "archive"),
+    "fetch/gitlab-files": fetch_scenario("gitlab", "files"),
+    "fetch/github-archive": fetch_scenario("github", "archive"),
+    "fetch/github-files": fetch_scenario("github", "files"),
+    "fetch/local": fetch_scenario("local"),
+    "fetch/gitlab-stream": fetch_scenario("gitlab", "archive", streaming=True),
+    "agents/gitlab": agents_scenario("gitlab"),
+    "agents/gitlab-warm": agents_scenario("gitlab", warm=True),
+    "agents/gitlab-stream": agents_scenario("gitlab", streaming=True),
+    "agents/github": agents_scenario("github"),
+    "agents/local": agents_scenario("local"),
+    "pipeline/gitlab": pipeline_scenario("gitlab"),
+    "end_to_end/gitlab": end_to_end_scenario("gitlab"),
+}
+
+
+def run_scenario(name: str, bench: Bench, repeat: int, verbose: bool = False) -> dict:
+    """The scenario's median (and fastest) timings over ``repeat`` runs, or its error"""
+    runs: List[dict] = []
+    requests = []
+    for _ in range(repeat):
+        bench.forge.reset_counters()
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if verbose else output):
+                runs.append(SCENARIOS[name](bench))
+        except Exception as e:
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        requests.append(sum(bench.forge.requests.values()))
+
+    walls = [run["wall_s"] for run in runs]
+    result = {
+        **runs[walls.index(min(walls))],
+        "status": "ok",
+        "wall_s": round(statistics.median(walls), 3),
+        "min_s": round(min(walls), 3),
+        "requests": requests[-1],
+    }
+    for key in ("stages", "cpu"):
+        if key in result:
+            result[key] = {
+                stage: round(statistics.median(run[key].get(stage, 0.0) for run in runs), 3)
+                for stage in result[key]
+            }
+    if result.get("files_per_s"):
+        result["files_per_s"] = round(result["files_per_s"], 1)
+    return result
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Scenarios and stages that got more than ``threshold`` slower than the baseline"""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before or before.get("status") != "ok" or result.get("status") != "ok":
+            continue
+        timings = [(name, before["wall_s"], result["wall_s"])]
+        timings += [
+            (f"{name} · {stage}", before.get("stages", {}).get(stage), seconds)
+            for stage, seconds in result.get("stages", {}).items()
+        ]
+        for label, old, new in timings:
+            if old and max(old, new) >= MIN_COMPARABLE_S and new > old * (1 + threshold):
+                regressions.append(f"{label}: {old:.3f}s → {new:.3f}s (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def latest_result(settings: dict, exclude: Path | None = None) -> Path | None:
+    """The newest stored result with the same settings, to compare against"""
+    candidates = []
+    for path in RESULTS_DIR.glob("*.json"):
+        if path == exclude:
+            continue
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if stored.get("settings") == settings:
+            candidates.append((stored.get("created_at", ""), path))
+    return max(candidates)[1] if candidates else None
+
+
+def version() -> str:
+    """``git describe`` of the checkout being benchmarked"""
+    try:
+        repo = git.Repo(Path(__file__).resolve().parent, search_parent_directories=True)
+        return repo.git.describe("--tags", "--always", "--dirty")
+    except Exception:
+        return "unknown"
+
+
+def print_table(results: Dict[str, dict]) -> None:
+    print(f"\n{'scenario':<24} {'median':>9} {'min':>9} {'requests':>9}  slowest stages")
+    for name, result in results.items():
+        if result["status"] != "ok":
+            print(f"{name:<24} {'error':>9}  {result['error'][:80]}")
+            continue
+        stages = sorted(result.get("stages", {}).items(), key=lambda item: -item[1])[:3]
+        slowest = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stages)
+        if "files_per_s" in result:
+            slowest = f"{result['files']} files, {result['files_per_s']} files/s"
+        print(f"{name:<24} {result['wall_s']:>8.3f}s {result['min_s']:>8.3f}s {result['requests']:>9}  {slowest}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the documentation agents offline")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="Preset repository size")
+    parser.add_argument("--files", type=int, help="Python modules in the repository (overrides --size)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the median is kept")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every forge response")
+    parser.add_argument("--only", nargs="+", metavar="PREFIX", help="Only scenarios starting with these")
+    parser.add_argument("--browser", action="store_true", help="Pre-render diagrams in the browser pool")
+    parser.add_argument("--baseline", type=Path, help="Result file to compare with (default: the latest match)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Slowdown reported as a regression")
+    parser.add_argument("--no-save", action="store_true", help="Don't store the results")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if anything regressed")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the agents' own output")
+    args = parser.parse_args()
+
+    python_files = args.files or SIZES[args.size]
+    names = [
+        name for name in SCENARIOS
+        if not args.only or any(name.startswith(prefix) for prefix in args.only)
+    ]
+    settings = {"python_files": python_files, "latency": args.latency, "browser": args.browser}
+    repo = generate("synthetic", python_files=python_files)
+    print(f"📦 Synthetic repository: {len(repo.files)} files ({python_files} Python modules)")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-repo-") as checkout, \
+            StubForge([repo], latency=args.latency) as forge:
+        bench = Bench(repo, forge, repo.git_init(checkout), args.browser)
+        for name in names:
+            print(f"⏱  {name}...", flush=True)
+            results[name] = run_scenario(name, bench, args.repeat, args.verbose)
+    print_table(results)
+
+    report = {
+        "version": version(),
+        "created_at": datetime.utcnow().isoformat(),
+        "settings": settings,
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "repeat": args.repeat,
+        "scenarios": results,
+    }
+    saved = None
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = report["created_at"][:19].replace(":", "").replace("-", "")
+        saved = RESULTS_DIR / f"{stamp}-{report['version']}-{python_files}.json"
+        saved.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n💾 Results saved to {saved}")
+
+    baseline = args.baseline or latest_result(settings, exclude=saved)
+    if baseline is None:
+        print("No earlier results with these settings to compare against")
+        return
+    regressions = compare(report, json.loads(Path(baseline).read_text(encoding="utf-8")), args.threshold)
+    print(f"\n📊 Compared with {baseline.name}:")
+    for line in regressions:
+        print(f"  ⚠ {line}")
+    if not regressions:
+        print(f"  ✓ Nothing more than {args.threshold:.0%} slower")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""A local stand-in for GitLab and GitHub, serving synthetic repositories"""
+import base64
+import json
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable
+
+from benchmarks.synthetic_repo import SyntheticRepo, blob_sha
+
+GITLAB_PREFIX = "/api/v4"
+GITHUB_PREFIX = "/api/v3"
+
+
+class StubForge:
+    """
+    An HTTP server speaking enough of the GitLab v4 and GitHub v3 APIs for
+    ``RepositoryFetcher`` and ``RepositoryTestCoverageFetcher``.
+
+    Each repository is served as ``<namespace>/<name>`` on both: use
+    ``gitlab_url`` and ``github_url`` as the forge URL. GitLab projects have
+    a successful pipeline per tag whose ``test`` job log is the repository's
+    coverage log. ``latency`` seconds are added to every response to stand
+    in for a remote forge, and ``requests`` counts the calls by endpoint.
+    ``rate_limits=False`` behaves like GitHub Enterprise with rate limiting
+    off: no rate-limit headers, and ``/rate_limit`` is a 404.
+    ``fail_archives=True`` answers every archive download with a 500.
+    """
+
+    def __init__(self, repos: Iterable[SyntheticRepo], namespace: str = "bench", latency: float = 0.0,
+                 rate_limits: bool = True, fail_archives: bool = False):
+        self.namespace = namespace
+        self.latency = latency
+        self.rate_limits = rate_limits
+        self.fail_archives = fail_archives
+        self.repos: Dict[str, SyntheticRepo] = {f"{namespace}/{repo.name}": repo for repo in repos}
+        # GitLab addresses projects by id after the first lookup
+        self.ids: Dict[int, str] = dict(enumerate(self.repos, start=1))
+        self.requests: Counter = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._archives: Dict[str, bytes] = {}
+        self._server: ThreadingHTTPServer | None = None
+
+    def __enter__(self) -> "StubForge":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> "StubForge":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.forge = self
+        threading.Thread(target=self._server.serve_forever, name="stub-forge", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def gitlab_url(self) -> str:
+        return self.url
+
+    @property
+    def github_url(self) -> str:
+        return self.url + GITHUB_PREFIX
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.bytes_sent = 0
+
+    def archive(self, full_path: str) -> bytes:
+        """The repository's tar.gz, built once"""
+        with self._lock:
+            if full_path not in self._archives:
+                self._archives[full_path] = self.repos[full_path].archive()
+            return self._archives[full_path]
+
+    def count(self, endpoint: str, nbytes: int) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.bytes_sent += nbytes
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def forge(self) -> StubForge:
+        return self.server.forge
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        if self.forge.latency:
+            time.sleep(self.forge.latency)
+        path = url.path
+        try:
+            if path.startswith(GITLAB_PREFIX + "/"):
+                self._gitlab(path[len(GITLAB_PREFIX):])
+            elif path.startswith(GITHUB_PREFIX + "/"):
+                self._github(path[len(GITHUB_PREFIX):])
+            elif path.startswith("/archive/"):
+                if self.forge.fail_archives:
+                    return self._error("github.tarball")
+                full_path = urllib.parse.unquote(path[len("/archive/"):].rsplit("/", 1)[0])
+                self._send("github.tarball", self.forge.archive(full_path), "application/gzip")
+            else:
+                self._not_found("unknown")
+        except KeyError:
+            self._not_found("unknown")
+
+    # -- GitLab ---------------------------------------------------------------
+
+    def _gitlab(self, path: str) -> None:
+        match = re.match(r"/projects/([^/]+)(/.*)?$", path)
+        if not match:
+            return self._not_found("gitlab.unknown")
+        key, rest = urllib.parse.unquote(match.group(1)), match.group(2) or ""
+        full_path = self.forge.ids.get(int(key)) if key.isdigit() else key
+        repo = self.forge.repos.get(full_path)
+        if repo is None:
+            return self._not_found("gitlab.project")
+        project_id = list(self.forge.ids.values()).index(full_path) + 1
+
+        if rest == "":
+            return self._json("gitlab.project", {
+                "id": project_id, "name": repo.name, "path": repo.name,
+                "path_with_namespace": full_path, "default_branch": "main",
+                "web_url": f"{self.forge.url}/{full_path}", "archived": False,
+            })
+        if rest == "/repository/branches":
+            return self._json("gitlab.branches", [{"name": "main", "commit": {"id": repo.commit}}])
+        if rest.startswith("/repository/commits/"):
+            return self._json("gitlab.commit", {"id": repo.commit, "short_id": repo.commit[:8]})
+        if rest == "/repository/tree":
+            return self._json("gitlab.tree", [
+                {"id": blob_sha(data), "name": p.rsplit("/", 1)[-1], "type": "blob", "path": p, "mode": "100644"}
+                for p, data in repo.files.items()
+            ])
+        if rest == "/repository/archive.tar.gz":
+            if self.forge.fail_archives:
+                return self._error("gitlab.archive")
+            return self._send("gitlab.archive", self.forge.archive(full_path), "application/gzip")
+        if rest.startswith("/repository/files/") and rest.endswith("/raw"):
+            file_path = urllib.parse.unquote(rest[len("/repository/files/"):-len("/raw")])
+            if file_path not in repo.files:
+                return self._not_found("gitlab.file")
+            return self._send("gitlab.file", repo.files[file_path], "text/plain")
+        if rest == "/repository/tags":
+            return self._json("gitlab.tags", [{"name": tag, "commit": {"id": repo.commit}} for tag in repo.tags])
+
+        # One successful pipeline per tag, each with a test job
+        pipelines = {100 + i: tag for i, tag in enumerate(repo.tags)}
+        if rest == "/pipelines":
+            ref = self.query.get("ref")
+            return self._json("gitlab.pipelines", [
+                {"id": pid, "ref": tag, "status": "success"} for pid, tag in pipelines.items()
+                if ref in (None, tag)
+            ])
+        match = re.match(r"/pipelines/(\d+)(/jobs)?$", rest)
+        if match and int(match.group(1)) in pipelines:
+            pid = int(match.group(1))
+            if match.group(2):
+                return self._json("gitlab.jobs", [{"id": pid * 10, "name": "test", "status": "success"}])
+            return self._json("gitlab.pipeline", {
+                "id": pid, "ref": pipelines[pid], "status": "success", "coverage": str(repo.coverage),
+            })
+        match = re.match(r"/jobs/(\d+)(/trace)?$", rest)
+        if match:
+            if match.group(2):
+                return self._send("gitlab.trace", repo.coverage_log.encode(), "text/plain")
+            return self._json("gitlab.job", {"id": int(match.group(1)), "name": "test", "status": "success"})
+        return self._not_found("gitlab.unknown")
+
+    # -- GitHub ---------------------------------------------------------------
+
+    def _github(self, path: str) -> None:
+        if path == "/rate_limit":
+            if not self.forge.rate_limits:
+                return self._not_found("github.rate_limit")
+            core = {"limit": 5000, "remaining": 5000, "reset": int(time.time()) + 3600, "used": 0}
+            return self._json("github.rate_limit", {"resources": {"core": core}, "rate": core})
+        match = re.match(r"/repos/([^/]+/[^/]+)(/.*)?$", path)
+        repo = self.forge.repos.get(match.group(1)) if match else None
+        if repo is None:
+            return self._not_found("github.repo")
+        full_path, rest = match.group(1), match.group(2) or ""
+        api = f"{self.forge.github_url}/repos/{full_path}"
+
+        if rest == "":
+            return self._json("github.repo", {
+                "id": list(self.forge.repos).index(full_path) + 1, "name": repo.name,
+                "full_name": full_path, "default_branch": "main", "url": api,
+                "html_url": f"{self.forge.url}/{full_path}", "archived": False,
+            })
+        if rest.startswith("/commits/"):
+            return self._json("github.commit", {"sha": repo.commit, "url": f"{api}/commits/{repo.commit}"})
+        if rest.startswith("/git/trees/"):
+            return self._json("github.tree", {
+                "sha": repo.commit, "url": f"{api}/git/trees/{repo.commit}", "truncated": False,
+                "tree": [
+                    {"path": p, "mode": "100644", "type": "blob", "sha": blob_sha(data), "size": len(data)}
+                    for p, data in repo.files.items()
+                ],
+            })
+        if rest.startswith("/contents/"):
+            file_path = urllib.parse.unquote(rest[len("/contents/"):])
+            if file_path not in repo.files:
+                return self._not_found("github.contents")
+            data = repo.files[file_path]
+            return self._json("github.contents", {
+                "type": "file", "encoding": "base64", "size": len(data),
+                "name": file_path.rsplit("/", 1)[-1], "path": file_path, "sha": blob_sha(data),
+                "url": f"{api}/contents/{file_path}", "content": base64.b64encode(data).decode(),
+            })
+        if rest.startswith("/tarball/"):
+            location = f"{self.forge.url}/archive/{full_path}/{repo.commit}.tar.gz"
+            return self._send("github.tarball_link", b"", "text/plain", status=302, headers={"Location": location})
+        if rest == "/tags":
+            # The coverage agent reads GitLab pipelines only, so GitHub repos show no tags
+            return self._json("github.tags", [])
+        return self._not_found("github.unknown")
+
+    # -- Responses ------------------------------------------------------------
+
+    def _json(self, endpoint: str, payload) -> None:
+        self._send(endpoint, json.dumps(payload).encode(), "application/json")
+
+    def _not_found(self, endpoint: str) -> None:
+        self._send(endpoint, b'{"message": "404 Not Found"}', "application/json", status=404)
+
+    def _error(self, endpoint: str) -> None:
+        self._send(endpoint, b'{"message": "500 Internal Server Error"}', "application/json", status=500)
+
+    def _send(self, endpoint: str, body: bytes, content_type: str, status: int = 200,
+              headers: Dict[str, str] | None = None) -> None:
+        self.forge.count(endpoint, len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.forge.rate_limits:
+            # Both forges' rate limit headers, never close to the limit
+            self.send_header("RateLimit-Remaining", "10000")
+            self.send_header("X-RateLimit-Limit", "5000")
+            self.send_header("X-RateLimit-Remaining", "5000")
+            self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
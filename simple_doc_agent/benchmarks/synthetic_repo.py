@@ -0,0 +1,315 @@
+"""Synthetic repositories of any size, for benchmarking without a real forge"""
+import argparse
+import hashlib
+import io
+import random
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import git
+
+# Python files per preset size
+SIZES = {"small": 50, "medium": 500, "large": 3000}
+
+STDLIB_IMPORTS = ["os", "json", "logging", "re", "sys", "time", "pathlib", "typing", "collections"]
+SERVICES = ["api", "worker", "scheduler", "exporter", "gateway", "ingest"]
+
+
+def blob_sha(data: bytes) -> str:
+    """The git blob id of ``data``"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+@dataclass
+class SyntheticRepo:
+    """A generated repository held in memory as ``{path: bytes}``"""
+    name: str
+    files: Dict[str, bytes]
+    tags: List[str] = field(default_factory=list)
+    # What the test job printed: pytest-cov's per-file table and TOTAL line
+    coverage_log: str = ""
+    coverage: float = 0.0
+
+    @property
+    def commit(self) -> str:
+        """A stable stand-in commit id for the forge APIs"""
+        digest = hashlib.sha1()
+        for path in sorted(self.files):
+            digest.update(path.encode() + b"\0" + blob_sha(self.files[path]).encode())
+        return digest.hexdigest()
+
+    @property
+    def python_files(self) -> List[str]:
+        return [path for path in self.files if path.endswith(".py")]
+
+    def archive(self) -> bytes:
+        """The repository as a forge tar.gz, wrapped in one ``<name>-<sha>/`` directory"""
+        buffer = io.BytesIO()
+        prefix = f"{self.name}-{self.commit}"
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            for path, data in self.files.items():
+                info = tarfile.TarInfo(f"{prefix}/{path}")
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        return buffer.getvalue()
+
+    def write(self, root: str | Path) -> Path:
+        """Write the files under ``root``"""
+        root = Path(root)
+        for path, data in self.files.items():
+            dest = root / path
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            dest.write_bytes(data)
+        return root
+
+    def git_init(self, root: str | Path) -> Path:
+        """Write the files under ``root`` as a git repository with one commit and the tags"""
+        root = self.write(root)
+        repo = git.Repo.init(root, initial_branch="main")
+        repo.index.add(list(self.files))
+        author = git.Actor("Benchmark", "benchmark@example.com")
+        repo.index.commit("Synthetic repository", author=author, committer=author)
+        for tag in self.tags:
+            repo.create_tag(tag)
+        return root
+
+
+def generate(name: str = "synthetic", python_files: int = SIZES["small"], packages: int | None = None,
+             functions_per_file: int = 6, classes_per_file: int = 2, dockerfiles: int = 2,
+             compose_files: int = 1, tags: int = 3, seed: int = 0) -> SyntheticRepo:
+    """
+    A repository with ``python_files`` modules spread over ``packages``
+    packages (about one per 25 modules by default), plus tests, Dockerfiles,
+    compose files, a ``.gitlab-ci.yml``, a README, a pyproject.toml, version
+    tags and the coverage log of its test job.
+
+    Modules import each other, define classes and branchy functions, and a
+    few carry the kind of code ruff and bandit report, so every agent has
+    realistic work to do. The same arguments always give the same files.
+    """
+    rng = random.Random(seed)
+    packages = packages or max(1, python_files // 25)
+    files: Dict[str, bytes] = {}
+
+    modules: List[str] = []
+    for i in range(python_files):
+        package = f"{name}/pkg_{i % packages}"
+        modules.append(f"{package}/module_{i // packages}.py")
+    for package in sorted({module.rsplit("/", 1)[0] for module in modules}):
+        files[f"{package}/__init__.py"] = f'"""Package {package.replace("/", ".")}."""\n'.encode()
+    files[f"{name}/__init__.py"] = f'"""{name} root package."""\n__version__ = "1.0.0"\n'.encode()
+
+    for index, module in enumerate(modules):
+        files[module] = _module_source(rng, module, modules[:index], functions_per_file,
+                                       classes_per_file, cli=index == 0).encode()
+    # About one test file for every ten modules; the reviewer skips tests/
+    for module in modules[::10]:
+        stem = Path(module).stem
+        dotted = module[:-3].replace("/", ".")
+        files[f"tests/test_{Path(module).parent.name}_{stem}.py"] = (
+            f'"""Tests for {dotted}."""\nimport {dotted}\n\n\n'
+            f'def test_import():\n    assert {dotted} is not None\n'
+        ).encode()
+
+    services = (SERVICES * (dockerfiles // len(SERVICES) + 1))[:dockerfiles]
+    for i, service in enumerate(services):
+        path = "Dockerfile" if i == 0 else f"docker/{service}.Dockerfile"
+        files[path] = _dockerfile(rng, name, service).encode()
+    for i in range(compose_files):
+        path = "docker-compose.yml" if i == 0 else f"deploy/docker-compose.{i}.yml"
+        files[path] = _compose(name, services, port=8000 + i).encode()
+    files[".gitlab-ci.yml"] = _gitlab_ci(name).encode()
+    files["pyproject.toml"] = _pyproject(name).encode()
+    files["README.md"] = (
+        f"# {name}\n\nA synthetic repository with {python_files} modules in {packages} packages.\n\n"
+        f"## Usage\n\n```bash\npip install .\n{name} --help\n```\n"
+    ).encode()
+
+    coverage_log, coverage = _coverage_log(rng, modules)
+    versions = [f"v1.{minor}.0" for minor in range(tags)][::-1]
+    return SyntheticRepo(name=name, files=files, tags=versions, coverage_log=coverage_log, coverage=coverage)
+
+
+def _module_source(rng: random.Random, module: str, earlier: List[str],
+                   functions: int, classes: int, cli: bool = False) -> str:
+    dotted = module[:-3].replace("/", ".")
+    lines = [f'"""{dotted}: generated module."""']
+    stdlib = rng.sample(STDLIB_IMPORTS, 3)
+    lines += [f"import {mod}" for mod in stdlib]
+    if cli:
+        lines.append("import click")
+    # Imports of earlier modules give the import graph and diagrams some shape
+    deps = rng.sample(earlier, min(len(earlier), 2))
+    for k, other in enumerate(deps):
+        lines.append(f"from {other[:-3].replace('/', '.')} import helper_0 as dep_{k}")
+    smell = rng.random()
+    if smell < 0.05:
+        lines.append("import subprocess")
+    lines.append("")
+
+    if smell < 0.05:
+        lines += ["", "def run_command(cmd):", '    """Run a shell command."""',
+                  "    return subprocess.call(cmd, shell=True)", ""]
+    elif smell < 0.08:
+        lines += ["", 'PASSWORD = "hunter2"', "", "def evaluate(expression):",
+                  '    """Evaluate an expression."""', "    return eval(expression)", ""]
+
+    for c in range(classes):
+        lines += ["", f"class Model{c}:", f'    """Model {c} of {dotted}."""', "",
+                  "    def __init__(self, value=0):", "        self.value = value", ""]
+        for m in range(2):
+            lines += [f"    def method_{m}(self, amount):", f'        """Method {m}."""',
+                      "        if amount > self.value:", "            self.value = amount",
+                      "        return self.value * amount", ""]
+
+    for f in range(functions):
+        branches = rng.randint(1, 6)
+        lines += ["", f"def helper_{f}(items, threshold={rng.randint(1, 100)}):",
+                  f'    """Helper {f}: reduce items against a threshold."""', "    total = 0",
+                  "    for item in items:"]
+        for b in range(branches):
+            keyword = "if" if b == 0 else "elif"
+            lines += [f"        {keyword} item % {b + 2} == 0 and item > threshold:",
+                      f"            total += item * {b + 1}"]
+        lines += ["        else:", "            total -= 1", "    return total", ""]
+
+    if deps:
+        calls = " + ".join(f"dep_{k}(items)" for k in range(len(deps)))
+        lines += ["", "def combined(items):", '    """Sum of the helpers this module builds on."""',
+                  f"    return {calls}", ""]
+
+    if cli:
+        lines += ["", "@click.command()", '@click.option("--count", default=1, help="How many times")',
+                  '@click.option("--name", default="world", help="Who to greet")',
+                  "def main(count, name):", f'    """Command line entry point of {dotted}."""',
+                  "    for _ in range(count):", '        click.echo(f"Hello {name}")', ""]
+    return "\n".join(lines) + "\n"
+
+
+def _dockerfile(rng: random.Random, name: str, service: str) -> str:
+    port = 8000 + rng.randint(0, 99)
+    return (
+        "FROM python:3.11-slim\n"
+        "WORKDIR /app\n"
+        "COPY pyproject.toml README.md ./\n"
+        f"COPY {name} ./{name}\n"
+        "RUN pip install --no-cache-dir .\n"
+        f"ENV SERVICE={service}\n"
+        f"EXPOSE {port}\n"
+        "USER nobody\n"
+        f'CMD ["python", "-m", "{name}", "--name", "{service}"]\n'
+    )
+
+
+def _compose(name: str, services: List[str], port: int) -> str:
+    lines = ['version: "3.9"', "services:"]
+    for i, service in enumerate(services):
+        lines += [f"  {service}:", "    build:", "      context: .",
+                  f"      dockerfile: {'Dockerfile' if i == 0 else f'docker/{service}.Dockerfile'}",
+                  "    ports:", f'      - "{port + i}:{port + i}"',
+                  "    environment:", f"      - SERVICE={service}"]
+        if i:
+            lines += ["    depends_on:", f"      - {services[0]}"]
+    lines += ["  db:", "    image: postgres:16", "    environment:", f"      - POSTGRES_DB={name}"]
+    return "\n".join(lines) + "\n"
+
+
+def _gitlab_ci(name: str) -> str:
+    return f"""stages:
+  - lint
+  - test
+  - build
+  - deploy
+
+variables:
+  PIP_CACHE_DIR: "$CI_PROJECT_DIR/.cache/pip"
+
+lint:
+  stage: lint
+  image: python:3.11
+  script:
+    - pip install ruff
+    - ruff check {name}
+
+test:
+  stage: test
+  image: python:3.11
+  script:
+    - pip install . pytest pytest-cov
+    - pytest --cov={name} --cov-report=term
+  coverage: '/TOTAL.*\\s+(\\d+%)$/'
+
+build:
+  stage: build
+  image: docker:24
+  services:
+    - docker:24-dind
+  script:
+    - docker build -t $CI_REGISTRY_IMAGE:$CI_COMMIT_SHA .
+    - docker push $CI_REGISTRY_IMAGE:$CI_COMMIT_SHA
+
+deploy:
+  stage: deploy
+  script:
+    - echo "Deploying $CI_COMMIT_TAG"
+  only:
+    - tags
+  when: manual
+"""
+
+
+def _pyproject(name: str) -> str:
+    return f"""[project]
+name = "{name}"
+version = "1.0.0"
+description = "Synthetic benchmark repository"
+requires-python = ">=3.10"
+dependencies = ["click>=8", "requests>=2.31", "pyyaml>=6"]
+
+[project.optional-dependencies]
+dev = ["pytest", "pytest-cov", "ruff"]
+
+[project.scripts]
+{name} = "{name}.pkg_0.module_0:main"
+"""
+
+
+def _coverage_log(rng: random.Random, modules: List[str]) -> tuple[str, float]:
+    """The ``pytest --cov --cov-report=term`` output of the test job, and its total"""
+    rows = []
+    total_statements = total_missed = 0
+    for module in modules:
+        statements = rng.randint(20, 200)
+        missed = rng.randint(0, statements // 3)
+        total_statements += statements
+        total_missed += missed
+        rows.append(f"{module:<60} {statements:>6} {missed:>6} {100 * (statements - missed) // statements:>5}%")
+    total = 100 * (total_statements - total_missed) // total_statements
+    header = f"{'Name':<60} {'Stmts':>6} {'Miss':>6} {'Cover':>6}"
+    log = "\n".join([
+        "$ pytest --cov --cov-report=term", "============ test session starts ============",
+        "---------- coverage: platform linux, python 3.11 ----------",
+        header, "-" * len(header), *rows, "-" * len(header),
+        f"{'TOTAL':<60} {total_statements:>6} {total_missed:>6} {total:>5}%",
+        "============ all tests passed ============", "Job succeeded",
+    ])
+    return log + "\n", float(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic git repository for benchmarking")
+    parser.add_argument("output", help="Directory to create the repository in")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--files", type=int, help="Python modules (overrides --size)")
+    parser.add_argument("--name", default="synthetic")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    repo = generate(args.name, python_files=args.files or SIZES[args.size], seed=args.seed)
+    root = repo.git_init(args.output)
+    print(f"✓ Wrote {len(repo.files)} file(s) ({len(repo.python_files)} Python) to {root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ from datetime import datetime
 from dataclasses import asdict
 
 from agents_orchestrator import DocumentationOrchestrator
+from all_agents.file_policy import FilePolicy
 
 
 from dotenv import load_dotenv
@@ -23,16 +24,22 @@ load_dotenv()
 output_dir = os.getenv("OUTPUT_DIR")
 
 def detect_platform(repo_url: str) -> str:
-    """Detect if the URL is GitHub or GitLab."""
+    """Detect if the URL is GitHub, GitLab or a local/plain git repository."""
+    if Path(repo_url).expanduser().exists() or repo_url.startswith(("file://", "git@")) \
+            or repo_url.endswith(".git"):
+        return "local"
     if "github.com" in repo_url:
         return "github"
     return "gitlab"
 
-def run(repo_project_path: str, output_dir: str = "docs") -> dict:
-    started_at = datetime.utcnow().isoformat()
-    platform = detect_platform(repo_project_path)
-
-    if platform == "github":
+def connection(platform: str) -> tuple[str, str, str, str]:
+    """(forge url, token, namespace, label) for a platform, from the environment"""
+    if platform == "local":
+        repo_url = ""
+        token = "local"
+        namespace = ""
+        platform_label = "git"
+    elif platform == "github":
         repo_url = os.getenv("GITHUB_URL", "https://github.com")
         token = os.getenv("GITHUB_TOKEN")
         namespace = os.getenv("GITHUB_NAMESPACE", "")
@@ -49,30 +56,78 @@ def run(repo_project_path: str, output_dir: str = "docs") -> dict:
         raise RuntimeError(
             f"{platform_label.upper()}_TOKEN not set. Agent requires non-interactive credentials."
         )
+    return repo_url, token, namespace, platform_label
+
+
+def file_policy() -> FilePolicy:
+    """The fetch policy in ``doc_agent.yaml``; ``MAX_FILE_SIZE_KB`` overrides its size limit"""
+    config = os.getenv("DOC_AGENT_CONFIG") or Path(__file__).resolve().parent.parent / "doc_agent.yaml"
+    policy = FilePolicy.load(config)
+    if os.getenv("MAX_FILE_SIZE_KB"):
+        policy.max_file_size = int(os.getenv("MAX_FILE_SIZE_KB")) * 1024 or None
+    return policy
+
 
+def build_orchestrator(platform: str) -> DocumentationOrchestrator:
+    """An orchestrator for ``platform`` configured from the environment"""
+    repo_url, token, _, _ = connection(platform)
+    return DocumentationOrchestrator(
+        url=repo_url,
+        token=token,
+        platform=platform,
+        fetch_mode=os.getenv("FETCH_MODE", "archive"),
+        fetch_workers=int(os.getenv("FETCH_WORKERS", "8")),
+        cache_dir=os.getenv("DOC_AGENT_CACHE_DIR"),
+        blob_cache_max_mb=int(os.getenv("BLOB_CACHE_MAX_MB", "1024")),
+        incremental=os.getenv("INCREMENTAL_ANALYSIS", "1") != "0",
+        analysis_cache_max_mb=int(os.getenv("ANALYSIS_CACHE_MAX_MB", "256")),
+        max_workers=int(os.getenv("AGENT_WORKERS", "4")),
+        review_backend=os.getenv("REVIEW_BACKEND", "inprocess"),
+        parse_workers=int(os.getenv("PARSE_WORKERS", "0")) or None,
+        diagram_depth=int(os.getenv("DIAGRAM_DEPTH", "2")),
+        diagram_max_nodes=int(os.getenv("DIAGRAM_MAX_NODES", "40")),
+        max_diagrams=int(os.getenv("MAX_DIAGRAMS", "6")),
+        prerender_diagrams=os.getenv("PRERENDER_DIAGRAMS", "1") != "0",
+        streaming=os.getenv("STREAM_FILES", "0") == "1",
+        file_policy=file_policy(),
+    )
+
+
+def document(orchestrator: DocumentationOrchestrator, repo_project_path: str,
+             output_dir: str = "docs", namespace: str = "", ref: str | None = None) -> dict:
+    """Document one repository with an existing orchestrator and return the result dict"""
+    started_at = datetime.utcnow().isoformat()
     repo_project_full_path = f"{namespace}/{repo_project_path}" if namespace else repo_project_path
     #repo_project_full_path = f"{namespace}/{repo_project_path}" 
-    print(f"\n🔗 Connecting to: {repo_url} ({platform_label})")
     print(f"📦 Analyzing project: {repo_project_full_path}\n")
 
     output_dir = Path(output_dir).resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    orchestrator = DocumentationOrchestrator(
-        url=repo_url,
-        token=token,
-        platform=platform,
-    )
-    
-    html_docs, md_docs, security_issues, test_coverage, review_result = orchestrator.run(repo_project_full_path)
     outputfilename = Path(repo_project_path).name
     html_path = output_dir / f"{outputfilename}.html"
     md_path = output_dir / f"{outputfilename}.md"
     pdf_path = output_dir / f"{outputfilename}.pdf"
-    orchestrator.save_as_pdf(html_docs, pdf_path)
-
-    html_path.write_text(html_docs, encoding="utf-8")
-    md_path.write_text(md_docs, encoding="utf-8")
+    # The reports are streamed straight to disk, and the PDF printed from the HTML file
+    _, _, security_issues, test_coverage, review_result = orchestrator.run(
+        repo_project_full_path, ref, html_path=html_path, md_path=md_path,
+    )
+    profiler = orchestrator.profiler
+    with profiler.stage("pdf"):
+        orchestrator.save_as_pdf(html_path, pdf_path)
+
+    files_written = [str(html_path), str(md_path)]
+    # Every issue, streamed; the returned result carries the same under "review results"
+    review_path = output_dir / f"{outputfilename}.review.json"
+    with review_path.open("w", encoding="utf-8") as f:
+        review_result.write_json(f)
+    files_written.append(str(review_path))
+
+    # PROFILE_TRACE=chrome (chrome://tracing, Perfetto) or jsonl also writes the spans
+    trace = os.getenv("PROFILE_TRACE")
+    if trace:
+        suffix = ".trace.jsonl" if trace == "jsonl" else ".trace.json"
+        files_written.append(str(profiler.write_trace(output_dir / f"{outputfilename}{suffix}")))
 
     finished_at = datetime.utcnow().isoformat()
     
@@ -80,19 +135,30 @@ def run(repo_project_path: str, output_dir: str = "docs") -> dict:
         "agent": "docs-agent",
         "status": "success",
         "repo": repo_project_path,
+        "ref": ref,
         "output_dir": str(output_dir),
-        "files_written": [
-            str(html_path),
-            str(md_path),
-        ],
+        "files_written": files_written,
         "Security issues":security_issues,
+        "Fetch errors": [asdict(e) for e in orchestrator.fetcher.errors],
+        "Skipped files": [asdict(e) for e in orchestrator.fetcher.skipped],
+        "Blob cache": orchestrator.blob_cache.stats() if orchestrator.blob_cache else {},
+        "Analysis cache": orchestrator.analysis_cache.stats() if orchestrator.analysis_cache else {},
         "Test Coverage":asdict(test_coverage) if is_dataclass(test_coverage) else {},
-        "review results":asdict(review_result) if is_dataclass(test_coverage) else {},
+        "review results":review_result.to_dict() if review_result else {},
+        "profile": profiler.report(),
         "started_at": started_at,
         "finished_at": finished_at,
     }
 
 
+def run(repo_project_path: str, output_dir: str = "docs") -> dict:
+    platform = detect_platform(repo_project_path)
+    repo_url, _, namespace, platform_label = connection(platform)
+    print(f"\n🔗 Connecting to: {repo_url} ({platform_label})")
+    orchestrator = build_orchestrator(platform)
+    return document(orchestrator, repo_project_path, output_dir, namespace)
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: run.py <gitlab-namespace/project>", file=sys.stderr)
@@ -1,5 +1,8 @@
+import json
+from array import array
 from dataclasses import dataclass, asdict, field
-from typing import Dict, List, Any
+from enum import IntEnum
+from typing import Dict, List, Any, Iterable, Iterator, TextIO
 # ==============================================================================
 # DATA MODELS
 # ============================================================================
@@ -21,6 +24,23 @@ class PythonMetadata:
     docstrings: Dict[str, List[Dict[str, str]]] = field(default_factory=dict)
     readme_raw: List [str| None] = None
     readme_html:list[str|None]= None
+    modules: Dict[str, "ModuleRecord"] = field(default_factory=dict)
+
+
+@dataclass
+class ModuleRecord:
+    """Everything extracted from one Python file in a single AST pass.
+
+    Plain lists and dicts only, so a record can be cached as JSON and sent
+    between processes.
+    """
+    path: str
+    docstrings: List[Dict[str, Any]] = field(default_factory=list)
+    classes: List[Dict[str, Any]] = field(default_factory=list)
+    functions: List[Dict[str, Any]] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+    commands: List[Dict[str, Any]] = field(default_factory=list)
+    error: str | None = None    # set when the file could not be parsed
 
 
 @dataclass
@@ -49,13 +69,14 @@ class Documentation:
     docker: DockerMetadata
     cicd: CICDMetadata
     mermaid: str
+    diagrams: List[Dict[str, str]] = field(default_factory=list)   # title + Mermaid source
     
 @dataclass
 class TestCoverage:
     test_coverage:list[dict]
     summary_coverage: str
 
-@dataclass
+@dataclass(slots=True)
 class CodeIssue:
     """Single code quality/security issue."""
     severity: str       # "critical" | "high" | "medium" | "low"
@@ -68,31 +89,286 @@ class CodeIssue:
     tool: str           # "ruff" | "bandit" | "radon"
 
 
+@dataclass
+class ToolReport:
+    """How much of a review tool's work completed."""
+    tool: str
+    shards: int = 0
+    completed: int = 0
+    timed_out: int = 0
+    failed: int = 0
+    errors: list[str] = field(default_factory=list)
+    # Wall time until the tool's last shard finished
+    seconds: float = 0.0
+
+
+class Severity(IntEnum):
+    """Issue severity, most severe first"""
+    CRITICAL = 0
+    HIGH = 1
+    MEDIUM = 2
+    LOW = 3
+
+    @classmethod
+    def parse(cls, name: str) -> "Severity":
+        # Anything unrecognised counts as low, as the review always has
+        return cls.__members__.get(name.upper(), cls.LOW) if name else cls.LOW
+
+
+class Category(IntEnum):
+    SECURITY = 0
+    QUALITY = 1
+    COMPLEXITY = 2
+    STYLE = 3
+
+    @classmethod
+    def parse(cls, name: str) -> "Category":
+        return cls.__members__.get(name.upper(), cls.QUALITY) if name else cls.QUALITY
+
+
+SEVERITIES = tuple(s.name.lower() for s in Severity)
+CATEGORIES = tuple(c.name.lower() for c in Category)
+NO_POSITION = -1    # line/column a tool did not report
+
+
+class Interned:
+    """Each distinct string stored once, referred to by its index"""
+    __slots__ = ("values", "index")
+
+    def __init__(self):
+        self.values: list[str] = []
+        self.index: dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class IssueStore:
+    """Code issues kept column by column.
+
+    Severity and category are small integers (``Severity``, ``Category``),
+    file paths, rule codes, messages and tool names are interned, and
+    positions live in typed arrays, so an issue costs a few dozen bytes
+    instead of a dataclass instance. Row indexes per severity, category and
+    file are kept up to date as issues are added, which makes counts free
+    and grouping a lookup. ``CodeIssue`` objects are only built on request.
+    """
+    __slots__ = ("severity", "category", "file", "line", "column", "code", "message", "tool",
+                 "files", "codes", "messages", "tools", "by_severity", "by_category", "by_file")
+
+    def __init__(self, issues: Iterable[CodeIssue] = ()):
+        self.severity = array("B")
+        self.category = array("B")
+        self.file = array("I")
+        self.line = array("l")
+        self.column = array("l")
+        self.code = array("I")
+        self.message = array("I")
+        self.tool = array("I")
+        self.files, self.codes, self.messages, self.tools = Interned(), Interned(), Interned(), Interned()
+        self.by_severity = [array("I") for _ in Severity]
+        self.by_category = [array("I") for _ in Category]
+        self.by_file: list[array] = []
+        self.extend(issues)
+
+    def add(self, severity: str, category: str, file: str, line: int | None, column: int | None,
+            code: str, message: str, tool: str) -> None:
+        """Add one issue from its fields, without building a ``CodeIssue``"""
+        row = len(self.severity)
+        sev, cat = Severity.parse(severity), Category.parse(category)
+        file_id = self.files.add(file)
+        if file_id == len(self.by_file):
+            self.by_file.append(array("I"))
+        self.severity.append(sev)
+        self.category.append(cat)
+        self.file.append(file_id)
+        self.line.append(NO_POSITION if line is None else line)
+        self.column.append(NO_POSITION if column is None else column)
+        self.code.append(self.codes.add(code))
+        self.message.append(self.messages.add(message))
+        self.tool.append(self.tools.add(tool))
+        self.by_severity[sev].append(row)
+        self.by_category[cat].append(row)
+        self.by_file[file_id].append(row)
+
+    def append(self, issue: CodeIssue) -> None:
+        self.add(issue.severity, issue.category, issue.file, issue.line, issue.column,
+                 issue.code, issue.message, issue.tool)
+
+    def extend(self, issues: Iterable[CodeIssue]) -> None:
+        for issue in issues:
+            self.append(issue)
+
+    def __len__(self) -> int:
+        return len(self.severity)
+
+    def __getitem__(self, row: int) -> CodeIssue:
+        line, column = self.line[row], self.column[row]
+        return CodeIssue(
+            severity=SEVERITIES[self.severity[row]],
+            category=CATEGORIES[self.category[row]],
+            file=self.files.values[self.file[row]],
+            line=None if line == NO_POSITION else line,
+            column=None if column == NO_POSITION else column,
+            code=self.codes.values[self.code[row]],
+            message=self.messages.values[self.message[row]],
+            tool=self.tools.values[self.tool[row]],
+        )
+
+    def __iter__(self) -> Iterator[CodeIssue]:
+        return map(self.__getitem__, range(len(self)))
+
+    def ranked(self) -> Iterator[int]:
+        """Row indexes, most severe first"""
+        for rows in self.by_severity:
+            yield from rows
+
+    def select(self, rows: Iterable[int]) -> list[CodeIssue]:
+        return [self[row] for row in rows]
+
+    def severity_counts(self) -> dict[str, int]:
+        return {name: len(rows) for name, rows in zip(SEVERITIES, self.by_severity)}
+
+    def category_counts(self) -> dict[str, int]:
+        return {name: len(rows) for name, rows in zip(CATEGORIES, self.by_category)}
+
+    def file_counts(self) -> dict[str, int]:
+        return {path: len(rows) for path, rows in zip(self.files.values, self.by_file)}
+
+    def dicts(self, rows: Iterable[int]) -> list[dict]:
+        """Issues as plain dicts, the shape ``asdict(CodeIssue)`` gives"""
+        files, codes, messages, tools = self.files.values, self.codes.values, self.messages.values, self.tools.values
+        out = []
+        for row in rows:
+            line, column = self.line[row], self.column[row]
+            out.append({
+                "severity": SEVERITIES[self.severity[row]],
+                "category": CATEGORIES[self.category[row]],
+                "file": files[self.file[row]],
+                "line": None if line == NO_POSITION else line,
+                "column": None if column == NO_POSITION else column,
+                "code": codes[self.code[row]],
+                "message": messages[self.message[row]],
+                "tool": tools[self.tool[row]],
+            })
+        return out
+
+    def iter_json(self, rows: Iterable[int], chunk: int = 1000) -> Iterator[str]:
+        """A JSON array of the given issues, a few hundred kilobytes at a time.
+
+        Every distinct string is encoded once up front; each issue is then
+        only a format of already encoded pieces.
+        """
+        severities = [json.dumps(name) for name in SEVERITIES]
+        categories = [json.dumps(name) for name in CATEGORIES]
+        files, codes, messages, tools = (
+            [json.dumps(value, ensure_ascii=False) for value in table.values]
+            for table in (self.files, self.codes, self.messages, self.tools)
+        )
+        yield "["
+        separator, batch = "", []
+        for row in rows:
+            line, column = self.line[row], self.column[row]
+            batch.append(
+                f'{{"severity": {severities[self.severity[row]]}, "category": {categories[self.category[row]]}, '
+                f'"file": {files[self.file[row]]}, "line": {"null" if line == NO_POSITION else line}, '
+                f'"column": {"null" if column == NO_POSITION else column}, "code": {codes[self.code[row]]}, '
+                f'"message": {messages[self.message[row]]}, "tool": {tools[self.tool[row]]}}}'
+            )
+            if len(batch) == chunk:
+                yield separator + ", ".join(batch)
+                separator, batch = ", ", []
+        if batch:
+            yield separator + ", ".join(batch)
+        yield "]"
+
+
 @dataclass
 class CodeReviewResult:
-    """Complete code review output."""
-    total_issues: int
-    critical: list[CodeIssue] = field(default_factory=list)
-    high: list[CodeIssue] = field(default_factory=list)
-    medium: list[CodeIssue] = field(default_factory=list)
-    low: list[CodeIssue] = field(default_factory=list)
+    """Complete code review output.
+
+    The issues live in an ``IssueStore``; ``critical``, ``high``, ``medium``,
+    ``low`` and ``by_category()`` build ``CodeIssue`` lists from it on demand.
+    Use ``to_dict`` or ``write_json`` rather than ``asdict`` to serialise.
+    """
+    issues: IssueStore = field(default_factory=IssueStore)
     metrics: dict[str, Any] = field(default_factory=dict)
 
+    @property
+    def total_issues(self) -> int:
+        return len(self.issues)
+
+    @property
+    def critical(self) -> list[CodeIssue]:
+        return self.issues.select(self.issues.by_severity[Severity.CRITICAL])
+
+    @property
+    def high(self) -> list[CodeIssue]:
+        return self.issues.select(self.issues.by_severity[Severity.HIGH])
+
+    @property
+    def medium(self) -> list[CodeIssue]:
+        return self.issues.select(self.issues.by_severity[Severity.MEDIUM])
+
+    @property
+    def low(self) -> list[CodeIssue]:
+        return self.issues.select(self.issues.by_severity[Severity.LOW])
+
     def by_severity(self) -> dict[str, list[CodeIssue]]:
-        return {
-            "critical": self.critical,
-            "high":     self.high,
-            "medium":   self.medium,
-            "low":      self.low,
-        }
+        return {name: self.issues.select(rows) for name, rows in zip(SEVERITIES, self.issues.by_severity)}
 
     def by_category(self) -> dict[str, list[CodeIssue]]:
         """Group issues by category (security, quality, complexity, style)."""
-        cats: dict[str, list[CodeIssue]] = {
-            "security": [], "quality": [], "complexity": [], "style": []
+        # Most severe first within each category, as the severity lists are
+        ranked = self.issues.severity.__getitem__
+        return {name: self.issues.select(sorted(rows, key=ranked))
+                for name, rows in zip(CATEGORIES, self.issues.by_category)}
+
+    def to_dict(self) -> dict:
+        """The same shape ``asdict`` gave when the issues were lists of dataclasses"""
+        return {
+            "total_issues": self.total_issues,
+            **{name: self.issues.dicts(rows) for name, rows in zip(SEVERITIES, self.issues.by_severity)},
+            "metrics": self.metrics,
         }
-        for issues in [self.critical, self.high, self.medium, self.low]:
-            for issue in issues:
-                cats[issue.category].append(issue)
-        return cats
 
+    def write_json(self, fp: TextIO) -> None:
+        """Write ``to_dict()`` as JSON without building it"""
+        fp.write(f'{{"total_issues": {self.total_issues}')
+        for name, rows in zip(SEVERITIES, self.issues.by_severity):
+            fp.write(f', "{name}": ')
+            fp.writelines(self.issues.iter_json(rows))
+        fp.write(f', "metrics": {json.dumps(self.metrics, ensure_ascii=False)}}}')
+
+
+@dataclass
+class FetchError:
+    """A file that could not be fetched from the repository."""
+    path: str
+    error: str
+    status: int | None = None
+    attempts: int = 1
+
+
+@dataclass
+class TreeEntry:
+    """A blob in the repository tree listing."""
+    path: str
+    sha: str
+    size: int | None    # GitLab's tree API does not report sizes
+    mode: str
+
+
+@dataclass
+class ToolInfo:
+    """An external analysis tool as found on this machine."""
+    name: str
+    path: str | None        # None when only the Python module is importable
+    version: str
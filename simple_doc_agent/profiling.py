@@ -0,0 +1,163 @@
+"""Run profile: per-stage timings, fetch and tool counters, cache rates and traces"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage
+    resource = None
+
+# Spans kept for the trace file; counters keep counting past it
+MAX_TRACE_EVENTS = 100_000
+# Counter categories always present in the report, even when empty
+CATEGORIES = ("fetch", "tools")
+
+
+def max_rss_mb() -> float | None:
+    """The process's peak resident set size so far, in MB"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Span:
+    """One timed call; the caller fills in ``bytes`` when it knows them"""
+
+    def __init__(self):
+        self.bytes = 0
+
+
+class Profiler:
+    """
+    Where one run's time goes.
+
+    ``stage`` times a block: wall time, CPU time of the thread running it
+    and the process's peak RSS. Stages run side by side on threads, so
+    ``peak_rss_mb`` is the process high-water mark when the stage finished
+    and ``rss_growth_mb`` how far it rose meanwhile, which may be partly a
+    concurrent stage's doing; work handed to process pools shows in wall
+    time only.
+
+    ``call`` and ``record`` add to per-name counters (calls, bytes, seconds)
+    in a category such as ``fetch`` or ``tools``. Seconds are summed over
+    calls, so concurrent calls can add up to more than the wall time.
+
+    ``cache`` counts hits and misses for this run only: caches are shared
+    between concurrent runs, so each lookup reports to the profiler of the
+    run that made it rather than the run diffing global counters.
+
+    Every span is also kept as an event for ``write_trace``.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, dict] = {}
+        self.counters: Dict[str, Dict[str, dict]] = {category: {} for category in CATEGORIES}
+        self.caches: Dict[str, dict] = {}
+        self.events: list = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        cpu = time.thread_time()
+        rss = max_rss_mb()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            peak = max_rss_mb()
+            record = {
+                "wall_s": round(wall, 3),
+                "cpu_s": round(time.thread_time() - cpu, 3),
+                "peak_rss_mb": peak,
+                "rss_growth_mb": round(peak - rss, 1) if peak is not None else None,
+            }
+            with self._lock:
+                self.stages[name] = record
+            self._event(name, "stage", start, wall, record)
+
+    @contextmanager
+    def call(self, category: str, name: str) -> Iterator[Span]:
+        """Time one call, counted whether or not it raises"""
+        span = Span()
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            self.record(category, name, time.perf_counter() - start, span.bytes)
+
+    def record(self, category: str, name: str, seconds: float, nbytes: int = 0, calls: int = 1) -> None:
+        """Count a call that has already finished, ``seconds`` ago at the latest"""
+        with self._lock:
+            counter = self.counters.setdefault(category, {}).setdefault(
+                name, {"calls": 0, "bytes": 0, "seconds": 0.0}
+            )
+            counter["calls"] += calls
+            counter["bytes"] += nbytes
+            counter["seconds"] += seconds
+        self._event(name, category, time.perf_counter() - seconds, seconds, {"bytes": nbytes} if nbytes else {})
+
+    def cache(self, name: str, hits: int = 0, misses: int = 0) -> None:
+        """Count lookups in the cache called ``name``"""
+        with self._lock:
+            counter = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            counter["hits"] += hits
+            counter["misses"] += misses
+
+    def _event(self, name: str, category: str, start: float, seconds: float, args: dict) -> None:
+        event = {
+            "name": name, "cat": category, "ph": "X",
+            "ts": round((start - self._origin) * 1e6), "dur": round(seconds * 1e6),
+            "pid": 1, "tid": threading.get_ident(), "args": args,
+        }
+        with self._lock:
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append(event)
+
+    def report(self) -> dict:
+        """The profile as plain data, for the result JSON"""
+        with self._lock:
+            return {
+                "wall_s": round(time.perf_counter() - self._origin, 3),
+                "peak_rss_mb": max_rss_mb(),
+                "stages": dict(self.stages),
+                **{
+                    category: {
+                        name: {**counter, "seconds": round(counter["seconds"], 3)}
+                        for name, counter in sorted(counters.items())
+                    }
+                    for category, counters in self.counters.items()
+                },
+                "caches": {
+                    name: {
+                        **counter,
+                        "hit_rate": round(counter["hits"] / lookups, 3)
+                        if (lookups := counter["hits"] + counter["misses"]) else None,
+                    }
+                    for name, counter in sorted(self.caches.items())
+                },
+            }
+
+    def write_trace(self, path: str | Path) -> Path:
+        """
+        Write the spans to ``path``: JSON lines if it ends in ``.jsonl``,
+        otherwise a Chrome trace (open in chrome://tracing or Perfetto).
+        """
+        path = Path(path)
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        with path.open("w", encoding="utf-8") as f:
+            if path.suffix == ".jsonl":
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+            else:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Documentation service: a long-running HTTP daemon around warm orchestrators.
+
+Every CLI run pays for new API clients, caches, the Jinja environment and a
+Chromium launch. The service pays once and then documents repositories on
+request:
+
+    POST /jobs                        {"repo": "group/project", "ref": "v1.2"}
+    GET  /jobs                        recent jobs, newest first
+    GET  /jobs/<id>[?wait=SECONDS]    one job, with its result once finished
+    GET  /jobs/<id>/artifacts/<name>  a generated file (.html, .md, .pdf, result.json)
+    GET  /health                      queue depth, workers and cache stats
+
+Jobs wait in a bounded queue (503 with Retry-After when it is full) and a
+job for the same repository and ref as one still queued or running is
+answered with that job instead of a new one. Forge settings come from the
+same environment variables as ``doc_agent_tool``, so pointing GITLAB_URL at
+a stub server runs everything locally.
+
+Only forge repositories are accepted by default. A local path or plain git
+URL would let any client read directories on this host or make it clone
+anything, so those are refused with a 400 unless they fall under one of the
+``--allow-local`` prefixes (or DOCS_SERVICE_ALLOW_LOCAL, separated like PATH).
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import queue
+import shutil
+import signal
+import sys
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+from agents_orchestrator import DocumentationOrchestrator
+from all_agents.browser_pool import get_browser_pool
+from all_agents.repository_analyser import forge_host
+from doc_agent_tool import build_orchestrator, connection, detect_platform, document
+
+load_dotenv()
+
+# Finished jobs (and their artifacts) beyond this many are forgotten, oldest first
+MAX_FINISHED_JOBS = 1000
+# Longest a client may block on GET /jobs/<id>?wait=
+MAX_WAIT_SECONDS = 600
+
+_STOP = object()
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity"""
+
+
+class RepoNotAllowed(Exception):
+    """The repository is local and not under an allowed prefix"""
+
+
+def allowed_local_prefixes() -> List[str]:
+    """Local repository prefixes allowed by DOCS_SERVICE_ALLOW_LOCAL"""
+    return [p for p in os.getenv("DOCS_SERVICE_ALLOW_LOCAL", "").split(os.pathsep) if p]
+
+
+class Job:
+    """One documentation request and, once it has run, its outcome"""
+
+    def __init__(self, repo: str, ref: str | None, platform: str, namespace: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.repo = repo
+        self.ref = ref
+        self.platform = platform
+        self.namespace = namespace
+        self.status = "queued"
+        self.submitted_at = datetime.utcnow().isoformat()
+        self.started_at: str | None = None
+        self.finished_at: str | None = None
+        self.error: str | None = None
+        self.result: dict | None = None
+        self.artifacts: List[str] = []
+        self.done = threading.Event()
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        """Identical requests share this key while the job is in flight"""
+        full_path = f"{self.namespace}/{self.repo}" if self.namespace else self.repo
+        return self.platform, full_path, self.ref or ""
+
+    def to_dict(self, result: bool = False) -> dict:
+        data = {
+            "id": self.id,
+            "repo": self.repo,
+            "ref": self.ref,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "artifacts": [f"/jobs/{self.id}/artifacts/{name}" for name in self.artifacts],
+        }
+        if result:
+            data["result"] = self.result
+        return data
+
+
+class DocumentationService:
+    """
+    Runs documentation jobs on ``workers`` threads with warm components.
+
+    As in batch mode, one orchestrator is built per platform and each job
+    runs on a ``fork`` of it, with at most ``per_host`` jobs talking to one
+    forge host at a time. Artifacts are written to ``<output_dir>/<job id>/``.
+    Local repositories are refused unless they are under one of
+    ``allow_local`` (directories, or URL prefixes such as ``git@host:group/``).
+    """
+
+    def __init__(self, output_dir: str | Path = "docs", workers: int = 2, max_queue: int = 100,
+                 per_host: int = 2, max_finished_jobs: int = MAX_FINISHED_JOBS,
+                 allow_local: List[str] | None = None):
+        self.output_dir = Path(output_dir).resolve()
+        self.allow_local = list(allow_local) if allow_local is not None else allowed_local_prefixes()
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.max_finished_jobs = max_finished_jobs
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._jobs: Dict[str, Job] = {}          # insertion (submission) order
+        self._in_flight: Dict[Tuple[str, str, str], Job] = {}
+        self._bases: Dict[str, DocumentationOrchestrator] = {}
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def orchestrator(self, platform: str) -> DocumentationOrchestrator:
+        """The shared orchestrator for ``platform``, built on first use"""
+        with self._build_lock:
+            if platform not in self._bases:
+                base = build_orchestrator(platform)
+                if platform != "local":
+                    # Keyed by host, so platforms configured against one forge share its limit
+                    host = forge_host(base.fetcher.url)
+                    if host not in self._host_slots:
+                        self._host_slots[host] = threading.Semaphore(self.per_host)
+                    base.fetcher.host_slots = self._host_slots[host]
+                self._bases[platform] = base
+            return self._bases[platform]
+
+    def warm(self, platforms: List[str]) -> None:
+        """Build the orchestrators and launch a browser before the first job arrives"""
+        for platform in platforms:
+            self.orchestrator(platform)
+        try:
+            get_browser_pool().run(lambda page: None)
+        except Exception as e:
+            print(f"⚠ Could not start a browser: {e}")
+
+    def start(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"docs-{i}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self) -> None:
+        """Finish the queued jobs, then stop the workers"""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, repo: str, ref: str | None = None) -> Tuple[Job, bool]:
+        """
+        Queue a job, or return the in-flight job for the same repo and ref.
+
+        Returns ``(job, created)``. Raises QueueFull when the queue is at
+        capacity, RepoNotAllowed for a local repository outside
+        ``allow_local`` and RuntimeError when the forge isn't configured.
+        """
+        platform = detect_platform(repo)
+        if platform == "local" and not self.local_allowed(repo):
+            raise RepoNotAllowed(f"{repo} is not a forge repository; local repositories are not enabled")
+        _, _, namespace, _ = connection(platform)
+        job = Job(repo, ref or None, platform, namespace)
+        with self._lock:
+            existing = self._in_flight.get(job.key)
+            if existing is not None:
+                return existing, False
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f"{self._queue.maxsize} job(s) already queued") from None
+            self._in_flight[job.key] = job
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        return job, True
+
+    def local_allowed(self, repo: str) -> bool:
+        """Whether a local path or git URL is under one of ``allow_local``"""
+        path = Path(repo).expanduser()
+        if path.exists():
+            # Compare resolved paths so symlinks and .. cannot step outside a prefix
+            return any(path.resolve().is_relative_to(Path(prefix).expanduser().resolve())
+                       for prefix in self.allow_local)
+        return ".." not in repo.split("/") and any(repo.startswith(prefix) for prefix in self.allow_local)
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def artifact(self, job: Job, name: str) -> Path | None:
+        """Path of one of the job's artifacts; only names the job produced are served"""
+        return self.output_dir / job.id / name if name in job.artifacts else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            bases = dict(self._bases)
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "succeeded": statuses.count("succeeded"),
+            "failed": statuses.count("failed"),
+            "queue_capacity": self._queue.maxsize,
+            "Blob cache": {
+                platform: base.blob_cache.stats() for platform, base in bases.items() if base.blob_cache
+            },
+            "Analysis cache": {
+                platform: base.analysis_cache.stats() for platform, base in bases.items() if base.analysis_cache
+            },
+        }
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job for job in self._jobs.values() if job.done.is_set()]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.id]
+            shutil.rmtree(self.output_dir / job.id, ignore_errors=True)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            job.status = "running"
+            job.started_at = datetime.utcnow().isoformat()
+            job_dir = self.output_dir / job.id
+            try:
+                orchestrator = self.orchestrator(job.platform).fork()
+                job.result = document(orchestrator, job.repo, job_dir, job.namespace, job.ref)
+                (job_dir / "result.json").write_text(
+                    json.dumps(job.result, indent=2, default=str), encoding="utf-8"
+                )
+                job.status = "succeeded"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+                print(f"✗ Job {job.id} ({job.repo}) failed: {e}")
+            job.artifacts = sorted(p.name for p in job_dir.iterdir() if p.is_file()) if job_dir.exists() else []
+            job.finished_at = datetime.utcnow().isoformat()
+            with self._lock:
+                self._in_flight.pop(job.key, None)
+            job.done.set()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """JSON API over a DocumentationService (``self.server.service``)"""
+
+    server_version = "docs-agent"
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}")
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json",
+              headers: Dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, data, headers: Dict[str, str] | None = None) -> None:
+        self._send(status, json.dumps(data, indent=2, default=str).encode("utf-8"), headers=headers)
+
+    def do_POST(self):
+        service: DocumentationService = self.server.service
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self._json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            repo = body["repo"]
+            ref = body.get("ref")
+        except (ValueError, KeyError, TypeError):
+            return self._json(400, {"error": 'expected a JSON body like {"repo": "...", "ref": "..."}'})
+        try:
+            job, created = service.submit(repo, ref)
+        except QueueFull as e:
+            return self._json(503, {"error": str(e)}, headers={"Retry-After": "30"})
+        except (RepoNotAllowed, RuntimeError) as e:
+            return self._json(400, {"error": str(e)})
+        data = {**job.to_dict(), "deduplicated": not created}
+        self._json(202, data, headers={"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        service: DocumentationService = self.server.service
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            return self._json(200, service.stats())
+        if parts == ["jobs"]:
+            return self._json(200, [job.to_dict() for job in service.jobs()])
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._json(404, {"error": "not found"})
+        job = service.get(parts[1])
+        if job is None:
+            return self._json(404, {"error": f"no job {parts[1]}"})
+
+        if len(parts) == 2:
+            try:
+                wait = min(float(parse_qs(url.query).get("wait", ["0"])[0]), MAX_WAIT_SECONDS)
+            except ValueError:
+                return self._json(400, {"error": "wait must be a number of seconds"})
+            if wait > 0:
+                job.done.wait(wait)
+            return self._json(200, job.to_dict(result=True))
+        if len(parts) == 4 and parts[2] == "artifacts":
+            path = service.artifact(job, parts[3])
+            if path is None or not path.is_file():
+                return self._json(404, {"error": f"job {job.id} has no artifact {parts[3]}"})
+            content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            return self._send(200, path.read_bytes(), content_type)
+        self._json(404, {"error": "not found"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve documentation jobs over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-o", "--output-dir", default="docs")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="jobs run at once")
+    parser.add_argument("--queue-size", type=int, default=100, help="jobs waiting before 503s")
+    parser.add_argument("--per-host", type=int, default=2, help="repositories talking to one forge host at a time")
+    parser.add_argument("--browsers", type=int, default=2, help="headless browsers for PDFs and diagrams")
+    parser.add_argument("--warm", nargs="*", default=[], metavar="PLATFORM",
+                        help="platforms (gitlab, github, local) to set up before serving")
+    parser.add_argument("--allow-local", nargs="*", default=None, metavar="PREFIX",
+                        help="directories or git URL prefixes local jobs may use (default: none, "
+                             "or DOCS_SERVICE_ALLOW_LOCAL)")
+    args = parser.parse_args()
+
+    # The first caller sizes the process-wide pool every orchestrator uses
+    get_browser_pool(args.browsers)
+    service = DocumentationService(args.output_dir, workers=args.workers,
+                                   max_queue=args.queue_size, per_host=args.per_host,
+                                   allow_local=args.allow_local)
+    if args.warm:
+        service.warm(args.warm)
+    service.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"🚀 Serving documentation jobs on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("Finishing queued jobs...")
+        service.stop()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The package uses flat imports from simple_doc_agent/ (``from models import ...``)
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "simple_doc_agent"), str(ROOT)]
@@ -0,0 +1,22 @@
+import os
+
+from all_agents.analysis_cache import AnalysisCache
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = AnalysisCache(tmp_path, max_bytes=3200)
+    value = {"text": "x" * 900}
+    for i in range(3):
+        cache.put("modules", "1", f"m{i}.py", str(i), value)
+    # Age the entries, then read m0 so m1 becomes the least recently used
+    for i, mtime in enumerate((1000, 2000, 3000)):
+        os.utime(cache._path_for("modules", cache.key("modules", "1", f"m{i}.py", str(i))), (mtime, mtime))
+    assert cache.get("modules", "1", "m0.py", "0") == value
+
+    cache.put("modules", "1", "m3.py", "3", value)
+    assert cache.get("modules", "1", "m1.py", "1") is None
+    for i in (0, 2, 3):
+        assert cache.get("modules", "1", f"m{i}.py", str(i)) == value
+    assert cache._size <= 3200
+    # A fresh instance finds the same size on disk
+    assert AnalysisCache(tmp_path, max_bytes=3200)._size == cache._size
@@ -0,0 +1,18 @@
+import os
+
+from all_agents.blob_cache import BlobCache, git_blob_sha
+
+
+def test_blob_evicted_during_get_is_a_miss(tmp_path, monkeypatch):
+    cache = BlobCache(tmp_path)
+    sha = git_blob_sha(b"data")
+    cache.put(sha, b"data")
+
+    def evicted(path, *args, **kwargs):
+        # Another worker's eviction lands between the read and the mtime bump
+        os.unlink(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get(sha) is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 1
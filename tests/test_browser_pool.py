@@ -0,0 +1,55 @@
+import sys
+import types
+
+import pytest
+
+from all_agents.browser_pool import BrowserPool
+
+
+class FakeBrowser:
+    def __init__(self, broken_contexts):
+        self.broken_contexts = broken_contexts
+        self.closed = 0
+
+    def new_context(self):
+        browser = self
+
+        class Context:
+            def new_page(self):
+                return browser
+
+            def close(self):
+                if browser.broken_contexts:
+                    raise RuntimeError("Target closed")
+
+        return Context()
+
+    def close(self):
+        self.closed += 1
+        if self.broken_contexts:
+            raise RuntimeError("Browser has been closed")
+
+
+@pytest.fixture
+def browsers(monkeypatch):
+    """Stand-in for sync_playwright whose first browser breaks on context close"""
+    launched = []
+
+    def launch():
+        launched.append(FakeBrowser(broken_contexts=not launched))
+        return launched[-1]
+
+    playwright = types.SimpleNamespace(chromium=types.SimpleNamespace(launch=launch), stop=lambda: None)
+    module = types.SimpleNamespace(sync_playwright=lambda: types.SimpleNamespace(start=lambda: playwright))
+    monkeypatch.setitem(sys.modules, "playwright.sync_api", module)
+    return launched
+
+
+def test_broken_browser_is_closed_and_replaced(browsers):
+    with BrowserPool(size=1, renders_per_page=1) as pool:
+        first = pool.run(lambda page: page)
+        second = pool.run(lambda page: page)
+    assert browsers == [first, second]
+    # The browser whose context failed to close was closed, not just dropped
+    assert first.closed == 1
+    assert second.closed == 1
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import pytest
+
+from all_agents.document_generator import DocumentationGenerator
+from all_agents.mermaid_renderer import BUNDLED_MERMAID_JS, MERMAID_VERSION, inline_script
+from models import Documentation, TestCoverage
+
+TEMPLATES = Path(__file__).resolve().parent.parent / "simple_doc_agent" / "templates"
+
+
+def context(tmp_path, diagrams):
+    generator = DocumentationGenerator(str(TEMPLATES), cache_dir=str(tmp_path))
+    metadata = Documentation(python=None, docker=[], cicd=None, mermaid="", diagrams=diagrams)
+    return generator.context(metadata, [], TestCoverage(test_coverage=[], summary_coverage="0%"), {})
+
+
+def test_bundled_mermaid_build_is_the_pinned_version():
+    assert f'"{MERMAID_VERSION}"' in BUNDLED_MERMAID_JS.read_text(encoding="utf-8")
+
+
+def test_unrendered_diagrams_embed_the_local_mermaid(tmp_path, monkeypatch):
+    monkeypatch.delenv("MERMAID_JS", raising=False)
+    ctx = context(tmp_path, [{"title": "t", "source": "graph TD; a-->b"}])
+    assert ctx["client_mermaid"]
+    assert ctx["mermaid_js"] == inline_script(BUNDLED_MERMAID_JS.read_text(encoding="utf-8"))
+    assert ctx["mermaid_version"] == MERMAID_VERSION
+
+
+def test_prerendered_diagrams_load_no_mermaid(tmp_path):
+    ctx = context(tmp_path, [{"title": "t", "source": "graph TD; a-->b", "svg": "<svg/>"}])
+    assert not ctx["client_mermaid"] and ctx["mermaid_js"] is None
+
+
+@pytest.mark.parametrize("source, embedded", [
+    ('s = "</script>"', 's = "<\\/script>"'),
+    ('s = "</SCRIPT>"', 's = "<\\/SCRIPT>"'),
+    ('s = "<!-- x -->"', 's = "\\x3C!-- x -->"'),
+])
+def test_inline_script_escapes_markup(source, embedded):
+    assert inline_script(source) == embedded
@@ -0,0 +1,96 @@
+import pytest
+
+from all_agents.file_policy import DEFAULT_EXCLUDE, DEFAULT_MAX_FILE_SIZE, FilePolicy, matches
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    # ** spans any number of directories, including none
+    ("**/venv/**", "venv/lib/x.py", True),
+    ("**/venv/**", "a/b/venv/lib/x.py", True),
+    ("**/venv/**", "myvenv/x.py", False),
+    ("src/**/test_*.py", "src/test_a.py", True),
+    ("src/**/test_*.py", "src/a/b/test_a.py", True),
+    ("docs/**", "docs/a/b.md", True),
+    # * and ? stay within one directory
+    ("src/*.py", "src/a.py", True),
+    ("src/*.py", "src/pkg/a.py", False),
+    ("mod?.py", "pkg/mod1.py", True),
+    ("mod?.py", "pkg/mod10.py", False),
+    # No slash: the file name in any directory
+    ("*_pb2.py", "api_pb2.py", True),
+    ("*_pb2.py", "gen/proto/api_pb2.py", True),
+    ("setup.py", "pkg/setup.py", True),
+    # A slash anchors at the root, with or without a leading one
+    ("build/**", "build/lib/x.py", True),
+    ("build/**", "src/build/x.py", False),
+    ("/setup.py", "setup.py", True),
+    ("/setup.py", "pkg/setup.py", False),
+    ("/build/**", "build/x.py", True),
+    # Regex characters are literal
+    ("a+b.py", "a+b.py", True),
+    ("a+b.py", "aab.py", False),
+])
+def test_glob_matching(pattern, path, expected):
+    assert matches(path, [pattern]) is expected
+
+
+def test_include_narrows_sources_but_keeps_project_files():
+    policy = FilePolicy(include=["src/**"], exclude=["**/legacy/**"])
+    assert policy.allows("src/pkg/a.py")
+    assert not policy.allows("scripts/run.py")
+    assert policy.allows("README.md")
+    assert policy.allows("pyproject.toml")
+    assert policy.allows(".gitlab-ci.yml")
+    # exclude wins over include
+    assert not policy.allows("src/legacy/old.py")
+
+
+def test_forbidden_paths_are_excluded():
+    policy = FilePolicy.from_config({
+        "forbidden_paths": [".git/", "secrets.py", "/config/prod.yaml"],
+        "fetch_policy": {"exclude": []},
+    })
+    assert not policy.allows(".git/config")
+    assert not policy.allows(".git/objects/ab/cd")
+    assert not policy.allows("secrets.py")
+    assert not policy.allows("pkg/secrets.py")
+    assert not policy.allows("config/prod.yaml")
+    assert policy.allows("pkg/.git_helpers.py")
+    assert policy.allows("venv/lib/x.py")
+
+
+@pytest.mark.parametrize("yaml_text", [
+    "",
+    "fetch_policy:\n",
+    "fetch_policy:\n  exclude:\n  include:\n  max_file_size_kb:\n",
+])
+def test_empty_yaml_keys_keep_the_defaults(tmp_path, yaml_text):
+    config = tmp_path / "doc_agent.yaml"
+    config.write_text(yaml_text)
+    policy = FilePolicy.load(config)
+    assert policy.exclude == DEFAULT_EXCLUDE
+    assert policy.include == ()
+    assert policy.max_file_size == DEFAULT_MAX_FILE_SIZE
+    assert not policy.allows("venv/lib/x.py")
+
+
+def test_yaml_settings(tmp_path):
+    config = tmp_path / "doc_agent.yaml"
+    config.write_text(
+        "forbidden_paths:\n  - .git/\n"
+        "fetch_policy:\n  exclude: []\n  include: ['app/**']\n  max_file_size_kb: 0\n"
+    )
+    policy = FilePolicy.load(config)
+    assert policy.exclude == (".git/**",)
+    assert policy.include == ("app/**",)
+    assert policy.max_file_size is None
+    assert not policy.too_big(10 ** 9)
+    assert FilePolicy.load(tmp_path / "missing.yaml").exclude == DEFAULT_EXCLUDE
+
+
+def test_size_limit():
+    policy = FilePolicy(max_file_size=100)
+    assert not policy.too_big(100)
+    assert policy.too_big(101)
+    # Unknown sizes are fetched
+    assert not policy.too_big(None)
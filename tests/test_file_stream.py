@@ -0,0 +1,42 @@
+import pytest
+
+from all_agents.file_stream import FileConsumer, SpooledFiles, TextFiles, pump
+from all_agents.repository_analyser import RepositoryFetcher
+from all_agents.tree_index import is_docker_file, is_python_file
+from benchmarks.stub_forge import StubForge
+from benchmarks.synthetic_repo import generate
+
+LATIN_1 = "café = 1\n".encode("latin-1")
+
+
+def test_streamed_and_fetched_runs_report_the_same_errors(tmp_path):
+    synthetic = generate(python_files=10)
+    synthetic.files["pkg/legacy.py"] = LATIN_1
+    synthetic.files["docker/legacy_compose.Dockerfile.py"] = LATIN_1
+    with StubForge([synthetic]) as forge:
+        project = f"{forge.namespace}/{synthetic.name}"
+        fetched = RepositoryFetcher(forge.gitlab_url, "token", "gitlab", mode="files")
+        files, _, _ = fetched.fetch(project)
+
+        streamed = RepositoryFetcher(forge.gitlab_url, "token", "gitlab", mode="files")
+        blobs, _, _ = streamed.stream(project)
+        texts, sources = pump(blobs, [
+            TextFiles(is_docker_file, errors=streamed.errors),
+            SpooledFiles(tmp_path, is_python_file, errors=streamed.errors),
+        ])
+
+    def failures(fetcher):
+        return sorted((error.path, error.error) for error in fetcher.errors)
+
+    assert [path for path, _ in failures(fetched)] == ["docker/legacy_compose.Dockerfile.py", "pkg/legacy.py"]
+    assert failures(streamed) == failures(fetched)
+    assert "pkg/legacy.py" not in files and "pkg/legacy.py" not in sources
+    assert set(sources) == {path for path in files if is_python_file(path)}
+
+
+def test_consumers_must_implement_consume():
+    class Incomplete(FileConsumer):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
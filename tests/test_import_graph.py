@@ -0,0 +1,96 @@
+import re
+
+from all_agents.import_graph import OTHER, ImportGraph, build_diagrams, cap_edges, cap_nodes
+from models import ModuleRecord
+
+
+def records(imports):
+    """path -> ModuleRecord for a {path: [imports]} dict"""
+    return {path: ModuleRecord(path=path, imports=list(names)) for path, names in imports.items()}
+
+
+def nodes(diagram):
+    return re.findall(r'^n\d+\["([^<]*)<br/>', diagram["source"], re.M)
+
+
+def edges(diagram):
+    return [line for line in diagram["source"].splitlines() if "-->" in line]
+
+
+def test_imports_resolve_to_repository_modules():
+    graph = ImportGraph(records({
+        "src/app/__init__.py": [".core"],
+        "src/app/core.py": ["os", "requests", "app.util.helper", "..shared"],
+        "src/app/util.py": ["core.thing"],
+        "src/shared.py": [],
+    }))
+    assert graph.edges == {
+        "app": {"app.core"},
+        # third-party imports are dropped, attributes fall back to their module
+        "app.core": {"app.util", "shared"},
+        # flat import matched on a unique suffix
+        "app.util": {"app.core"},
+        "shared": set(),
+    }
+
+
+def test_node_cap_folds_the_least_connected_groups():
+    imports = {f"pkg{i}/mod.py": [] for i in range(10)}
+    imports["pkg0/mod.py"] = ["pkg1.mod", "pkg2.mod"]
+    imports["pkg3/mod.py"] = ["pkg1.mod"]
+    sizes, weights = ImportGraph(records(imports)).collapse(1)
+
+    capped_sizes, capped_weights = cap_nodes(sizes, weights, max_nodes=4)
+    assert set(capped_sizes) == {"pkg0", "pkg1", "pkg2", OTHER}
+    assert sum(capped_sizes.values()) == 10
+    assert capped_weights == {("pkg0", "pkg1"): 1, ("pkg0", "pkg2"): 1, (OTHER, "pkg1"): 1}
+
+
+def test_overview_goes_shallower_before_folding():
+    imports = {f"{top}/sub{i}/mod.py": [] for top in ("a", "b") for i in range(5)}
+    (overview,) = build_diagrams(records(imports), depth=2, max_nodes=4, max_diagrams=1)
+    # 10 groups at depth 2 don't fit, the 2 at depth 1 do
+    assert sorted(nodes(overview)) == ["a", "b"]
+
+    imports = {f"pkg{i}/mod.py": [] for i in range(20)}
+    (overview,) = build_diagrams(records(imports), depth=2, max_nodes=5, max_diagrams=1)
+    assert len(nodes(overview)) == 5
+    assert OTHER in nodes(overview)
+
+
+def test_edge_cap_keeps_the_heaviest_edges():
+    weights = {("a", "b"): 5, ("b", "c"): 1, ("c", "a"): 3, ("a", "c"): 1}
+    kept, hidden = cap_edges(weights, max_edges=2)
+    assert kept == {("a", "b"): 5, ("c", "a"): 3}
+    assert hidden == 2
+    assert cap_edges(weights, max_edges=10) == (weights, 0)
+
+    # Every package imports every other: 8 nodes, 56 edges
+    imports = {f"pkg{i}/mod.py": [f"pkg{j}.mod" for j in range(8) if j != i] for i in range(8)}
+    (overview,) = build_diagrams(records(imports), max_edges=10, max_diagrams=1)
+    assert len(nodes(overview)) == 8
+    assert len(edges(overview)) == 10
+    assert overview["title"].endswith("46 lighter dependencies hidden")
+
+
+def test_large_packages_get_their_own_diagram():
+    imports = {}
+    for package, count in (("big", 6), ("mid", 3), ("small", 2)):
+        for i in range(count):
+            imports[f"{package}/part{i}/mod.py"] = [f"{package}.part{(i + 1) % count}.mod"]
+    imports["flat/only.py"] = ["big.part0.mod"]
+    modules = records(imports)
+
+    diagrams = build_diagrams(modules, depth=1, max_diagrams=3)
+    assert [d["title"] for d in diagrams] == [
+        "Module dependencies (12 modules)", "Inside big", "Inside mid",
+    ]
+    assert sorted(nodes(diagrams[0])) == ["big", "flat", "mid", "small"]
+    # Detail views label nodes relative to the package and drop outside imports
+    assert sorted(nodes(diagrams[1])) == [f"part{i}" for i in range(6)]
+    assert len(edges(diagrams[1])) == 6
+
+    # A package with a single child has nothing to zoom into
+    titles = [d["title"] for d in build_diagrams(modules, depth=1, max_diagrams=10)]
+    assert titles == ["Module dependencies (12 modules)", "Inside big", "Inside mid", "Inside small"]
+    assert build_diagrams({}) == []
@@ -0,0 +1,108 @@
+import io
+import json
+from dataclasses import asdict
+
+import pytest
+
+from all_agents.analysis_cache import AnalysisCache
+from models import Category, CodeIssue, CodeReviewResult, IssueStore, Severity
+
+ISSUES = [
+    CodeIssue("low", "style", "a.py", 3, 1, "E501", "line too long", "ruff"),
+    CodeIssue("high", "security", "b.py", 10, 4, "S602", "shell=True", "bandit"),
+    CodeIssue("medium", "complexity", "a.py", 20, None, "C901", "too complex", "radon"),
+    CodeIssue("critical", "security", "b.py", None, None, "S105", "hardcoded password", "bandit"),
+    CodeIssue("low", "quality", "c.py", 1, 0, "F401", "unused import", "ruff"),
+    CodeIssue("high", "security", "a.py", 7, 0, "S602", "shell=True", "bandit"),
+]
+
+
+@pytest.fixture
+def store():
+    store = IssueStore()
+    for issue in ISSUES:
+        store.add(**asdict(issue))
+    return store
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("critical", Severity.CRITICAL),
+    ("HIGH", Severity.HIGH),
+    ("Medium", Severity.MEDIUM),
+    # Anything unrecognised is low
+    ("UNDEFINED", Severity.LOW),
+    ("", Severity.LOW),
+    (None, Severity.LOW),
+])
+def test_severity_parse(name, expected):
+    assert Severity.parse(name) is expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("security", Category.SECURITY),
+    ("STYLE", Category.STYLE),
+    # Anything unrecognised is a quality issue
+    ("performance", Category.QUALITY),
+    ("", Category.QUALITY),
+    (None, Category.QUALITY),
+])
+def test_category_parse(name, expected):
+    assert Category.parse(name) is expected
+
+
+def test_unknown_names_are_stored_as_their_fallbacks():
+    store = IssueStore([CodeIssue("info", "performance", "a.py", 1, 1, "X1", "m", "tool")])
+    assert (store[0].severity, store[0].category) == ("low", "quality")
+
+
+def test_add_keeps_every_field(store):
+    assert len(store) == len(ISSUES)
+    assert list(store) == ISSUES
+    # Repeated strings are stored once
+    assert store.files.values == ["a.py", "b.py", "c.py"]
+    assert store.messages.values.count("shell=True") == 1
+    assert IssueStore(ISSUES).dicts(range(len(ISSUES))) == store.dicts(range(len(store)))
+
+
+def test_grouping_views(store):
+    assert store.severity_counts() == {"critical": 1, "high": 2, "medium": 1, "low": 2}
+    assert store.category_counts() == {"security": 3, "quality": 1, "complexity": 1, "style": 1}
+    assert store.file_counts() == {"a.py": 3, "b.py": 2, "c.py": 1}
+    assert [store[row].severity for row in store.ranked()] == ["critical", "high", "high", "medium", "low", "low"]
+
+    result = CodeReviewResult(issues=store)
+    assert result.total_issues == 6
+    assert result.critical == [ISSUES[3]]
+    assert result.high == [ISSUES[1], ISSUES[5]]
+    assert result.low == [ISSUES[0], ISSUES[4]]
+    assert result.by_severity()["medium"] == [ISSUES[2]]
+    # Most severe first within a category
+    assert result.by_category()["security"] == [ISSUES[3], ISSUES[1], ISSUES[5]]
+    assert result.by_category()["style"] == [ISSUES[0]]
+
+
+def test_round_trip_through_the_analysis_cache(tmp_path):
+    # File by file, as the review agent adds them
+    store = IssueStore(sorted(ISSUES, key=lambda issue: issue.file))
+    cache = AnalysisCache(tmp_path)
+    for path, rows in zip(store.files.values, store.by_file):
+        cache.put("review", "ruff=1", path, f"source of {path}", store.dicts(rows))
+
+    # A fresh cache instance, as on the next run
+    cache = AnalysisCache(tmp_path)
+    reloaded = IssueStore()
+    for path in ("a.py", "b.py", "c.py"):
+        for item in cache.get("review", "ruff=1", path, f"source of {path}"):
+            reloaded.add(**item)
+
+    original, restored = CodeReviewResult(issues=store), CodeReviewResult(issues=reloaded)
+    assert restored.to_dict() == original.to_dict()
+    assert sorted(map(repr, reloaded)) == sorted(map(repr, ISSUES))
+
+
+def test_write_json_matches_to_dict(store):
+    result = CodeReviewResult(issues=store, metrics={"total_issues": 6})
+    buffer = io.StringIO()
+    result.write_json(buffer)
+    assert json.loads(buffer.getvalue()) == result.to_dict()
+    assert result.to_dict()["critical"] == [asdict(ISSUES[3])]
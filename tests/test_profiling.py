@@ -0,0 +1,27 @@
+from all_agents.analysis_cache import AnalysisCache
+from all_agents.blob_cache import BlobCache, git_blob_sha
+from profiling import Profiler
+
+
+def test_shared_caches_count_lookups_per_run(tmp_path):
+    blobs, analysis = BlobCache(tmp_path), AnalysisCache(tmp_path)
+    blobs.put(git_blob_sha(b"data"), b"data")
+    analysis.put("modules", "1", "a.py", "x = 1", {"path": "a.py"})
+    first, second = Profiler(), Profiler()
+
+    blobs.get(git_blob_sha(b"data"), first)
+    blobs.get(git_blob_sha(b"other"), second)
+    analysis.get("modules", "1", "a.py", "x = 1", first)
+    analysis.get("modules", "1", "b.py", "y = 2", second)
+    analysis.get("modules", "1", "b.py", "y = 2", second)
+
+    assert first.report()["caches"] == {
+        "analysis.modules": {"hits": 1, "misses": 0, "hit_rate": 1.0},
+        "blob": {"hits": 1, "misses": 0, "hit_rate": 1.0},
+    }
+    assert second.report()["caches"] == {
+        "analysis.modules": {"hits": 0, "misses": 2, "hit_rate": 0.0},
+        "blob": {"hits": 0, "misses": 1, "hit_rate": 0.0},
+    }
+    # The caches' own totals still cover every run
+    assert blobs.stats()["hits"] == 1 and blobs.stats()["misses"] == 1
@@ -0,0 +1,143 @@
+import textwrap
+
+from all_agents.python_extractor import extract_module
+
+
+def extract(source):
+    record, tree = extract_module("pkg/mod.py", textwrap.dedent(source))
+    assert tree is not None and record.error is None
+    return record
+
+
+def test_async_and_nested_defs_get_qualnames_and_spans():
+    record = extract('''
+        """Module doc"""
+
+        class Outer:
+            """Outer doc"""
+
+            async def fetch(self, url: str) -> bytes:
+                """Fetch doc"""
+                def parse(data):
+                    return data
+                return parse(url)
+
+            class Inner:
+                def method(self):
+                    pass
+    ''')
+    functions = {f["qualname"]: f for f in record.functions}
+    assert set(functions) == {
+        "Outer.fetch", "Outer.fetch.<locals>.parse", "Outer.Inner.method",
+    }
+    fetch = functions["Outer.fetch"]
+    assert fetch["type"] == "AsyncFunctionDef"
+    assert fetch["class"] == "Outer"
+    assert fetch["signature"] == "(self, url: str) -> bytes"
+    assert (fetch["lineno"], fetch["end_lineno"]) == (7, 11)
+    # A function defined inside a method belongs to no class
+    assert functions["Outer.fetch.<locals>.parse"]["class"] is None
+    assert functions["Outer.Inner.method"]["class"] == "Outer.Inner"
+
+    classes = {c["qualname"]: c for c in record.classes}
+    assert classes["Outer"]["methods"] == ["fetch"]
+    assert classes["Outer.Inner"]["methods"] == ["method"]
+    assert [(d["type"], d["qualname"]) for d in record.docstrings] == [
+        ("Module", "<module>"), ("ClassDef", "Outer"), ("AsyncFunctionDef", "Outer.fetch"),
+    ]
+
+
+def test_relative_and_absolute_imports():
+    record = extract('''
+        import os.path
+        from . import utils
+        from .models import Record
+        from ..core import *
+        from collections import OrderedDict as OD
+    ''')
+    assert record.imports == [
+        "os.path", ".utils", ".models.Record", "..core", "collections.OrderedDict",
+    ]
+
+
+def test_click_commands_and_options():
+    record = extract('''
+        import click
+
+        @click.group()
+        def cli():
+            """Top level"""
+
+        @cli.command("build-docs", help="Build the docs")
+        @click.argument("project")
+        @click.option("-o", "--output-dir", type=click.Path(), default="out", help="Where to write")
+        @click.option("--verbose/--quiet", default=False)
+        def build(project, output_dir, verbose):
+            pass
+    ''')
+    group, build = record.commands
+    assert (group["name"], group["group"], group["docstring"]) == ("cli", True, "Top level")
+    assert build["name"] == "build-docs"
+    assert build["function"] == "build"
+    assert build["framework"] == "click"
+    assert build["docstring"] == "Build the docs"
+    project, output_dir, verbose = build["arguments"]
+    assert (project["name"], project["kind"], project["required"]) == ("project", "argument", True)
+    assert output_dir == {
+        "name": "output_dir", "kind": "option", "flags": ["-o", "--output-dir"],
+        "type": "click.Path()", "default": "out", "required": False, "help": "Where to write",
+    }
+    assert (verbose["name"], verbose["default"]) == ("verbose", False)
+
+
+def test_typer_commands_read_parameters_from_the_signature():
+    record = extract('''
+        from typing import Annotated
+        from typer import Typer, Option
+        import typer
+
+        app = Typer()
+
+        @app.command()
+        def sync_repo(
+            name: str,
+            retries: int = 3,
+            token: Annotated[str, typer.Option("--token", "-t", help="API token")] = "",
+            dry_run: bool = Option(False, "--dry-run"),
+        ):
+            """Sync one repository"""
+    ''')
+    (command,) = record.commands
+    assert (command["name"], command["framework"]) == ("sync-repo", "typer")
+    assert command["docstring"] == "Sync one repository"
+    params = {p["name"]: p for p in command["arguments"]}
+    assert (params["name"]["kind"], params["name"]["required"]) == ("argument", True)
+    assert (params["retries"]["flags"], params["retries"]["default"]) == (["--retries"], 3)
+    assert params["token"]["flags"] == ["--token", "-t"]
+    assert params["token"]["help"] == "API token"
+    assert params["token"]["type"] == "str"
+    assert (params["dry_run"]["flags"], params["dry_run"]["default"]) == (["--dry-run"], False)
+
+
+def test_unrelated_command_methods_are_not_click_commands():
+    record = extract('''
+        import click
+        from invoke import Collection
+
+        ns = Collection()
+
+        @ns.command()
+        def deploy():
+            pass
+
+        @click.command()
+        def real():
+            pass
+    ''')
+    assert [c["function"] for c in record.commands] == ["real"]
+
+
+def test_unparseable_files_keep_the_error():
+    record, tree = extract_module("broken.py", "def broken(:\n")
+    assert tree is None
+    assert record.error and record.functions == []
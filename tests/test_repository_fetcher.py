@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from all_agents.rate_limiter import RateLimiter
+from all_agents.repository_analyser import RepositoryFetcher
+from benchmarks.stub_forge import StubForge
+from benchmarks.synthetic_repo import generate
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    return generate(python_files=30)
+
+
+def test_github_without_rate_limits_fetches_every_file(synthetic):
+    # GitHub Enterprise with rate limiting off sends no headers and 404s /rate_limit
+    with StubForge([synthetic], rate_limits=False) as forge:
+        fetcher = RepositoryFetcher(forge.github_url, "token", "github", mode="files")
+        files, _, _ = fetcher.fetch(f"{forge.namespace}/{synthetic.name}")
+        assert forge.requests["github.rate_limit"] == 0
+    assert not fetcher.errors
+    assert set(files) >= set(synthetic.python_files)
+
+
+def test_github_blob_paces_on_its_own_response_headers():
+    class Content:
+        decoded_content = b"data"
+        raw_headers = {"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(int(time.time()) + 30)}
+
+    class Repo:
+        def get_contents(self, path, ref):
+            return Content()
+
+    fetcher = RepositoryFetcher("", "token", "github")
+    assert fetcher._github_blob(Repo(), "a.py", "main") == b"data"
+    assert fetcher.rate_limiter._pause_until > time.time()
+
+
+@pytest.mark.parametrize("headers", [None, {}, {"Retry-After": object(), "X-RateLimit-Remaining": "many"}])
+def test_rate_limiter_ignores_missing_or_malformed_headers(headers):
+    limiter = RateLimiter()
+    limiter.observe(headers)
+    assert limiter._pause_until == 0.0 and limiter._spacing == 0.0
+
+
+@pytest.mark.parametrize("platform", ["gitlab", "github"])
+@pytest.mark.parametrize("fail_archives", [False, True])
+def test_archive_and_files_modes_fetch_the_same_files(synthetic, platform, fail_archives):
+    with StubForge([synthetic], fail_archives=fail_archives) as forge:
+        url = forge.gitlab_url if platform == "gitlab" else forge.github_url
+        project = f"{forge.namespace}/{synthetic.name}"
+        by_file, _, _ = RepositoryFetcher(url, "token", platform, mode="files").fetch(project)
+        archive = RepositoryFetcher(url, "token", platform, mode="archive")
+        by_archive, _, _ = archive.fetch(project)
+        requests = dict(forge.requests)
+
+    assert by_archive == by_file
+    assert set(by_file) >= set(synthetic.python_files)
+    assert not archive.errors
+    per_file, tarball = ("gitlab.file", "gitlab.archive") if platform == "gitlab" \
+        else ("github.contents", "github.tarball")
+    assert requests[tarball] >= 1
+    if fail_archives:
+        # Every file came one by one after the archive request failed
+        assert requests[per_file] == 2 * len(by_file)
+    else:
+        assert requests[per_file] == len(by_file)
@@ -0,0 +1,76 @@
+import shutil
+from dataclasses import astuple
+from pathlib import Path
+
+import pytest
+
+from all_agents.analysis_cache import AnalysisCache
+from all_agents.review_agent import BanditAPIError, CodeReviewAgent, _bandit_inprocess
+from benchmarks.synthetic_repo import generate
+
+needs_bandit_cli = pytest.mark.skipif(shutil.which("bandit") is None, reason="bandit CLI not installed")
+
+
+@pytest.fixture(scope="module")
+def repo(tmp_path_factory):
+    synthetic = generate(python_files=60)
+    root = synthetic.write(tmp_path_factory.mktemp("repo")).resolve()
+    return synthetic, root
+
+
+def issues(found, root=None):
+    if root:
+        for issue in found:
+            issue.file = Path(issue.file).resolve().relative_to(root).as_posix()
+    return sorted(astuple(issue) for issue in found)
+
+
+@needs_bandit_cli
+def test_bandit_in_process_matches_cli(repo):
+    synthetic, root = repo
+    paths = synthetic.python_files
+    cli = CodeReviewAgent(backend="subprocess")._run_bandit([root / path for path in paths], 300)
+    in_process = _bandit_inprocess([(path, None) for path in paths], root)
+    assert in_process, "the synthetic repository should trip some bandit checks"
+    assert issues(in_process) == issues(cli, root)
+
+
+def test_bandit_in_process_reads_in_memory_sources(repo):
+    synthetic, root = repo
+    paths = synthetic.python_files
+    from_disk = _bandit_inprocess([(path, None) for path in paths], root)
+    in_memory = _bandit_inprocess([(path, synthetic.files[path].decode()) for path in paths])
+    assert issues(in_memory) == issues(from_disk)
+
+
+def test_bandit_api_change_is_reported(repo, monkeypatch):
+    synthetic, root = repo
+    from bandit.core import manager
+
+    monkeypatch.delattr(manager.BanditManager, "discover_files")
+    with pytest.raises(BanditAPIError):
+        _bandit_inprocess([(synthetic.python_files[0], None)], root)
+
+
+def test_sources_in_memory_match_a_checkout(repo):
+    synthetic, root = repo
+    files = {path: synthetic.files[path].decode() for path in synthetic.python_files}
+    agent = CodeReviewAgent(shards=2)
+    from_checkout, incomplete = agent._analyze(files, print, source_root=root)
+    assert not incomplete
+    # Without a checkout the sources are written once and every tool reads that tree
+    from_memory, incomplete = agent._analyze(files, print)
+    assert not incomplete
+    assert {issue.tool for issue in from_memory} >= {"bandit", "radon"}
+    assert issues(from_memory) == issues(from_checkout)
+
+
+def test_cached_reviews_list_issues_in_the_same_order(repo, tmp_path):
+    synthetic, _ = repo
+    files = {path: synthetic.files[path].decode() for path in synthetic.python_files}
+    cold = CodeReviewAgent(AnalysisCache(tmp_path), shards=2).run(files, progress=lambda _: None)
+    # Half the files come from the cache, the other half are analysed again
+    files.update((path, content + "\n") for path, content in list(files.items())[::2])
+    warm = CodeReviewAgent(AnalysisCache(tmp_path), shards=2).run(files, progress=lambda _: None)
+    assert warm.to_dict()["total_issues"] == cold.to_dict()["total_issues"] > 0
+    assert warm.to_dict() == {**cold.to_dict(), "metrics": warm.metrics}
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from profiling import Profiler
+from scheduler import StageScheduler
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_stages_start_after_their_dependencies_finish(workers):
+    events, lock = [], threading.Lock()
+
+    def stage(name, result):
+        def run(**deps):
+            with lock:
+                events.append(("start", name))
+            time.sleep(0.01)
+            with lock:
+                events.append(("end", name))
+            return result(deps)
+        return run
+
+    scheduler = StageScheduler(max_workers=workers, profiler=Profiler())
+    scheduler.add("fetch", stage("fetch", lambda deps: 2))
+    scheduler.add("python", stage("python", lambda deps: deps["fetch"] * 3), deps=("fetch",))
+    scheduler.add("docker", stage("docker", lambda deps: deps["fetch"] + 1), deps=("fetch",))
+    scheduler.add("report", stage("report", lambda deps: (deps["python"], deps["docker"])),
+                  deps=("python", "docker"))
+
+    results = scheduler.run()
+    assert results == {"fetch": 2, "python": 6, "docker": 3, "report": (6, 3)}
+    for name, deps in (("python", ["fetch"]), ("docker", ["fetch"]), ("report", ["python", "docker"])):
+        for dep in deps:
+            assert events.index(("end", dep)) < events.index(("start", name))
+    assert set(scheduler.profiler.report()["stages"]) == {"fetch", "python", "docker", "report"}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_failing_stage_propagates_and_its_dependents_never_run(workers):
+    ran = []
+    scheduler = StageScheduler(max_workers=workers)
+    scheduler.add("fetch", lambda: ran.append("fetch"))
+
+    def broken(fetch):
+        raise RuntimeError("parse failed")
+    scheduler.add("parse", broken, deps=("fetch",))
+    scheduler.add("python", lambda parse: ran.append("python"), deps=("parse",))
+    scheduler.add("review", lambda parse: ran.append("review"), deps=("parse",))
+
+    with pytest.raises(RuntimeError, match="parse failed"):
+        scheduler.run()
+    assert ran == ["fetch"]
+
+
+def test_unknown_dependency_is_rejected():
+    scheduler = StageScheduler()
+    with pytest.raises(ValueError, match="unknown stage 'fetch'"):
+        scheduler.add("python", lambda fetch: None, deps=("fetch",))
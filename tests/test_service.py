@@ -0,0 +1,77 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from service import DocumentationService, RepoNotAllowed, ServiceHandler
+
+
+@pytest.fixture
+def service(tmp_path):
+    return DocumentationService(tmp_path / "out", allow_local=[])
+
+
+@pytest.mark.parametrize("repo", ["/etc", "file:///etc", "git@example.com:group/project.git",
+                                  "https://example.com/group/project.git"])
+def test_local_repositories_are_refused(service, repo):
+    with pytest.raises(RepoNotAllowed):
+        service.submit(repo)
+    assert service.jobs() == []
+
+
+def test_local_repositories_under_an_allowed_prefix(tmp_path):
+    allowed = tmp_path / "repos"
+    (allowed / "project").mkdir(parents=True)
+    service = DocumentationService(tmp_path / "out", allow_local=[str(allowed)])
+
+    job, created = service.submit(str(allowed / "project"))
+    assert created and job.platform == "local"
+    with pytest.raises(RepoNotAllowed):
+        service.submit(str(allowed / ".." / ".."))
+    with pytest.raises(RepoNotAllowed):
+        service.submit(str(tmp_path))
+
+
+def test_allow_list_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOCS_SERVICE_ALLOW_LOCAL", str(tmp_path))
+    assert DocumentationService(tmp_path / "out").local_allowed(str(tmp_path))
+    monkeypatch.delenv("DOCS_SERVICE_ALLOW_LOCAL")
+    assert not DocumentationService(tmp_path / "out").local_allowed(str(tmp_path))
+
+
+@pytest.mark.parametrize("repo", ["/etc", "file:///etc/passwd"])
+def test_post_local_repository_is_a_bad_request(service, repo):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ServiceHandler)
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_port}/jobs",
+            data=json.dumps({"repo": repo}).encode(), method="POST",
+        )
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request, timeout=10)
+        assert error.value.code == 400
+        assert "not enabled" in json.loads(error.value.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_platforms_on_one_host_share_its_slots(service, monkeypatch, tmp_path):
+    # Templates are found relative to the package directory, where the tools run
+    monkeypatch.chdir(Path(__file__).resolve().parent.parent / "simple_doc_agent")
+    monkeypatch.setenv("DOC_AGENT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("PRERENDER_DIAGRAMS", "0")
+    monkeypatch.setenv("GITLAB_URL", "https://forge.example.com")
+    monkeypatch.setenv("GITLAB_TOKEN", "token")
+    monkeypatch.setenv("GITHUB_URL", "https://forge.example.com/api/v3")
+    monkeypatch.setenv("GITHUB_TOKEN", "token")
+
+    gitlab, github = service.orchestrator("gitlab"), service.orchestrator("github")
+    assert gitlab.fetcher.host_slots is github.fetcher.host_slots
+    assert gitlab.fork().fetcher.forge_slot() is gitlab.fetcher.host_slots